@@ -0,0 +1,72 @@
+# applications/accounts/signals.py
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core.utils.orchestrator import notify_accounts_changed
+from users.models import User
+
+from .models import Account
+
+# Campos que forman parte de la respuesta de identify que cachea el orquestador
+ACCOUNT_FIELDS = {"name", "tax_id", "user", "user_id"}
+USER_FIELDS = {"email"}
+
+
+def _changes(update_fields, fields) -> bool:
+    # save(update_fields=[...]) sin campos relevantes, p. ej. los contadores de
+    # escaneos o last_activity, no cambia las cuentas
+    return update_fields is None or bool(set(update_fields) & fields)
+
+
+def _notify_on_commit(*emails):
+    transaction.on_commit(lambda: notify_accounts_changed(emails))
+
+
+@receiver(pre_save, sender=Account)
+def remember_account_owner(sender, instance, update_fields=None, **kwargs):
+    instance._previous_email = None
+    if instance.pk and _changes(update_fields, ACCOUNT_FIELDS):
+        instance._previous_email = (
+            Account.objects.filter(pk=instance.pk)
+            .values_list("user__email", flat=True)
+            .first()
+        )
+
+
+@receiver(post_save, sender=Account)
+def account_saved(sender, instance, created, update_fields=None, **kwargs):
+    if created or _changes(update_fields, ACCOUNT_FIELDS):
+        _notify_on_commit(
+            instance.user.email, getattr(instance, "_previous_email", None)
+        )
+
+
+@receiver(post_delete, sender=Account)
+def account_deleted(sender, instance, **kwargs):
+    email = User.objects.filter(pk=instance.user_id).values_list("email", flat=True)
+    _notify_on_commit(email.first())
+
+
+@receiver(pre_save, sender=User)
+def remember_user_email(sender, instance, update_fields=None, **kwargs):
+    instance._previous_email = None
+    if instance.pk and _changes(update_fields, USER_FIELDS):
+        instance._previous_email = (
+            User.objects.filter(pk=instance.pk)
+            .values_list("email", flat=True)
+            .first()
+        )
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields=None, **kwargs):
+    # Un usuario nuevo puede estar en la caché negativa del orquestador
+    previous = getattr(instance, "_previous_email", None)
+    if created or (previous and previous != instance.email):
+        _notify_on_commit(instance.email, previous)
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    _notify_on_commit(instance.email)
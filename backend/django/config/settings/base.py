@@ -104,6 +104,11 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 # Configuración personalizada
 MAX_INACTIVITY_MINUTES = 30
 
+# Orquestador: se le avisa cuando cambian las cuentas de un usuario para que
+# invalide su caché de identify (vacío: sin avisos, solo caduca por TTL)
+ORCHESTRATOR_URL = config("ORCHESTRATOR_URL", default="")
+ORCHESTRATOR_INTERNAL_TOKEN = config("ORCHESTRATOR_INTERNAL_TOKEN", default="")
+
 # ❌ Eliminadas todas las variables AXES_*
 
 LOGGING = {
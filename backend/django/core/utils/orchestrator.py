@@ -0,0 +1,39 @@
+# core/utils/orchestrator.py
+import json
+import logging
+import threading
+import urllib.request
+
+from django.conf import settings
+
+logger = logging.getLogger("custom")
+
+
+def notify_accounts_changed(emails):
+    """
+    Avisa al orquestador de que han cambiado las cuentas de `emails` para que
+    deje de usar las que tiene en caché.
+    - Se envía en segundo plano: no retrasa ni hace fallar la petición.
+    - Sin ORCHESTRATOR_URL no se avisa (el orquestador caduca su caché solo).
+    """
+    emails = sorted({email for email in emails if email})
+    if not settings.ORCHESTRATOR_URL or not emails:
+        return
+    threading.Thread(target=_post_invalidation, args=(emails,), daemon=True).start()
+
+
+def _post_invalidation(emails):
+    request = urllib.request.Request(
+        f"{settings.ORCHESTRATOR_URL.rstrip('/')}/internal/accounts/invalidate",
+        data=json.dumps({"emails": emails}).encode(),
+        headers={
+            "Content-Type": "application/json",
+            "X-Internal-Token": settings.ORCHESTRATOR_INTERNAL_TOKEN,
+        },
+        method="POST",
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=5):
+            pass
+    except Exception as exc:
+        logger.error(f"No se pudo invalidar la caché de cuentas de {emails}: {exc}")
@@ -0,0 +1,87 @@
+import time
+from contextlib import contextmanager
+
+from fastapi import Request
+from prometheus_client import Counter, Gauge, Histogram
+
+# Buckets pensados para llamadas externas que van de ms a minutos
+LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "odoo_http_request_duration_seconds",
+    "Duración de las peticiones HTTP recibidas",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "odoo_http_requests_in_flight",
+    "Peticiones HTTP en curso",
+)
+HTTP_REQUEST_ERRORS = Counter(
+    "odoo_http_request_errors_total",
+    "Excepciones no controladas por ruta y tipo",
+    ["route", "exception"],
+)
+
+DEPENDENCY_DURATION = Histogram(
+    "odoo_dependency_duration_seconds",
+    "Duración de las llamadas a servicios externos",
+    ["dependency", "operation"],
+    buckets=LATENCY_BUCKETS,
+)
+DEPENDENCY_IN_FLIGHT = Gauge(
+    "odoo_dependency_in_flight",
+    "Llamadas a servicios externos en curso",
+    ["dependency"],
+)
+DEPENDENCY_ERRORS = Counter(
+    "odoo_dependency_errors_total",
+    "Errores en llamadas a servicios externos por tipo de excepción",
+    ["dependency", "operation", "exception"],
+)
+
+
+@contextmanager
+def observe_dependency(dependency: str, operation: str):
+    """Mide una llamada a un servicio externo y cuenta sus errores por tipo."""
+    in_flight = DEPENDENCY_IN_FLIGHT.labels(dependency)
+    in_flight.inc()
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception as exc:
+        DEPENDENCY_ERRORS.labels(dependency, operation, type(exc).__name__).inc()
+        raise
+    finally:
+        DEPENDENCY_DURATION.labels(dependency, operation).observe(
+            time.perf_counter() - start
+        )
+        in_flight.dec()
+
+
+async def metrics_middleware(request: Request, call_next):
+    """Registra la duración y el estado de cada petición por ruta."""
+    if request.url.path.endswith("/metrics"):
+        return await call_next(request)
+
+    HTTP_REQUESTS_IN_FLIGHT.inc()
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    except Exception as exc:
+        route = request.scope.get("route")
+        HTTP_REQUEST_ERRORS.labels(
+            getattr(route, "path", "desconocida"), type(exc).__name__
+        ).inc()
+        raise
+    finally:
+        route = request.scope.get("route")
+        HTTP_REQUEST_DURATION.labels(
+            request.method,
+            getattr(route, "path", "desconocida"),
+            str(status),
+        ).observe(time.perf_counter() - start)
+        HTTP_REQUESTS_IN_FLIGHT.dec()
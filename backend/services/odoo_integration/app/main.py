@@ -3,7 +3,8 @@ from exponential_core.exceptions import (
     setup_exception_handlers,
     GlobalExceptionMiddleware,
 )
-from app.api.routes import v16, v18
+from app.api.routes import v16, v18, metrics
+from app.core.metrics import metrics_middleware
 from app.core.lifespan import lifespan
 
 # Crear instancia de FastAPI
@@ -14,12 +15,16 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+# Latencia y peticiones en curso por ruta (dentro del manejador global de errores)
+app.middleware("http")(metrics_middleware)
+
 # Middleware global para manejar errores inesperados
 app.add_middleware(GlobalExceptionMiddleware)
 
 # Registrar rutas
 app.include_router(v16.router)
 app.include_router(v18.router)
+app.include_router(metrics.router)
 
 # Registrar todos los exception handlers de forma automática
 setup_exception_handlers(app)
@@ -1,6 +1,7 @@
 import httpx
 from exponential_core.exceptions import CustomAppException, OdooException
 from exponential_core.logger import get_logger
+from app.core.metrics import observe_dependency
 from app.core.settings import settings
 from app.services.odoo.exceptions import OdooCallException
 
@@ -39,7 +40,8 @@ class AsyncOdooClient:
         try:
 
             async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(self.jsonrpc_url, json=payload)
+                with observe_dependency("odoo_jsonrpc", "authenticate"):
+                    response = await client.post(self.jsonrpc_url, json=payload)
                 data = response.json()
 
                 if "error" in data:
@@ -106,7 +108,8 @@ class AsyncOdooClient:
         }
 
         async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.post(self.jsonrpc_url, json=payload)
+            with observe_dependency("odoo_jsonrpc", method):
+                response = await client.post(self.jsonrpc_url, json=payload)
 
         try:
             data = response.json()
@@ -5,6 +5,8 @@ from exponential_core.exceptions import (
     SecretsServiceNotLoaded,
 )
 
+from app.core.metrics import observe_dependency
+
 
 class SecretsService:
     def __init__(self, company_vat: str):
@@ -14,7 +16,8 @@ class SecretsService:
         self._secrets = None
 
     async def load(self):
-        self._secrets = await self.secret_manager.get_secret()
+        with observe_dependency("secrets_manager", "get_secret"):
+            self._secrets = await self.secret_manager.get_secret()
         if not self._secrets:
             raise SecretsNotFound(company_vat=self.company_vat)
         return self
@@ -4,7 +4,8 @@ from exponential_core.exceptions import (
     setup_exception_handlers,
     GlobalExceptionMiddleware,
 )
-from app.api.routes import entry
+from app.api.routes import entry, metrics
+from app.core.metrics import metrics_middleware
 from app.core.lifespan import lifespan
 
 app = FastAPI(
@@ -15,6 +16,9 @@ app = FastAPI(
 )
 
 
+# Latencia y peticiones en curso por ruta (dentro del manejador global de errores)
+app.middleware("http")(metrics_middleware)
+
 # Middleware global para manejar excepciones
 app.add_middleware(GlobalExceptionMiddleware)
 
@@ -23,6 +27,7 @@ app.add_middleware(GlobalExceptionMiddleware)
 
 # Registrar rutas
 app.include_router(entry.router)
+app.include_router(metrics.router)
 
 # Registrar todos los exception handlers de forma automática
 setup_exception_handlers(app)
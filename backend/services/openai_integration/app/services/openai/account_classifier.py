@@ -7,6 +7,7 @@ from openai import AsyncOpenAI
 
 from app.core.settings import settings
 from app.core.logging import logger
+from app.core.metrics import observe_dependency
 from app.services.openai.schemas.account_category import AccountCategory
 
 DEFAULT_CATEGORY = {
@@ -59,18 +60,19 @@ async def classify_account(text: str, chart: str) -> AccountCategory:
                 f"🔎 Intento {attempt}: Clasificando cuenta contable con OpenAI"
             )
 
-            response = await client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "Eres un asistente contable experto.",
-                    },
-                    {"role": "user", "content": prompt},
-                ],
-                temperature=0.1,
-                max_tokens=300,
-            )
+            with observe_dependency("openai", "account_classifier"):
+                response = await client.chat.completions.create(
+                    model="gpt-4o",
+                    messages=[
+                        {
+                            "role": "system",
+                            "content": "Eres un asistente contable experto.",
+                        },
+                        {"role": "user", "content": prompt},
+                    ],
+                    temperature=0.1,
+                    max_tokens=300,
+                )
 
             content = response.choices[0].message.content.strip()
 
@@ -5,6 +5,7 @@ from fastapi import HTTPException
 from openai import AsyncOpenAI
 from app.core.settings import settings
 from app.core.logging import logger
+from app.core.metrics import observe_dependency
 
 DEFAULT_CIF = {"CIF": "0"}
 MAX_ATTEMPTS = 2
@@ -44,18 +45,19 @@ async def search_cif_by_partner(partner_name: str) -> dict:
                 f"🔎 Intento {attempt}: Buscando CIF con OpenAI para {partner_name}"
             )
 
-            response = await client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "Eres un asistente experto en datos empresariales españoles.",
-                    },
-                    {"role": "user", "content": prompt},
-                ],
-                temperature=0.1,
-                max_tokens=100,
-            )
+            with observe_dependency("openai", "search_by_cif"):
+                response = await client.chat.completions.create(
+                    model="gpt-4o",
+                    messages=[
+                        {
+                            "role": "system",
+                            "content": "Eres un asistente experto en datos empresariales españoles.",
+                        },
+                        {"role": "user", "content": prompt},
+                    ],
+                    temperature=0.1,
+                    max_tokens=100,
+                )
 
             content = response.choices[0].message.content.strip()
             cleaned = re.sub(
@@ -7,6 +7,7 @@ from openai import AsyncOpenAI
 
 from app.core.settings import settings
 from app.core.logging import logger
+from app.core.metrics import observe_dependency
 from app.services.openai.schemas.classification_tax_request import (
     ClasificacionRequest,
     TaxIdResponseSchema,
@@ -73,18 +74,19 @@ async def classify_tax_id(payload: ClasificacionRequest) -> TaxIdResponseSchema:
 
             client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
 
-            response = await client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "Eres un experto contable y fiscal en clasificación de impuestos para facturas.",
-                    },
-                    {"role": "user", "content": prompt},
-                ],
-                temperature=0.1,
-                max_tokens=300,
-            )
+            with observe_dependency("openai", "tax_id_classifier"):
+                response = await client.chat.completions.create(
+                    model="gpt-4o",
+                    messages=[
+                        {
+                            "role": "system",
+                            "content": "Eres un experto contable y fiscal en clasificación de impuestos para facturas.",
+                        },
+                        {"role": "user", "content": prompt},
+                    ],
+                    temperature=0.1,
+                    max_tokens=300,
+                )
 
             content = response.choices[0].message.content.strip()
 
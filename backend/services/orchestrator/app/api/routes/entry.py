@@ -1,18 +1,39 @@
-from fastapi import APIRouter, Form, File, UploadFile, status
+from fastapi import APIRouter, Form, File, Header, UploadFile, status
 from typing import List
-from app.services.taggun.main import handle_invoice_scan, handle_multiple_invoice_scans
+from app.services.taggun.main import (
+    get_invoice_scan_job,
+    handle_multiple_invoice_scans,
+    handle_single_invoice_scan,
+)
 from app.core.logging import logger
 
 router = APIRouter()
 
 
 @router.post("/", name="Procesar una factura", status_code=status.HTTP_201_CREATED)
-async def base(recipient: str = Form(...), file: UploadFile = File(...)):
-    return await handle_invoice_scan(recipient=recipient, file=file)
+async def base(
+    recipient: str = Form(...),
+    file: UploadFile = File(...),
+    idempotency_key: str | None = Header(None, alias="Idempotency-Key"),
+):
+    return await handle_single_invoice_scan(
+        recipient=recipient, file=file, idempotency_key=idempotency_key
+    )
 
 
 @router.post(
-    "/bulk", name="Procesar múltiples facturas", status_code=status.HTTP_201_CREATED
+    "/bulk", name="Procesar múltiples facturas", status_code=status.HTTP_202_ACCEPTED
 )
-async def bulk(recipient: str = Form(...), files: List[UploadFile] = File(...)):
-    return await handle_multiple_invoice_scans(recipient=recipient, files=files)
+async def bulk(
+    recipient: str = Form(...),
+    files: List[UploadFile] = File(...),
+    idempotency_key: str | None = Header(None, alias="Idempotency-Key"),
+):
+    return await handle_multiple_invoice_scans(
+        recipient=recipient, files=files, idempotency_key=idempotency_key
+    )
+
+
+@router.get("/bulk/{job_id}", name="Estado del procesamiento múltiple")
+async def bulk_status(job_id: str):
+    return get_invoice_scan_job(job_id=job_id)
@@ -0,0 +1,27 @@
+import hmac
+
+from fastapi import APIRouter, Header, HTTPException, status
+
+from app.core.settings import settings
+from app.services.admin.schemas import AccountsChangedSchema
+from app.services.taggun.account_lookup import invalidate_accounts
+
+# Avisos entre servicios: solo se aceptan con el token interno compartido
+router = APIRouter(prefix="/internal", include_in_schema=False)
+
+
+def _check_token(token: str | None):
+    expected = settings.INTERNAL_API_TOKEN
+    if not expected or not token or not hmac.compare_digest(token, expected):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Token interno inválido"
+        )
+
+
+@router.post("/accounts/invalidate", name="Invalidar la caché de cuentas")
+async def accounts_invalidate(
+    body: AccountsChangedSchema,
+    token: str | None = Header(None, alias="X-Internal-Token"),
+):
+    _check_token(token)
+    return {"invalidated": invalidate_accounts(body.emails)}
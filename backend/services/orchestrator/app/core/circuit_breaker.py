@@ -0,0 +1,254 @@
+import functools
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Callable
+
+import httpx
+
+from app.core.exceptions import CircuitOpenError
+from app.core.logging import logger
+from app.core.metrics import CIRCUIT_REJECTED, CIRCUIT_STATE, CIRCUIT_TRANSITIONS
+from app.core.settings import settings
+
+
+class CircuitState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+_STATE_VALUES = {
+    CircuitState.CLOSED: 0,
+    CircuitState.HALF_OPEN: 1,
+    CircuitState.OPEN: 2,
+}
+
+
+def is_dependency_failure(exc: BaseException) -> bool:
+    """
+    Un error cuenta como caída si el servicio no respondió (timeout, conexión)
+    o respondió con un 5xx. Se recorre la cadena de excepciones porque los
+    clientes envuelven los errores de httpx en sus propias excepciones.
+    """
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        seen.add(id(exc))
+        if isinstance(exc, httpx.TransportError):
+            return True
+        if isinstance(exc, httpx.HTTPStatusError):
+            return exc.response.status_code >= 500
+        exc = exc.__cause__ or exc.__context__
+    return False
+
+
+def raise_for_outage(response: httpx.Response, body: Any):
+    """
+    Lanza `HTTPStatusError` si la respuesta es un 5xx sin un error
+    estructurado (`error_type` o `detail`) en `body`: la página de una
+    pasarela o un fallo no controlado del servicio. Un 5xx con error
+    estructurado es un error del servicio (o del ERP de un cliente) que sí
+    respondió, y no cuenta como caída.
+    """
+    if response.status_code < 500:
+        return
+    if isinstance(body, dict) and ("error_type" in body or "detail" in body):
+        return
+    response.raise_for_status()
+
+
+@dataclass
+class CircuitCall:
+    """Llamada admitida por el circuito."""
+
+    probe: bool
+    failed: bool = False
+
+    def mark_failure(self):
+        """Para los clientes que gestionan sus propios errores sin propagarlos."""
+        self.failed = True
+
+
+class CircuitBreaker:
+    """
+    Circuito por dependencia:
+    - closed: las llamadas pasan; `failure_threshold` fallos seguidos lo abren.
+    - open: las llamadas fallan al instante con `CircuitOpenError` durante
+      `recovery_timeout` segundos, sin ocupar conexiones ni esperar timeouts.
+    - half_open: pasan como mucho `half_open_max_calls` llamadas de prueba;
+      `success_threshold` éxitos lo cierran y un fallo lo vuelve a abrir.
+    Solo cuentan como fallos las caídas (ver `is_dependency_failure`): un
+    error de negocio significa que el servicio responde.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        half_open_max_calls: int = 1,
+        success_threshold: int = 1,
+    ):
+        if failure_threshold < 1 or half_open_max_calls < 1 or success_threshold < 1:
+            raise ValueError(
+                f"[CIRCUIT] {name}: los umbrales y las llamadas de prueba deben ser >= 1"
+            )
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.success_threshold = success_threshold
+
+        self._state = CircuitState.CLOSED
+        self._failures = 0
+        self._successes = 0
+        self._probes = 0
+        self._opened_at = 0.0
+        CIRCUIT_STATE.labels(name).set(_STATE_VALUES[self._state])
+
+    @property
+    def state(self) -> CircuitState:
+        if (
+            self._state is CircuitState.OPEN
+            and time.monotonic() - self._opened_at >= self.recovery_timeout
+        ):
+            self._transition(CircuitState.HALF_OPEN)
+        return self._state
+
+    def retry_after(self) -> float:
+        """Segundos hasta que el circuito vuelva a admitir llamadas de prueba."""
+        if self.state is not CircuitState.OPEN:
+            return 0.0
+        return max(0.0, self._opened_at + self.recovery_timeout - time.monotonic())
+
+    def ensure_available(self):
+        """Falla si el circuito está abierto, sin reservar una llamada."""
+        if self.state is CircuitState.OPEN:
+            CIRCUIT_REJECTED.labels(self.name).inc()
+            raise CircuitOpenError(self.name, self.retry_after())
+
+    def acquire(self) -> CircuitCall:
+        state = self.state
+        if state is CircuitState.HALF_OPEN:
+            if self._probes >= self.half_open_max_calls:
+                CIRCUIT_REJECTED.labels(self.name).inc()
+                raise CircuitOpenError(self.name, 0.0)
+            self._probes += 1
+            return CircuitCall(probe=True)
+        self.ensure_available()
+        return CircuitCall(probe=False)
+
+    def record_success(self, call: CircuitCall):
+        self._release(call)
+        if self._state is CircuitState.HALF_OPEN and call.probe:
+            self._successes += 1
+            if self._successes >= self.success_threshold:
+                self._transition(CircuitState.CLOSED)
+        elif self._state is CircuitState.CLOSED:
+            self._failures = 0
+
+    def record_failure(self, call: CircuitCall):
+        self._release(call)
+        if self._state is CircuitState.HALF_OPEN and call.probe:
+            self._transition(CircuitState.OPEN)
+        elif self._state is CircuitState.CLOSED:
+            self._failures += 1
+            if self._failures >= self.failure_threshold:
+                self._transition(CircuitState.OPEN)
+
+    def _release(self, call: CircuitCall):
+        if call.probe:
+            self._probes = max(0, self._probes - 1)
+
+    @contextmanager
+    def guard(self):
+        """
+        Admite la llamada o lanza `CircuitOpenError`, y anota el resultado al
+        salir. Una cancelación libera la llamada sin contar como resultado.
+        """
+        call = self.acquire()
+        try:
+            yield call
+        except Exception as exc:
+            if call.failed or is_dependency_failure(exc):
+                self.record_failure(call)
+            else:
+                self.record_success(call)
+            raise
+        except BaseException:
+            self._release(call)
+            raise
+        else:
+            if call.failed:
+                self.record_failure(call)
+            else:
+                self.record_success(call)
+
+    def _transition(self, state: CircuitState):
+        previous, self._state = self._state, state
+        self._failures = 0
+        self._successes = 0
+        if state is CircuitState.OPEN:
+            self._opened_at = time.monotonic()
+            logger.warning(
+                f"[CIRCUIT] {self.name}: circuito abierto ({previous.value} -> open), "
+                f"se rechazan las llamadas durante {self.recovery_timeout:g}s"
+            )
+        else:
+            logger.info(f"[CIRCUIT] {self.name}: {previous.value} -> {state.value}")
+        CIRCUIT_STATE.labels(self.name).set(_STATE_VALUES[state])
+        CIRCUIT_TRANSITIONS.labels(self.name, state.value).inc()
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+
+
+def get_circuit_breaker(dependency: str, tenant: str | None = None) -> CircuitBreaker:
+    """
+    Circuito compartido de una dependencia (o de uno de sus clientes, si se
+    da `tenant`), con los umbrales de `settings` y los que `CIRCUIT_OVERRIDES`
+    defina para la dependencia.
+    """
+    name = f"{dependency}:{tenant}" if tenant else dependency
+    breaker = _breakers.get(name)
+    if breaker is None:
+        overrides = settings.CIRCUIT_OVERRIDES.get(dependency, {})
+        breaker = CircuitBreaker(
+            name=name,
+            failure_threshold=int(
+                overrides.get("failure_threshold", settings.CIRCUIT_FAILURE_THRESHOLD)
+            ),
+            recovery_timeout=overrides.get(
+                "recovery_timeout", settings.CIRCUIT_RECOVERY_TIMEOUT
+            ),
+            half_open_max_calls=int(
+                overrides.get(
+                    "half_open_max_calls", settings.CIRCUIT_HALF_OPEN_MAX_CALLS
+                )
+            ),
+            success_threshold=int(
+                overrides.get("success_threshold", settings.CIRCUIT_SUCCESS_THRESHOLD)
+            ),
+        )
+        _breakers[name] = breaker
+    return breaker
+
+
+def circuit_breaker(dependency: str, tenant: Callable[..., str | None] | None = None):
+    """
+    Decorador que pasa las llamadas de una función asíncrona por el circuito.
+    `tenant` recibe los argumentos de la llamada y devuelve el cliente cuyo
+    circuito se usa (p. ej. la empresa, cuando cada una tiene su propio ERP).
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            key = tenant(*args, **kwargs) if tenant else None
+            with get_circuit_breaker(dependency, key).guard():
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -33,3 +33,23 @@ class MultiplePartnerTaxIdsError(CustomAppException):
             data={"candidates": candidates},
             status_code=422,
         )
+
+
+class CircuitOpenError(CustomAppException):
+    def __init__(self, dependency: str, retry_after: float):
+        super().__init__(
+            message=f"El servicio {dependency} no está disponible temporalmente.",
+            data={"dependency": dependency, "retry_after": round(retry_after, 2)},
+            status_code=503,
+        )
+        self.dependency = dependency
+        self.retry_after = retry_after
+
+
+class UnknownEmailError(CustomAppException):
+    def __init__(self, email: str):
+        super().__init__(
+            message="El email no pertenece a ningún usuario.",
+            data={"email": email},
+            status_code=404,
+        )
@@ -0,0 +1,136 @@
+import asyncio
+import math
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Generic, TypeVar
+
+from app.core.logging import logger
+from app.core.metrics import HEDGE_DELAY, HEDGE_EVENTS, HEDGED_DURATION
+
+T = TypeVar("T")
+
+# Una llamada devuelve None cuando no sabe resolver la petición (por ejemplo,
+# un OCR local que no encuentra los importes): no cuenta como resultado
+Attempt = Callable[[], Awaitable[T | None]]
+
+
+class LatencyWindow:
+    """
+    Latencias recientes de un servicio. El percentil configurado marca cuánto
+    se espera antes de lanzar la petición de cobertura.
+    """
+
+    def __init__(
+        self,
+        size: int = 200,
+        percentile: float = 0.95,
+        default_delay: float = 10.0,
+        min_delay: float = 1.0,
+        max_delay: float = 30.0,
+        min_samples: int = 20,
+    ):
+        self.percentile = percentile
+        self.default_delay = default_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.min_samples = min_samples
+        self._samples: deque[float] = deque(maxlen=size)
+
+    def record(self, seconds: float):
+        self._samples.append(seconds)
+
+    def delay(self) -> float:
+        if len(self._samples) < self.min_samples:
+            return self.default_delay
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, math.ceil(self.percentile * len(ordered)) - 1)
+        return min(self.max_delay, max(self.min_delay, ordered[index]))
+
+
+@dataclass(frozen=True)
+class HedgeResult(Generic[T]):
+    value: T | None
+    winner: str
+    hedged: bool
+    elapsed: float
+
+
+async def hedge(
+    operation: str,
+    primary: tuple[str, Attempt],
+    secondary: tuple[str, Attempt] | None,
+    window: LatencyWindow,
+    enabled: bool = True,
+) -> HedgeResult[T]:
+    """
+    Lanza `primary` y, si no responde antes del percentil de `window`, lanza
+    también `secondary`. Gana el primer resultado válido y el otro se cancela.
+    Si `primary` falla, `secondary` actúa como respaldo; si ninguno resuelve
+    se propaga el error de `primary`.
+    """
+    start = time.monotonic()
+    tasks: dict[asyncio.Task, str] = {}
+    fired = False
+
+    def launch(name: str, call: Attempt) -> asyncio.Task:
+        task = asyncio.create_task(call(), name=f"{operation}:{name}")
+        tasks[task] = name
+        return task
+
+    def finish(value, winner: str) -> HedgeResult:
+        elapsed = time.monotonic() - start
+        if winner == primary[0]:
+            outcome = "primary_won" if fired else "not_fired"
+        else:
+            outcome = "secondary_won" if fired else "fallback"
+        HEDGE_EVENTS.labels(operation, outcome).inc()
+        HEDGED_DURATION.labels(operation, winner).observe(elapsed)
+        return HedgeResult(value, winner, fired, elapsed)
+
+    primary_task = launch(*primary)
+    try:
+        delay = window.delay()
+        HEDGE_DELAY.labels(operation).set(delay)
+        hedging = secondary is not None and enabled
+        await asyncio.wait({primary_task}, timeout=delay if hedging else None)
+        if not primary_task.done():
+            fired = True
+            logger.info(
+                f"[HEDGE] {operation}: {primary[0]} sin respuesta tras "
+                f"{delay:.2f}s, se lanza {secondary[0]}"
+            )
+            launch(*secondary)
+
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            # Si terminan a la vez, se prefiere primary
+            for task in sorted(done, key=lambda t: t is not primary_task):
+                failed = task.exception() is not None
+                value = None if failed else task.result()
+                if failed and task is not primary_task:
+                    logger.warning(
+                        f"[HEDGE] {operation}: {tasks[task]} falló: {task.exception()!r}"
+                    )
+                if task is primary_task and not failed:
+                    window.record(time.monotonic() - start)
+                if value is not None:
+                    if task is not primary_task and not primary_task.done():
+                        # La latencia real de primary es mayor: se anota la cota
+                        # inferior para que el percentil no se desplace a la baja
+                        window.record(time.monotonic() - start)
+                    return finish(value, tasks[task])
+                if task is primary_task and secondary and len(tasks) == 1:
+                    pending.add(launch(*secondary))
+
+        HEDGE_EVENTS.labels(operation, "failed").inc()
+        if primary_task.exception() is not None:
+            raise primary_task.exception()
+        return HedgeResult(None, primary[0], fired, time.monotonic() - start)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
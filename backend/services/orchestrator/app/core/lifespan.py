@@ -1,13 +1,41 @@
+import httpx
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from app.services.taggun.client import TaggunService
+from app.services.taggun.cache import OcrPayloadCache
+from app.services.taggun.providers import (
+    OcrRouter,
+    TaggunProvider,
+    TesseractProvider,
+    TextLayerProvider,
+)
+from app.services.jobs.manager import JobManager
+from app.services.results.store import ScanResultStore
+from app.services.idempotency.store import IdempotencyStore
+from app.services.scheduler.fair_share import FairShareScheduler
+from app.services.upload.outbox import ArchiveOutbox
 from app.core.client_provider import ProviderConfig
+from app.core.hedging import LatencyWindow
+from app.core.rate_limit import AdaptiveRateLimiter
+from app.core.schemas.enums import DownstreamEnum
 from app.core.settings import settings, RUNNING_IN_DOCKER
 from app.core.init_settings import inject_secrets
 from app.core.logging import logger
 
 # Variable interna
 _taggun_service: TaggunService | None = None
+_job_manager: JobManager | None = None
+_result_store: ScanResultStore | None = None
+_ocr_cache: OcrPayloadCache | None = None
+_scheduler: FairShareScheduler | None = None
+_archive_outbox: ArchiveOutbox | None = None
+_idempotency_store: IdempotencyStore | None = None
+_image_executor: ThreadPoolExecutor | None = None
+_local_ocr_executor: ProcessPoolExecutor | None = None
+_ocr_router: OcrRouter | None = None
+_http_clients: dict[DownstreamEnum, httpx.AsyncClient] = {}
 
 
 def get_taggun_service() -> TaggunService:
@@ -17,9 +45,102 @@ def get_taggun_service() -> TaggunService:
     return _taggun_service
 
 
+def get_job_manager() -> JobManager:
+    """Devuelve la instancia actual del gestor de trabajos de /bulk."""
+    if _job_manager is None:
+        raise RuntimeError("JobManager no está inicializado todavía")
+    return _job_manager
+
+
+def get_result_store() -> ScanResultStore:
+    """Devuelve el almacén de resultados de escaneos por hash de archivo."""
+    if _result_store is None:
+        raise RuntimeError("ScanResultStore no está inicializado todavía")
+    return _result_store
+
+
+def get_ocr_cache() -> OcrPayloadCache:
+    """Devuelve la caché de payloads de Taggun."""
+    if _ocr_cache is None:
+        raise RuntimeError("OcrPayloadCache no está inicializada todavía")
+    return _ocr_cache
+
+
+def get_archive_outbox() -> ArchiveOutbox:
+    """Devuelve la cola persistente de archivos pendientes de archivar."""
+    if _archive_outbox is None:
+        raise RuntimeError("ArchiveOutbox no está inicializado todavía")
+    return _archive_outbox
+
+
+def get_idempotency_store() -> IdempotencyStore:
+    """Devuelve el almacén de respuestas por Idempotency-Key."""
+    if _idempotency_store is None:
+        raise RuntimeError("IdempotencyStore no está inicializado todavía")
+    return _idempotency_store
+
+
+def get_scheduler() -> FairShareScheduler:
+    """Devuelve el planificador de escaneos por tenant."""
+    if _scheduler is None:
+        raise RuntimeError("FairShareScheduler no está inicializado todavía")
+    return _scheduler
+
+
+def get_image_executor() -> ThreadPoolExecutor:
+    """Hilos dedicados a optimizar imágenes (Pillow libera el GIL al procesarlas)."""
+    if _image_executor is None:
+        raise RuntimeError("El executor de imágenes no está inicializado todavía")
+    return _image_executor
+
+
+def get_local_ocr_executor() -> ProcessPoolExecutor:
+    """Procesos para la extracción local de PDFs (PyMuPDF retiene el GIL)."""
+    if _local_ocr_executor is None:
+        raise RuntimeError("El executor de OCR local no está inicializado todavía")
+    return _local_ocr_executor
+
+
+def get_ocr_router() -> OcrRouter:
+    """Devuelve el enrutador de proveedores de OCR."""
+    if _ocr_router is None:
+        raise RuntimeError("OcrRouter no está inicializado todavía")
+    return _ocr_router
+
+
+def get_http_client(service: DownstreamEnum) -> httpx.AsyncClient:
+    """Devuelve el pool HTTP compartido hacia un servicio interno."""
+    client = _http_clients.get(service)
+    if client is None:
+        raise RuntimeError(
+            f"Cliente HTTP de {service.value} no está inicializado todavía"
+        )
+    return client
+
+
+def _create_http_client() -> httpx.AsyncClient:
+    """Cliente con conexiones keep-alive reutilizables entre peticiones."""
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(
+            connect=settings.HTTP_TIMEOUT_CONNECT,
+            read=settings.HTTP_TIMEOUT_READ,
+            write=settings.HTTP_TIMEOUT_WRITE,
+            pool=settings.HTTP_TIMEOUT_POOL,
+        ),
+        limits=httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+        ),
+        http2=settings.HTTP2_ENABLED,
+    )
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    global _taggun_service
+    global _taggun_service, _job_manager, _result_store, _scheduler
+    global _archive_outbox, _idempotency_store, _ocr_cache, _image_executor
+    global _local_ocr_executor, _ocr_router
 
     await inject_secrets()
 
@@ -36,15 +157,139 @@ async def lifespan(app: FastAPI):
             server_url=settings.TAGGUN_URL,
             api_key=settings.TAGGUN_APIKEY,
         ),
-        max_concurrent_requests=5,
+        limiter=AdaptiveRateLimiter(
+            name="taggun",
+            rate=settings.TAGGUN_RATE,
+            burst=settings.TAGGUN_BURST,
+            min_rate=settings.TAGGUN_MIN_RATE,
+            max_rate=settings.TAGGUN_MAX_RATE,
+            concurrency=settings.TAGGUN_CONCURRENCY,
+            min_concurrency=settings.TAGGUN_MIN_CONCURRENCY,
+            max_concurrency=settings.TAGGUN_MAX_CONCURRENCY,
+        ),
+        max_attempts=settings.TAGGUN_MAX_ATTEMPTS,
+        retry_base_delay=settings.TAGGUN_RETRY_BASE_DELAY,
+        retry_max_delay=settings.TAGGUN_RETRY_MAX_DELAY,
     )
     logger.info("[LIFESPAN] Cliente Taggun inicializado")
 
+    for service in DownstreamEnum:
+        _http_clients[service] = _create_http_client()
+    logger.info(
+        f"[LIFESPAN] Pools HTTP inicializados "
+        f"(http2={'sí' if settings.HTTP2_ENABLED else 'no'})"
+    )
+
+    _image_executor = ThreadPoolExecutor(
+        max_workers=settings.IMAGE_OPTIMIZE_WORKERS,
+        thread_name_prefix="image-optimize",
+    )
+
+    # spawn: un fork con hilos y el event loop en marcha puede bloquearse
+    _local_ocr_executor = ProcessPoolExecutor(
+        max_workers=settings.LOCAL_OCR_WORKERS,
+        mp_context=multiprocessing.get_context("spawn"),
+        max_tasks_per_child=200,
+    )
+
+    _ocr_router = OcrRouter(
+        primary=TaggunProvider(_taggun_service),
+        secondary=(
+            TesseractProvider(
+                _local_ocr_executor,
+                dpi=settings.TESSERACT_DPI,
+                lang=settings.TESSERACT_LANG,
+                page_timeout=settings.TESSERACT_PAGE_TIMEOUT,
+                pages_in_flight=settings.TESSERACT_PAGES_IN_FLIGHT,
+            )
+            if settings.TESSERACT_ENABLED
+            else None
+        ),
+        local_first=(
+            TextLayerProvider(_local_ocr_executor, settings.LOCAL_PDF_MIN_CHARS)
+            if settings.LOCAL_PDF_TEXT_ENABLED
+            else None
+        ),
+        window=LatencyWindow(
+            size=settings.OCR_HEDGE_WINDOW,
+            percentile=settings.OCR_HEDGE_PERCENTILE,
+            default_delay=settings.OCR_HEDGE_DEFAULT_DELAY,
+            min_delay=settings.OCR_HEDGE_MIN_DELAY,
+            max_delay=settings.OCR_HEDGE_MAX_DELAY,
+        ),
+        hedge_enabled=settings.OCR_HEDGE_ENABLED,
+    )
+    logger.info("[LIFESPAN] Proveedores de OCR inicializados")
+
+    _result_store = await ScanResultStore(
+        path=settings.DATA_DIR / "scan_results.sqlite3",
+        ttl=settings.RESULT_CACHE_TTL,
+    ).open()
+    logger.info("[LIFESPAN] Almacén de resultados inicializado")
+
+    _ocr_cache = await OcrPayloadCache(
+        path=settings.DATA_DIR / "ocr_cache.sqlite3",
+        ttl=settings.OCR_CACHE_TTL,
+        max_bytes=settings.OCR_CACHE_MAX_BYTES,
+    ).open()
+    logger.info("[LIFESPAN] Caché de OCR inicializada")
+
+    _idempotency_store = await IdempotencyStore(
+        path=settings.DATA_DIR / "idempotency.sqlite3",
+        ttl=settings.IDEMPOTENCY_TTL,
+    ).open()
+    logger.info("[LIFESPAN] Almacén de idempotencia inicializado")
+
+    _archive_outbox = await ArchiveOutbox(
+        path=settings.DATA_DIR / "archive_outbox.sqlite3",
+        files_dir=settings.DATA_DIR / "outbox",
+        workers=settings.ARCHIVE_OUTBOX_WORKERS,
+        max_attempts=settings.ARCHIVE_MAX_ATTEMPTS,
+        base_delay=settings.ARCHIVE_RETRY_BASE_DELAY,
+        max_delay=settings.ARCHIVE_RETRY_MAX_DELAY,
+    ).open()
+    await _archive_outbox.start()
+    logger.info("[LIFESPAN] Outbox de archivado inicializado")
+
+    _scheduler = FairShareScheduler(
+        max_concurrency=settings.SCHEDULER_MAX_CONCURRENCY,
+        interactive_reserved=settings.SCHEDULER_INTERACTIVE_RESERVED,
+        tenant_max_concurrency=settings.SCHEDULER_TENANT_MAX_CONCURRENCY,
+        weights=settings.SCHEDULER_TENANT_WEIGHTS,
+    )
+    _job_manager = JobManager(
+        scheduler=_scheduler,
+        ttl=settings.BULK_JOB_TTL,
+        max_park_seconds=settings.BULK_PARK_MAX_SECONDS,
+    )
+    logger.info("[LIFESPAN] Planificador y gestor de trabajos inicializados")
+
     try:
         yield
     finally:
+        if _job_manager:
+            await _job_manager.close()
+            logger.info("[LIFESPAN] Gestor de trabajos detenido")
         if _taggun_service:
             await _taggun_service.close()
             logger.info("[LIFESPAN] Cliente Taggun cerrado correctamente")
+        if _idempotency_store:
+            await _idempotency_store.close()
+        if _archive_outbox:
+            await _archive_outbox.close()
+            logger.info("[LIFESPAN] Outbox de archivado detenido")
+        if _ocr_cache:
+            logger.info(f"[LIFESPAN] Caché de OCR: {_ocr_cache.stats()}")
+            await _ocr_cache.close()
+        if _result_store:
+            await _result_store.close()
+        if _image_executor:
+            _image_executor.shutdown(wait=False, cancel_futures=True)
+        if _local_ocr_executor:
+            _local_ocr_executor.shutdown(wait=False, cancel_futures=True)
+        for client in _http_clients.values():
+            await client.aclose()
+        _http_clients.clear()
+        logger.info("[LIFESPAN] Pools HTTP cerrados")
 
     logger.info("[LIFESPAN] Finalizando aplicación")
@@ -0,0 +1,292 @@
+import functools
+import inspect
+import time
+from contextlib import contextmanager
+
+from fastapi import Request
+from prometheus_client import Counter, Gauge, Histogram
+
+# Buckets pensados para llamadas externas y etapas que van de ms a minutos
+LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "orchestrator_http_request_duration_seconds",
+    "Duración de las peticiones HTTP recibidas",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "orchestrator_http_requests_in_flight",
+    "Peticiones HTTP en curso",
+)
+HTTP_REQUEST_ERRORS = Counter(
+    "orchestrator_http_request_errors_total",
+    "Excepciones no controladas por ruta y tipo",
+    ["route", "exception"],
+)
+
+STAGE_DURATION = Histogram(
+    "orchestrator_stage_duration_seconds",
+    "Duración de cada etapa de un pipeline",
+    ["pipeline", "stage"],
+    buckets=LATENCY_BUCKETS,
+)
+STAGES_IN_FLIGHT = Gauge(
+    "orchestrator_stages_in_flight",
+    "Etapas de pipeline en ejecución",
+    ["pipeline", "stage"],
+)
+STAGE_ERRORS = Counter(
+    "orchestrator_stage_errors_total",
+    "Errores por etapa y tipo de excepción",
+    ["pipeline", "stage", "exception"],
+)
+
+DEPENDENCY_DURATION = Histogram(
+    "orchestrator_dependency_duration_seconds",
+    "Duración de las llamadas a servicios externos",
+    ["dependency", "operation"],
+    buckets=LATENCY_BUCKETS,
+)
+DEPENDENCY_IN_FLIGHT = Gauge(
+    "orchestrator_dependency_in_flight",
+    "Llamadas a servicios externos en curso",
+    ["dependency"],
+)
+DEPENDENCY_ERRORS = Counter(
+    "orchestrator_dependency_errors_total",
+    "Errores en llamadas a servicios externos por tipo de excepción",
+    ["dependency", "operation", "exception"],
+)
+
+DEPENDENCY_WAITING = Gauge(
+    "orchestrator_dependency_waiting",
+    "Peticiones esperando turno en el limitador de un servicio externo",
+    ["dependency"],
+)
+DEPENDENCY_RATE_LIMIT = Gauge(
+    "orchestrator_dependency_rate_limit",
+    "Peticiones por segundo permitidas por el limitador adaptativo",
+    ["dependency"],
+)
+DEPENDENCY_CONCURRENCY_LIMIT = Gauge(
+    "orchestrator_dependency_concurrency_limit",
+    "Peticiones simultáneas permitidas por el limitador adaptativo",
+    ["dependency"],
+)
+DEPENDENCY_OVERLOAD_EVENTS = Counter(
+    "orchestrator_dependency_overload_events_total",
+    "Respuestas que reducen el límite (429, 5xx, timeout)",
+    ["dependency", "reason"],
+)
+
+TAGGUN_PAYLOAD_BYTES = Histogram(
+    "orchestrator_taggun_payload_bytes",
+    "Tamaño de las respuestas de Taggun",
+    buckets=(4_096, 16_384, 32_768, 65_536, 131_072, 262_144, 524_288, 1_048_576),
+)
+
+BULK_FILES_IN_FLIGHT = Gauge(
+    "orchestrator_bulk_files_in_flight",
+    "Archivos de /bulk pendientes o en proceso",
+)
+BULK_FILES_PARKED = Gauge(
+    "orchestrator_bulk_files_parked",
+    "Archivos de /bulk aparcados hasta que se recupere una dependencia",
+)
+
+CIRCUIT_STATE = Gauge(
+    "orchestrator_circuit_state",
+    "Estado del circuito de cada dependencia (0 closed, 1 half_open, 2 open)",
+    ["dependency"],
+)
+CIRCUIT_TRANSITIONS = Counter(
+    "orchestrator_circuit_transitions_total",
+    "Cambios de estado del circuito, por estado de destino",
+    ["dependency", "state"],
+)
+CIRCUIT_REJECTED = Counter(
+    "orchestrator_circuit_rejected_total",
+    "Llamadas rechazadas sin salir a la red por tener el circuito abierto",
+    ["dependency"],
+)
+
+ARCHIVE_OUTBOX_EVENTS = Counter(
+    "orchestrator_archive_outbox_events_total",
+    "Resultados de las subidas del outbox de archivado",
+    ["outcome"],
+)
+
+IMAGE_OPTIMIZE_BYTES = Counter(
+    "orchestrator_image_optimize_bytes_total",
+    "Bytes de las imágenes antes y después de optimizarlas",
+    ["stage"],
+)
+
+LOCAL_OCR_RESULTS = Counter(
+    "orchestrator_local_ocr_results_total",
+    "Facturas extraídas localmente o devueltas a Taggun, por motor",
+    ["engine", "outcome"],
+)
+
+LOCAL_OCR_PAGE_SECONDS = Histogram(
+    "orchestrator_local_ocr_page_seconds",
+    "Tiempo por página del OCR local, separado en renderizado y reconocimiento",
+    ["engine", "phase"],
+    buckets=LATENCY_BUCKETS,
+)
+
+PDF_SPLITS = Counter(
+    "orchestrator_pdf_splits_total",
+    "PDF de varias páginas analizados: divididos por factura o procesados enteros",
+    ["outcome"],
+)
+PDF_SPLIT_PARTS = Counter(
+    "orchestrator_pdf_split_parts_total",
+    "Facturas obtenidas al dividir PDF con varias facturas",
+)
+
+HEDGE_EVENTS = Counter(
+    "orchestrator_hedge_events_total",
+    "Resultado de las peticiones con cobertura: not_fired, primary_won, "
+    "secondary_won, fallback o failed",
+    ["operation", "outcome"],
+)
+HEDGE_DELAY = Gauge(
+    "orchestrator_hedge_delay_seconds",
+    "Espera actual antes de lanzar la petición de cobertura",
+    ["operation"],
+)
+HEDGED_DURATION = Histogram(
+    "orchestrator_hedged_duration_seconds",
+    "Latencia de las peticiones con cobertura, por proveedor ganador",
+    ["operation", "winner"],
+    buckets=LATENCY_BUCKETS,
+)
+
+OCR_CACHE_LOOKUPS = Counter(
+    "orchestrator_ocr_cache_lookups_total",
+    "Consultas a la caché de payloads de Taggun",
+    ["result"],
+)
+OCR_CACHE_EVICTIONS = Counter(
+    "orchestrator_ocr_cache_evictions_total",
+    "Payloads de Taggun eliminados de la caché por falta de espacio",
+)
+OCR_CACHE_BYTES = Gauge(
+    "orchestrator_ocr_cache_bytes",
+    "Tamaño comprimido de los payloads de Taggun en caché",
+)
+
+TAX_ID_VALIDATION_CACHE = Counter(
+    "orchestrator_tax_id_validation_cache_total",
+    "Validaciones de identificadores fiscales resueltas desde la caché o calculadas",
+    ["result"],
+)
+
+PARTNER_TAX_ID_RESOLUTIONS = Counter(
+    "orchestrator_partner_tax_id_resolutions_total",
+    "Facturas con varios Tax ID de proveedor, resueltas localmente o ambiguas",
+    ["outcome"],
+)
+
+ACCOUNTS_CACHE_LOOKUPS = Counter(
+    "orchestrator_accounts_cache_lookups_total",
+    "Consultas a la caché de cuentas por email",
+    ["result"],
+)
+ACCOUNTS_CACHE_INVALIDATIONS = Counter(
+    "orchestrator_accounts_cache_invalidations_total",
+    "Emails borrados de la caché de cuentas por aviso de Admin",
+)
+
+SCHEDULER_WAITING = Gauge(
+    "orchestrator_scheduler_waiting",
+    "Escaneos esperando turno en el planificador",
+    ["kind"],
+)
+SCHEDULER_RUNNING = Gauge(
+    "orchestrator_scheduler_running",
+    "Escaneos con un hueco asignado por el planificador",
+    ["kind"],
+)
+SCHEDULER_WAIT_SECONDS = Histogram(
+    "orchestrator_scheduler_wait_seconds",
+    "Tiempo de espera hasta obtener un hueco del planificador",
+    ["kind"],
+    buckets=LATENCY_BUCKETS,
+)
+
+
+@contextmanager
+def observe_dependency(dependency: str, operation: str):
+    """Mide una llamada a un servicio externo y cuenta sus errores por tipo."""
+    in_flight = DEPENDENCY_IN_FLIGHT.labels(dependency)
+    in_flight.inc()
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception as exc:
+        DEPENDENCY_ERRORS.labels(dependency, operation, type(exc).__name__).inc()
+        raise
+    finally:
+        DEPENDENCY_DURATION.labels(dependency, operation).observe(
+            time.perf_counter() - start
+        )
+        in_flight.dec()
+
+
+def track_dependency(dependency: str):
+    """
+    Decorador de `observe_dependency` que usa el nombre de la función como
+    operación. Admite funciones síncronas y asíncronas.
+    """
+
+    def decorator(func):
+        operation = func.__name__
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with observe_dependency(dependency, operation):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with observe_dependency(dependency, operation):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+async def metrics_middleware(request: Request, call_next):
+    """Registra la duración y el estado de cada petición por ruta."""
+    if request.url.path.endswith("/metrics"):
+        return await call_next(request)
+
+    HTTP_REQUESTS_IN_FLIGHT.inc()
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    except Exception as exc:
+        route = request.scope.get("route")
+        HTTP_REQUEST_ERRORS.labels(
+            getattr(route, "path", "desconocida"), type(exc).__name__
+        ).inc()
+        raise
+    finally:
+        route = request.scope.get("route")
+        HTTP_REQUEST_DURATION.labels(
+            request.method,
+            getattr(route, "path", "desconocida"),
+            str(status),
+        ).observe(time.perf_counter() - start)
+        HTTP_REQUESTS_IN_FLIGHT.dec()
@@ -2,7 +2,8 @@ from app.core.patterns.adapter.odoo_adapter import OdooAdapter
 from app.core.settings import settings
 from app.core.client_provider import ProviderConfig
 from app.core.patterns.adapter.zoho_adapter import ZohoAdapter
-from app.core.schemas.enums import ServicesEnum
+from app.core.schemas.enums import DownstreamEnum, ServicesEnum
+from app.core.lifespan import get_http_client
 
 
 def get_provider(
@@ -16,7 +17,7 @@ def get_provider(
             api_prefix="/books",
             company_vat=company_vat,
         )
-        return ZohoAdapter(config=config)
+        return ZohoAdapter(config=config, client=get_http_client(DownstreamEnum.ZOHO))
     elif service == ServicesEnum.ODOO:
         if version == "v16":
             config = ProviderConfig(
@@ -35,6 +36,6 @@ def get_provider(
                 f"La versión {version} aún no ha sido implementada"
             )
 
-        return OdooAdapter(config=config)
+        return OdooAdapter(config=config, client=get_http_client(DownstreamEnum.ODOO))
     else:
         raise NotImplementedError(f"{service} :aún no ha sido implementado.")
@@ -1,5 +1,4 @@
 import httpx
-from app.core.settings import settings
 from app.core.client_provider import ProviderConfig
 from app.core.patterns.adapter.account_provider import AccountingProvider
 from app.services.odoo.interceptor import error_interceptor
@@ -13,15 +12,10 @@ from exponential_core.odoo.schemas import (
 
 
 class OdooAdapter(AccountingProvider):
-    def __init__(self, config: ProviderConfig):
+    def __init__(self, config: ProviderConfig, client: httpx.AsyncClient):
         self.path = config.path
         self.company_vat = config.company_vat
-        self.timeout = httpx.Timeout(
-            connect=settings.HTTP_TIMEOUT_CONNECT,
-            read=settings.HTTP_TIMEOUT_READ,
-            write=settings.HTTP_TIMEOUT_WRITE,
-            pool=settings.HTTP_TIMEOUT_POOL,
-        )
+        self.client = client
 
     @error_interceptor
     async def create_vendor(self, payload: SupplierCreateSchema):
@@ -30,14 +24,13 @@ class OdooAdapter(AccountingProvider):
 
         headers = {"x-client-vat": self.company_vat}
 
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.post(
-                url=url,
-                headers=headers,
-                json=payload.model_dump(mode="json", exclude_none=True),
-            )
+        response = await self.client.post(
+            url=url,
+            headers=headers,
+            json=payload.model_dump(mode="json", exclude_none=True),
+        )
 
-        return response.json()
+        return response
 
     @error_interceptor
     async def create_address(self, payload: AddressCreateSchema):
@@ -46,14 +39,13 @@ class OdooAdapter(AccountingProvider):
 
         headers = {"x-client-vat": self.company_vat}
 
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.post(
-                url=url,
-                headers=headers,
-                json=payload.model_dump(mode="json", exclude_none=True),
-            )
+        response = await self.client.post(
+            url=url,
+            headers=headers,
+            json=payload.model_dump(mode="json", exclude_none=True),
+        )
 
-        return response.json()
+        return response
 
     @error_interceptor
     async def get_all_taxes(self):
@@ -62,10 +54,9 @@ class OdooAdapter(AccountingProvider):
 
         headers = {"x-client-vat": self.company_vat}
 
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.get(url=url, headers=headers)
+        response = await self.client.get(url=url, headers=headers)
 
-        return response.json()
+        return response
 
     @error_interceptor
     async def create_product(self, payload: ProductCreateSchema):
@@ -74,16 +65,15 @@ class OdooAdapter(AccountingProvider):
 
         headers = {"x-client-vat": self.company_vat}
 
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.post(
-                url=url,
-                headers=headers,
-                json=payload.model_dump(
-                    mode="json",
-                    exclude_none=True,
-                ),
-            )
-        return response.json()
+        response = await self.client.post(
+            url=url,
+            headers=headers,
+            json=payload.model_dump(
+                mode="json",
+                exclude_none=True,
+            ),
+        )
+        return response
 
     @error_interceptor
     async def create_bill(self, payload: InvoiceCreateSchema):
@@ -92,16 +82,15 @@ class OdooAdapter(AccountingProvider):
 
         headers = {"x-client-vat": self.company_vat}
 
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.post(
-                url=url,
-                headers=headers,
-                json=payload.model_dump(
-                    mode="json",
-                    exclude_none=True,
-                ),
-            )
-        return response.json()
+        response = await self.client.post(
+            url=url,
+            headers=headers,
+            json=payload.model_dump(
+                mode="json",
+                exclude_none=True,
+            ),
+        )
+        return response
 
     @error_interceptor
     async def attach_file_to_bill(self, bill_id, file, file_content):
@@ -111,10 +100,9 @@ class OdooAdapter(AccountingProvider):
         headers = {"x-client-vat": self.company_vat}
         files = {"file": (file.filename, file_content, file.content_type)}
 
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            reponse = await client.post(
-                url=url,
-                headers=headers,
-                files=files,
-            )
-        return reponse.json()
+        reponse = await self.client.post(
+            url=url,
+            headers=headers,
+            files=files,
+        )
+        return reponse
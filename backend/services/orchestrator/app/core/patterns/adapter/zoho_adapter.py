@@ -1,6 +1,5 @@
 from fastapi import UploadFile
 import httpx
-from app.core.settings import settings
 from app.core.client_provider import ProviderConfig
 from app.core.logging import logger
 from app.core.patterns.adapter.account_provider import AccountingProvider
@@ -10,15 +9,10 @@ from app.services.zoho.schemas.create_contact import CreateZohoContactRequest
 
 
 class ZohoAdapter(AccountingProvider):
-    def __init__(self, config: ProviderConfig):
+    def __init__(self, config: ProviderConfig, client: httpx.AsyncClient):
         self.path = config.path
         self.company_vat = config.company_vat
-        self.timeout = httpx.Timeout(
-            connect=settings.HTTP_TIMEOUT_CONNECT,
-            read=settings.HTTP_TIMEOUT_READ,
-            write=settings.HTTP_TIMEOUT_WRITE,
-            pool=settings.HTTP_TIMEOUT_POOL,
-        )
+        self.client = client
 
     @error_interceptor
     async def create_vendor(self, payload: CreateZohoContactRequest):
@@ -27,14 +21,13 @@ class ZohoAdapter(AccountingProvider):
 
         headers = {"x-client-vat": self.company_vat}
 
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.post(
-                url=url,
-                json=payload.model_dump(mode="json"),
-                headers=headers,
-            )
+        response = await self.client.post(
+            url=url,
+            json=payload.model_dump(mode="json"),
+            headers=headers,
+        )
 
-        return response.json()
+        return response
 
     @error_interceptor
     async def create_bill(self, payload: CreateZohoBillRequest):
@@ -43,14 +36,13 @@ class ZohoAdapter(AccountingProvider):
 
         headers = {"x-client-vat": self.company_vat}
 
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.post(
-                url=url,
-                headers=headers,
-                json=payload.model_dump(mode="json"),
-            )
+        response = await self.client.post(
+            url=url,
+            headers=headers,
+            json=payload.model_dump(mode="json"),
+        )
 
-        return response.json()
+        return response
 
     @error_interceptor
     async def get_all_contacts(self):
@@ -59,12 +51,11 @@ class ZohoAdapter(AccountingProvider):
 
         headers = {"x-client-vat": self.company_vat}
 
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.get(
-                url=url,
-                headers=headers,
-            )
-        return response.json()
+        response = await self.client.get(
+            url=url,
+            headers=headers,
+        )
+        return response
 
     @error_interceptor
     async def get_all_bills(self):
@@ -73,12 +64,11 @@ class ZohoAdapter(AccountingProvider):
 
         headers = {"x-client-vat": self.company_vat}
 
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.get(
-                url=url,
-                headers=headers,
-            )
-        return response.json()
+        response = await self.client.get(
+            url=url,
+            headers=headers,
+        )
+        return response
 
     @error_interceptor
     async def attach_file_to_bill(
@@ -90,13 +80,12 @@ class ZohoAdapter(AccountingProvider):
         headers = {"x-client-vat": self.company_vat}
         files = {"file": (file.filename, file_content, file.content_type)}
 
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.post(
-                url=url,
-                headers=headers,
-                files=files,
-            )
-        return response.json()
+        response = await self.client.post(
+            url=url,
+            headers=headers,
+            files=files,
+        )
+        return response
 
     @error_interceptor
     async def get_chart_of_accounts(self):
@@ -105,12 +94,11 @@ class ZohoAdapter(AccountingProvider):
 
         headers = {"x-client-vat": self.company_vat}
 
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.get(
-                url=url,
-                headers=headers,
-            )
-        return response.json()
+        response = await self.client.get(
+            url=url,
+            headers=headers,
+        )
+        return response
 
     @error_interceptor
     async def get_all_taxes(self):
@@ -119,9 +107,8 @@ class ZohoAdapter(AccountingProvider):
 
         headers = {"x-client-vat": self.company_vat}
 
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.get(
-                url=url,
-                headers=headers,
-            )
-        return response.json()
+        response = await self.client.get(
+            url=url,
+            headers=headers,
+        )
+        return response
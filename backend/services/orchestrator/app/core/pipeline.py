@@ -0,0 +1,144 @@
+import asyncio
+import inspect
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable
+
+from app.core.logging import logger
+from app.core.metrics import STAGE_DURATION, STAGE_ERRORS, STAGES_IN_FLIGHT
+
+StageFunc = Callable[[dict], Awaitable[Any] | Any]
+
+
+@dataclass(frozen=True)
+class Stage:
+    """
+    Paso de un pipeline. `func` recibe el contexto con los datos iniciales y
+    los resultados de las etapas ya completadas (indexados por su nombre).
+    """
+
+    name: str
+    func: StageFunc
+    depends_on: tuple[str, ...] = ()
+
+
+@dataclass
+class StageTiming:
+    start: float
+    duration: float
+
+
+@dataclass
+class PipelineRun:
+    results: dict[str, Any] = field(default_factory=dict)
+    timings: dict[str, StageTiming] = field(default_factory=dict)
+    duration: float = 0.0
+
+    def timings_summary(self) -> dict[str, float]:
+        return {name: round(t.duration, 4) for name, t in self.timings.items()}
+
+
+class StageGraph:
+    """
+    Ejecuta un conjunto de etapas respetando sus dependencias y lanzando en
+    paralelo todas las que ya tienen sus dependencias resueltas.
+    Si una etapa falla, se cancelan las que siguen en curso y se propaga el error.
+    """
+
+    def __init__(self, name: str, stages: list[Stage]):
+        self.name = name
+        self.stages = {stage.name: stage for stage in stages}
+
+        if len(self.stages) != len(stages):
+            raise ValueError(f"[PIPELINE] {name}: nombres de etapa duplicados")
+        for stage in stages:
+            missing = set(stage.depends_on) - self.stages.keys()
+            if missing:
+                raise ValueError(
+                    f"[PIPELINE] {name}: la etapa '{stage.name}' depende de "
+                    f"etapas inexistentes: {sorted(missing)}"
+                )
+        self._check_acyclic()
+
+    def _check_acyclic(self):
+        resolved: set[str] = set()
+        pending = dict(self.stages)
+        while pending:
+            ready = [
+                name
+                for name, stage in pending.items()
+                if set(stage.depends_on) <= resolved
+            ]
+            if not ready:
+                raise ValueError(
+                    f"[PIPELINE] {self.name}: dependencias circulares en {sorted(pending)}"
+                )
+            for name in ready:
+                resolved.add(name)
+                del pending[name]
+
+    async def run(self, **context) -> PipelineRun:
+        run = PipelineRun()
+        ctx = dict(context)
+        origin = time.perf_counter()
+        running: dict[asyncio.Task, str] = {}
+        done: set[str] = set()
+
+        def launch_ready():
+            started = set(running.values()) | done
+            for name, stage in self.stages.items():
+                if name not in started and set(stage.depends_on) <= done:
+                    task = asyncio.create_task(
+                        self._run_stage(self.name, stage, ctx, run, origin),
+                        name=f"{self.name}:{name}",
+                    )
+                    running[task] = name
+
+        try:
+            launch_ready()
+            while running:
+                finished, _ = await asyncio.wait(
+                    running, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in finished:
+                    name = running.pop(task)
+                    ctx[name] = run.results[name] = task.result()
+                    done.add(name)
+                launch_ready()
+        finally:
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+
+            run.duration = time.perf_counter() - origin
+            logger.debug(
+                f"[PIPELINE] {self.name} ({run.duration:.3f}s): "
+                f"{run.timings_summary()}"
+            )
+
+        return run
+
+    @staticmethod
+    async def _run_stage(
+        pipeline: str, stage: Stage, ctx: dict, run: PipelineRun, origin: float
+    ):
+        in_flight = STAGES_IN_FLIGHT.labels(pipeline, stage.name)
+        in_flight.inc()
+        start = time.perf_counter()
+        try:
+            result = stage.func(ctx)
+            if inspect.isawaitable(result):
+                result = await result
+            return result
+        except Exception as exc:
+            STAGE_ERRORS.labels(pipeline, stage.name, type(exc).__name__).inc()
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            run.timings[stage.name] = StageTiming(
+                start=start - origin,
+                duration=duration,
+            )
+            STAGE_DURATION.labels(pipeline, stage.name).observe(duration)
+            in_flight.dec()
@@ -0,0 +1,244 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+from app.core.logging import logger
+from app.core.metrics import (
+    DEPENDENCY_CONCURRENCY_LIMIT,
+    DEPENDENCY_OVERLOAD_EVENTS,
+    DEPENDENCY_RATE_LIMIT,
+    DEPENDENCY_WAITING,
+)
+
+
+@dataclass
+class Permit:
+    """Turno concedido por el limitador para una petición."""
+
+    started_at: float
+    # El limitador era el cuello de botella: solo entonces tiene sentido crecer
+    saturated: bool = False
+    throttled: bool = False
+    outcome_reported: bool = False
+
+
+class AdaptiveRateLimiter:
+    """
+    Limita las peticiones a un servicio externo con dos controles:
+    - Token bucket: como mucho `rate` peticiones por segundo, con ráfagas de
+      hasta `burst`. La reserva del token no cede el control al event loop,
+      así que las corrutinas concurrentes no pueden saltárselo.
+    - Concurrencia AIMD: el número de peticiones en curso crece de forma
+      aditiva mientras el servicio responde bien y se reduce a la mitad ante
+      un 429, un 5xx o un timeout. La tasa del bucket se adapta igual.
+    Un `Retry-After` pausa todo el limitador hasta la hora indicada.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rate: float = 3.0,
+        burst: int = 5,
+        min_rate: float = 0.2,
+        max_rate: float = 20.0,
+        rate_increase: float = 0.5,
+        concurrency: int = 5,
+        min_concurrency: int = 1,
+        max_concurrency: int = 20,
+        decrease_factor: float = 0.5,
+    ):
+        if not 0 < min_rate <= rate <= max_rate:
+            raise ValueError(
+                f"[RATE_LIMIT] {name}: se requiere min_rate <= rate <= max_rate"
+            )
+        if not 1 <= min_concurrency <= concurrency <= max_concurrency:
+            raise ValueError(
+                f"[RATE_LIMIT] {name}: se requiere "
+                "1 <= min_concurrency <= concurrency <= max_concurrency"
+            )
+        self.name = name
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.rate_increase = rate_increase
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.decrease_factor = decrease_factor
+
+        self._rate = float(rate)
+        self._concurrency = float(concurrency)
+        self._tokens = float(burst)
+        self._refilled_at = time.monotonic()
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        self._in_flight = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        self._publish()
+
+    @property
+    def rate(self) -> float:
+        """Peticiones por segundo permitidas ahora mismo."""
+        return self._rate
+
+    @property
+    def concurrency(self) -> int:
+        """Peticiones simultáneas permitidas ahora mismo."""
+        return max(self.min_concurrency, int(self._concurrency))
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @asynccontextmanager
+    async def slot(self):
+        """
+        Espera un hueco de concurrencia y un token. Si el bloque termina sin
+        excepción y sin informar del resultado, cuenta como éxito.
+        """
+        permit = await self._acquire()
+        try:
+            await self._take_token(permit)
+            yield permit
+            if not permit.outcome_reported:
+                self.record_success(permit)
+        finally:
+            self._release()
+
+    def record_success(self, permit: Permit):
+        permit.outcome_reported = True
+        changed = False
+        if permit.saturated and self._concurrency < self.max_concurrency:
+            self._concurrency = min(
+                self.max_concurrency, self._concurrency + 1 / self._concurrency
+            )
+            changed = True
+        if permit.throttled and self._rate < self.max_rate:
+            self._rate = min(
+                self.max_rate, self._rate + self.rate_increase / self._rate
+            )
+            changed = True
+        if changed:
+            self._publish()
+            self._dispatch()
+
+    def record_overload(
+        self, permit: Permit, reason: str, retry_after: float | None = None
+    ):
+        """
+        Reduce tasa y concurrencia. Las peticiones que salieron antes de la
+        última reducción no vuelven a reducir: ya reflejan el límite anterior.
+        """
+        permit.outcome_reported = True
+        DEPENDENCY_OVERLOAD_EVENTS.labels(self.name, reason).inc()
+
+        now = time.monotonic()
+        if retry_after:
+            self.pause(retry_after)
+
+        if permit.started_at < self._last_decrease:
+            return
+
+        self._last_decrease = now
+        self._concurrency = max(
+            self.min_concurrency, self._concurrency * self.decrease_factor
+        )
+        self._refill(now)
+        self._rate = max(self.min_rate, self._rate * self.decrease_factor)
+        self._publish()
+        logger.warning(
+            f"[RATE_LIMIT] {self.name}: {reason}, límites reducidos a "
+            f"{self._rate:.2f} req/s y {self.concurrency} en paralelo"
+        )
+
+    def pause(self, seconds: float):
+        """Detiene el envío de peticiones durante `seconds` (Retry-After)."""
+        now = time.monotonic()
+        until = now + seconds
+        if until <= self._paused_until:
+            return
+        self._refill(now)
+        self._paused_until = until
+        # Al reanudar sale una sola petición: los tokens no se acumulan durante la pausa
+        self._tokens = min(self._tokens, 1.0)
+        self._refilled_at = until
+        logger.warning(f"[RATE_LIMIT] {self.name}: pausa de {seconds:.1f}s")
+
+    async def _acquire(self) -> Permit:
+        saturated = self._in_flight + 1 >= self.concurrency
+        if self._in_flight < self.concurrency and not self._waiters:
+            self._in_flight += 1
+            return Permit(started_at=time.monotonic(), saturated=saturated)
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        DEPENDENCY_WAITING.labels(self.name).inc()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # El hueco se concedió justo antes de la cancelación
+                self._release()
+            else:
+                self._waiters.remove(future)
+            raise
+        finally:
+            DEPENDENCY_WAITING.labels(self.name).dec()
+        return Permit(started_at=time.monotonic(), saturated=True)
+
+    def _release(self):
+        self._in_flight -= 1
+        self._dispatch()
+
+    def _dispatch(self):
+        while self._waiters and self._in_flight < self.concurrency:
+            future = self._waiters.popleft()
+            if not future.done():
+                self._in_flight += 1
+                future.set_result(None)
+
+    def _refill(self, now: float):
+        elapsed = max(0.0, now - self._refilled_at)
+        self._tokens = min(self.burst, self._tokens + elapsed * self._rate)
+        self._refilled_at = max(self._refilled_at, now)
+
+    async def _take_token(self, permit: Permit):
+        # Reserva atómica: los tokens pueden quedar en negativo (deuda) y cada
+        # corrutina espera el tiempo que le corresponde en la cola
+        now = time.monotonic()
+        self._refill(now)
+        self._tokens -= 1
+        debt = -self._tokens / self._rate if self._tokens < 0 else 0.0
+        # Tras una pausa el bucket empieza a rellenarse al final de la pausa
+        wait = max(self._refilled_at + debt, self._paused_until) - now
+        if wait > 0:
+            permit.throttled = True
+            await asyncio.sleep(wait)
+        # Un Retry-After recibido mientras se esperaba también aplica
+        while (paused := self._paused_until - time.monotonic()) > 0:
+            await asyncio.sleep(paused)
+        permit.started_at = time.monotonic()
+
+    def _publish(self):
+        DEPENDENCY_RATE_LIMIT.labels(self.name).set(self._rate)
+        DEPENDENCY_CONCURRENCY_LIMIT.labels(self.name).set(self.concurrency)
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Interpreta `Retry-After` en segundos o como fecha HTTP."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        moment = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return max(0.0, (moment - datetime.now(timezone.utc)).total_seconds())
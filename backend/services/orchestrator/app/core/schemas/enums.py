@@ -6,5 +6,12 @@ class ServicesEnum(Enum):
     ODOO = "odoo"
 
 
+class DownstreamEnum(Enum):
+    ADMIN = "admin"
+    ZOHO = "zoho"
+    ODOO = "odoo"
+    OPENAI = "openai"
+
+
 class UploadersEnum(Enum):
     DROPBOX = "dropbox"
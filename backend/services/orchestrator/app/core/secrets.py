@@ -1,6 +1,12 @@
+import asyncio
+import time
+
 from exponential_core.secrets import SecretManager
 from exponential_core.exceptions import SecretsNotFound, MissingSecretKey
 
+from app.core.metrics import observe_dependency
+from app.core.settings import settings
+
 
 class SecretsService:
     def __init__(self, company_vat: str):
@@ -10,7 +16,8 @@ class SecretsService:
         self._secrets = None
 
     async def load(self):
-        self._secrets = await self.secret_manager.get_secret()
+        with observe_dependency("secrets_manager", "get_secret"):
+            self._secrets = await self.secret_manager.get_secret()
         if not self._secrets:
             raise SecretsNotFound(company_vat=self.company_vat)
         return self
@@ -33,3 +40,46 @@ class SecretsService:
         if not value:
             raise MissingSecretKey(company_vat=self.company_vat, key=key)
         return value
+
+
+# Secretos por empresa: la configuración del ERP cambia muy de vez en cuando
+# y se consulta en cada escaneo (antes del ERP y, con algún circuito de ERP
+# abierto, antes del registro)
+_loaded: dict[str, tuple[float, SecretsService]] = {}
+# Empresas sin secretos: se recuerdan SECRETS_NEGATIVE_CACHE_TTL segundos para
+# no volver a preguntar a Secrets Manager en cada escaneo
+_missing: dict[str, tuple[float, SecretsNotFound]] = {}
+# Límite de consultas simultáneas a Secrets Manager (por bucle de eventos)
+_limiter: tuple[asyncio.AbstractEventLoop, asyncio.Semaphore] | None = None
+
+
+async def load_secrets(company_vat: str) -> SecretsService:
+    """Devuelve los secretos de la empresa, reutilizándolos durante `SECRETS_CACHE_TTL`."""
+    now = time.monotonic()
+    cached = _loaded.get(company_vat)
+    if cached is not None and now - cached[0] < settings.SECRETS_CACHE_TTL:
+        return cached[1]
+    missing = _missing.get(company_vat)
+    if missing is not None and now - missing[0] < settings.SECRETS_NEGATIVE_CACHE_TTL:
+        raise missing[1].with_traceback(None)
+
+    try:
+        async with _secrets_limiter():
+            secrets_service = await SecretsService(company_vat=company_vat).load()
+    except SecretsNotFound as e:
+        if settings.SECRETS_NEGATIVE_CACHE_TTL > 0:
+            _missing[company_vat] = (time.monotonic(), e)
+        raise
+
+    _missing.pop(company_vat, None)
+    if settings.SECRETS_CACHE_TTL > 0:
+        _loaded[company_vat] = (time.monotonic(), secrets_service)
+    return secrets_service
+
+
+def _secrets_limiter() -> asyncio.Semaphore:
+    global _limiter
+    loop = asyncio.get_running_loop()
+    if _limiter is None or _limiter[0] is not loop:
+        _limiter = (loop, asyncio.Semaphore(settings.SECRETS_MAX_CONCURRENCY))
+    return _limiter[1]
@@ -1,7 +1,7 @@
 # app/core/settings.py
 import os
 from pathlib import Path
-from typing import List
+from typing import Dict, List, Literal
 from pydantic_settings import BaseSettings
 from pydantic import Field, field_validator
 
@@ -32,11 +32,133 @@ class Settings(BaseSettings):
 
     TAGGUN_URL: str = "https://api.taggun.io/api/receipt/v1/verbose/file"
 
+    # Limitador adaptativo de Taggun (token bucket + concurrencia AIMD)
+    TAGGUN_RATE: float = 3.0
+    TAGGUN_MIN_RATE: float = 0.2
+    TAGGUN_MAX_RATE: float = 10.0
+    TAGGUN_BURST: int = 5
+    TAGGUN_CONCURRENCY: int = 5
+    TAGGUN_MIN_CONCURRENCY: int = 1
+    TAGGUN_MAX_CONCURRENCY: int = 15
+    TAGGUN_MAX_ATTEMPTS: int = 4
+    TAGGUN_RETRY_BASE_DELAY: float = 1.0
+    TAGGUN_RETRY_MAX_DELAY: float = 30.0
+
     HTTP_TIMEOUT_CONNECT: float = 10.0
     HTTP_TIMEOUT_READ: float = 60.0
     HTTP_TIMEOUT_WRITE: float = 10.0
     HTTP_TIMEOUT_POOL: float = 5.0
 
+    # Pools HTTP compartidos por servicio (admin, zoho, odoo, openai)
+    HTTP_MAX_CONNECTIONS: int = 20
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    HTTP2_ENABLED: bool = False
+
+    # Procesamiento asíncrono de /bulk
+    BULK_JOB_TTL: int = 3600
+    # Tiempo máximo que un archivo espera aparcado a que se cierre un circuito
+    BULK_PARK_MAX_SECONDS: float = 1800.0
+
+    # Circuitos por dependencia (taggun, admin, zoho, odoo, openai).
+    # CIRCUIT_OVERRIDES ajusta los umbrales de una dependencia concreta, p. ej.
+    # {"taggun": {"failure_threshold": 3, "recovery_timeout": 60}}
+    CIRCUIT_FAILURE_THRESHOLD: int = 5
+    CIRCUIT_RECOVERY_TIMEOUT: float = 30.0
+    CIRCUIT_HALF_OPEN_MAX_CALLS: int = 1
+    CIRCUIT_SUCCESS_THRESHOLD: int = 1
+    CIRCUIT_OVERRIDES: Dict[str, Dict[str, float]] = {}
+
+    # Planificador por tenant (recipient)
+    SCHEDULER_MAX_CONCURRENCY: int = 8
+    SCHEDULER_INTERACTIVE_RESERVED: int = 2
+    SCHEDULER_TENANT_MAX_CONCURRENCY: int = 4
+    SCHEDULER_TENANT_WEIGHTS: Dict[str, float] = {}
+
+    # Recepción de archivos (spool en memoria / disco)
+    INTAKE_CHUNK_SIZE: int = 1024 * 1024
+    INTAKE_MAX_REQUEST_BYTES: int = 200 * 1024 * 1024
+    INTAKE_REQUEST_MEMORY_BUDGET: int = 32 * 1024 * 1024
+    INTAKE_PROCESS_MEMORY_BUDGET: int = 128 * 1024 * 1024
+    INTAKE_SPOOL_DIR: Path | None = None
+
+    # Límites por tipo de archivo, comprobados sobre las cabeceras antes del OCR
+    UPLOAD_IMAGE_MIN_SIDE: int = 100
+    UPLOAD_IMAGE_MAX_PIXELS: int = 50_000_000
+    UPLOAD_IMAGE_MAX_BYTES: int = 20 * 1024 * 1024
+    UPLOAD_PDF_MAX_BYTES: int = 20 * 1024 * 1024
+    UPLOAD_PDF_MAX_PAGES: int = 20
+
+    # Reducción de imágenes antes del OCR (megapíxeles, orientación, recompresión)
+    IMAGE_OPTIMIZE_ENABLED: bool = False
+    IMAGE_MAX_MEGAPIXELS: float = 4.0
+    IMAGE_OUTPUT_FORMAT: Literal["JPEG", "WEBP"] = "JPEG"
+    IMAGE_OUTPUT_QUALITY: int = 85
+    IMAGE_OPTIMIZE_WORKERS: int = 2
+
+    # Extracción local sin Taggun (capa de texto de PDFs digitales y Tesseract)
+    LOCAL_PDF_TEXT_ENABLED: bool = True
+    LOCAL_PDF_MIN_CHARS: int = 100
+    LOCAL_OCR_WORKERS: int = 2
+    # Tesseract como proveedor secundario: respaldo si Taggun falla y
+    # cobertura si tarda (requiere el binario tesseract)
+    TESSERACT_ENABLED: bool = False
+    TESSERACT_LANG: str = "spa"
+    TESSERACT_DPI: int = 300
+    TESSERACT_PAGE_TIMEOUT: float = 60.0
+    TESSERACT_PAGES_IN_FLIGHT: int = 2
+
+    # Distancia de edición máxima (1-2) para reconocer el identificador fiscal
+    # de una empresa del usuario leído con errores de OCR (0/O, 8/B)
+    TAX_ID_MATCH_MAX_DISTANCE: int = 1
+    # Desempate por posición, etiquetas y merchantTaxId de Taggun cuando la
+    # factura trae varios Tax ID de proveedor distintos
+    PARTNER_TAX_ID_RESOLVER_ENABLED: bool = True
+    # Resultados de validación de identificadores fiscales guardados en memoria
+    TAX_ID_VALIDATION_CACHE_SIZE: int = 10_000
+
+    # División de PDF con varias facturas (requiere capa de texto en cada página)
+    PDF_SPLIT_ENABLED: bool = True
+    PDF_SPLIT_MIN_PAGE_CHARS: int = 50
+    # Facturas de un mismo PDF en paralelo; cada una más allá de la primera
+    # ocupa un hueco del planificador del tenant
+    PDF_SPLIT_MAX_CONCURRENCY: int = 4
+
+    # Cobertura (hedging) del OCR: si Taggun no responde antes del percentil
+    # de sus latencias recientes, se lanza también el proveedor secundario
+    OCR_HEDGE_ENABLED: bool = True
+    OCR_HEDGE_PERCENTILE: float = 0.95
+    OCR_HEDGE_DEFAULT_DELAY: float = 10.0
+    OCR_HEDGE_MIN_DELAY: float = 2.0
+    OCR_HEDGE_MAX_DELAY: float = 30.0
+    OCR_HEDGE_WINDOW: int = 200
+
+    # Almacenamiento local (SQLite)
+    DATA_DIR: Path = Field(default=BASE_DIR / "app" / "data")
+    RESULT_CACHE_ENABLED: bool = True
+    RESULT_CACHE_TTL: int = 90 * 24 * 3600
+    OCR_CACHE_ENABLED: bool = True
+    OCR_CACHE_TTL: int = 30 * 24 * 3600
+    OCR_CACHE_MAX_BYTES: int = 512 * 1024 * 1024
+
+    IDEMPOTENCY_TTL: int = 24 * 3600
+    SECRETS_CACHE_TTL: int = 300
+    SECRETS_NEGATIVE_CACHE_TTL: int = 60
+    SECRETS_MAX_CONCURRENCY: int = 8
+
+    # Cuentas por email (identify de Admin). Django avisa de los cambios en
+    # POST /internal/accounts/invalidate con la cabecera X-Internal-Token; el
+    # TTL cubre los avisos perdidos. Los emails sin cuentas se recuerdan menos
+    ACCOUNTS_CACHE_TTL: int = 600
+    ACCOUNTS_NEGATIVE_CACHE_TTL: int = 60
+    INTERNAL_API_TOKEN: str = ""
+
+    # Outbox de archivado en Dropbox
+    ARCHIVE_OUTBOX_WORKERS: int = 2
+    ARCHIVE_MAX_ATTEMPTS: int = 8
+    ARCHIVE_RETRY_BASE_DELAY: float = 5.0
+    ARCHIVE_RETRY_MAX_DELAY: float = 900.0
+
     JWT_ALGORITHM: str = "HS256"
     JWT_SECRET_KEY: str = ""
     CRYPTO_KEY: str = ""
@@ -44,7 +166,7 @@ class Settings(BaseSettings):
 
     TAX_STANDARD_RATES: List = (0.0, 4.0, 10.0, 21.0)
 
-    @field_validator("ERROR_LOG_FILE", mode="before")
+    @field_validator("ERROR_LOG_FILE", "DATA_DIR", mode="before")
     @classmethod
     def convert_str_to_path(cls, v):
         return Path(v) if isinstance(v, str) else v
@@ -0,0 +1,65 @@
+import asyncio
+import sqlite3
+import threading
+from pathlib import Path
+
+from app.core.logging import logger
+
+
+class SQLiteStore:
+    """
+    Base para los almacenes locales del orquestador sobre SQLite.
+    - Una conexión por almacén, protegida con un lock.
+    - Las consultas se ejecutan en un hilo para no bloquear el event loop.
+    - Cada subclase declara su esquema en `schema`.
+    """
+
+    schema: str = ""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+
+    async def open(self):
+        await asyncio.to_thread(self._open)
+        logger.debug(f"[SQLITE] {type(self).__name__} abierto en {self.path}")
+        return self
+
+    def _open(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(self.schema)
+        self._conn = conn
+
+    async def close(self):
+        if self._conn is not None:
+            await asyncio.to_thread(self._conn.close)
+            self._conn = None
+
+    async def fetchone(self, sql: str, params: tuple = ()) -> sqlite3.Row | None:
+        rows = await self.fetchall(sql, params)
+        return rows[0] if rows else None
+
+    async def fetchall(self, sql: str, params: tuple = ()) -> list[sqlite3.Row]:
+        return await asyncio.to_thread(self._run, sql, params)
+
+    async def execute(self, sql: str, params: tuple = ()) -> int:
+        """Ejecuta una sentencia de escritura y devuelve las filas afectadas."""
+        return await asyncio.to_thread(self._run_write, sql, params)
+
+    def _run(self, sql: str, params: tuple) -> list[sqlite3.Row]:
+        with self._lock:
+            return self._connection().execute(sql, params).fetchall()
+
+    def _run_write(self, sql: str, params: tuple) -> int:
+        with self._lock:
+            return self._connection().execute(sql, params).rowcount
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            raise RuntimeError(f"{type(self).__name__}.open() no fue llamado todavía")
+        return self._conn
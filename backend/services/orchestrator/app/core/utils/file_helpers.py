@@ -1,4 +1,4 @@
-from starlette.datastructures import UploadFile as StarletteUploadFile
+from starlette.datastructures import Headers, UploadFile as StarletteUploadFile
 from io import BytesIO
 
 
@@ -9,6 +9,5 @@ def recreate_upload_file(
     Reconstruye un UploadFile a partir de contenido binario, nombre y tipo MIME.
     """
     stream = BytesIO(file_content)
-    return StarletteUploadFile(
-        filename=filename, file=stream, content_type=content_type
-    )
+    headers = Headers({"content-type": content_type}) if content_type else None
+    return StarletteUploadFile(file=stream, filename=filename, headers=headers)
@@ -1,8 +1,17 @@
-import difflib
 import re
+from collections import OrderedDict
 from typing import List, Tuple
 from stdnum.eu import vat as vat_validator
 from app.core.logging import logger
+from app.core.metrics import PARTNER_TAX_ID_RESOLUTIONS, TAX_ID_VALIDATION_CACHE
+from app.core.settings import settings
+from app.core.utils.tax_id_index import (
+    TaxIdIndex,
+    edit_distance,
+    normalize_tax_id,
+    tax_id_index,
+)
+from app.core.utils.tax_id_resolver import resolve_partner_tax_id
 from app.services.taggun.schemas.taggun_models import TaggunExtractedInvoice
 from app.core.exceptions import (
     MultipleCompanyTaxIdMatchesError,
@@ -11,6 +20,168 @@ from app.core.exceptions import (
     TaxIdNotFoundError,
 )
 
+# Unifica los CIF escritos con espacios ("B 12 345 678 9" -> "B123456789")
+SPACED_CIF = re.compile(
+    r"\b([A-HJ-NP-SUVW])\s?(\d{1,2})\s?(\d{3})\s?(\d{3})([0-9A-J])\b"
+)
+
+# Patrones por tipo, en el orden en que se recogen los candidatos
+TAX_ID_PATTERNS = {
+    "cif": re.compile(r"[A-HJ-NP-SUVW]-?\d{7}[0-9A-J]\b(?![A-Za-z0-9])"),
+    "cif2": re.compile(r"[A-HJ-NP-SUVW](?:-| )?(?:\d{8}|\d{2}\.?\d{3}\.?\d{3})"),
+    # VAT: no aplica puntos de miles ni guiones, se deja igual
+    "vat": re.compile(r"[A-Za-z]{2}[A-Z0-9]{1}\d{7,8}\b(?![A-Za-z0-9])"),
+    # NIF: ya soporta puntos y guion opcional antes de la letra de control
+    "nif": re.compile(
+        r"(?:\d{8}|\d{1,2}\.?\d{3}\.?\d{3})(?:-)?[TRWAGMYFPDXBNJZSQVHLCKE]\b(?![A-Za-z0-9])"
+    ),
+    # DIG: ahora soporta formato XX.XXX.XXX o 8 dígitos
+    "dig": re.compile(r"(?<!\d)(?:\d{8}|\d{1,2}\.?\d{3}\.?\d{3})(?!\d)"),
+}
+
+# Todos los patrones contienen al menos 7 dígitos seguidos o separados por
+# puntos o espacios sueltos, así que un identificador solo puede estar junto a
+# una de estas secuencias. Un patrón empieza como mucho 3 caracteres antes de
+# sus dígitos ("ESB", "B-", "B ") y termina como mucho 2 después ("-Z"): basta
+# con buscarlo en esa ventana alrededor de cada secuencia.
+WINDOW_BEFORE = 4
+WINDOW_AFTER = 3
+
+# Los textos que caben en cp1252 (casi todas las facturas) solo tienen los
+# dígitos 0-9: se buscan las secuencias sobre sus bytes, reducidos a las
+# clases "0" (dígito), "." (punto), " " (espacio, como `\s`) y "x" (resto)
+_CP1252_CLASSES = bytes(
+    ord(
+        "0"
+        if char.isdecimal()
+        else "." if char == "." else " " if char.isspace() else "x"
+    )
+    for char in (bytes([b]).decode("cp1252", "replace") for b in range(256))
+)
+_DIGIT_RUN_CP1252 = re.compile(rb"0[0. ]{6,}")
+# El resto puede traer otros dígitos Unicode, que `\d` también acepta
+_DIGIT_RUN = re.compile(r"\d[\d.\s]{6,}")
+
+
+def digit_windows(text: str) -> list[tuple[int, int]]:
+    """Ventanas del texto en las que puede haber un identificador fiscal."""
+    encoded = text.encode("cp1252", "replace")
+    if encoded.count(b"?") == text.count("?"):
+        runs = _DIGIT_RUN_CP1252.finditer(encoded.translate(_CP1252_CLASSES))
+    else:
+        runs = _DIGIT_RUN.finditer(text)
+    return [
+        (max(0, run.start() - WINDOW_BEFORE), run.end() + WINDOW_AFTER) for run in runs
+    ]
+
+
+def _search_windows(pattern: re.Pattern, text: str, windows):
+    """
+    Equivale a `pattern.finditer(text)` cuando todas las coincidencias caen
+    dentro de las ventanas: como en finditer, una coincidencia no puede
+    solapar la anterior.
+    """
+    position = 0
+    for start, end in windows:
+        position = max(position, start)
+        while match := pattern.search(text, position, end):
+            position = match.end()
+            yield match
+
+
+def join_spaced_cifs(text: str, windows: list[tuple[int, int]] | None = None) -> str:
+    """Equivale a `SPACED_CIF.sub(...)`; devuelve el mismo texto si no cambia."""
+    if windows is None:
+        windows = digit_windows(text)
+    pieces, last = [], 0
+    for match in _search_windows(SPACED_CIF, text, windows):
+        pieces.append(text[last : match.start()])
+        pieces.append("".join(match.groups()))
+        last = match.end()
+    if not pieces:
+        return text
+    pieces.append(text[last:])
+    return "".join(pieces)
+
+
+def scan_tax_ids(
+    text: str, windows: list[tuple[int, int]] | None = None
+) -> list[tuple[str, str, int]]:
+    """
+    Devuelve los candidatos `(tipo, valor, posición)` del texto, sin puntos
+    ni guiones y sin repetir valores. Equivale a un `findall` por patrón en
+    el orden de `TAX_ID_PATTERNS` (incluidos los solapes entre tipos, p. ej.
+    el DNI de un NIF), pero recorre el texto una sola vez y aplica cada patrón
+    únicamente en las ventanas donde puede coincidir.
+    """
+    if windows is None:
+        windows = digit_windows(text)
+    if not windows:
+        return []
+
+    candidates = []
+    seen = set()
+    for tipo, pattern in TAX_ID_PATTERNS.items():
+        for match in _search_windows(pattern, text, windows):
+            cleaned = match.group().replace("-", "").replace(".", "")
+            if cleaned not in seen:
+                seen.add(cleaned)
+                candidates.append((tipo, cleaned, match.start()))
+    return candidates
+
+
+# Formatos y letras de control de los validadores
+CIF_FORMAT = re.compile(r"[A-HJ-NP-SUVW]\d{7}[0-9A-J]")
+NIF_FORMAT = re.compile(r"\d{8}[TRWAGMYFPDXBNJZSQVHLCKE]")
+NUMERIC_CIF_FORMAT = re.compile(r"\d{8}")
+CIF_CONTROL_LETTERS = "JABCDEFGHI"
+NIF_CONTROL_LETTERS = "TRWAGMYFPDXBNJZSQVHLCKE"
+# Suma de las cifras del doble de cada dígito (posiciones impares del CIF)
+_DOUBLED_DIGIT_SUM = (0, 2, 4, 6, 8, 1, 3, 5, 7, 9)
+
+
+def _cif_control_digit(digits: str) -> int:
+    """Dígito de control de los 7 dígitos centrales de un CIF."""
+    suma_par = sum(int(digits[i]) for i in range(1, 7, 2))
+    suma_impar = sum(_DOUBLED_DIGIT_SUM[int(digits[i])] for i in range(0, 7, 2))
+    return (10 - (suma_par + suma_impar) % 10) % 10
+
+
+class ValidationCache:
+    """
+    Resultados de validación por (tipo, valor), compartidos entre escaneos y
+    limitados a `maxsize` entradas (se descartan las menos usadas).
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._results: OrderedDict[tuple[str, str], bool] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    def get_or_validate(self, tipo: str, valor: str) -> bool:
+        key = (tipo, valor)
+        result = self._results.get(key)
+        if result is not None:
+            self._results.move_to_end(key)
+            TAX_ID_VALIDATION_CACHE.labels("hit").inc()
+            return result
+
+        TAX_ID_VALIDATION_CACHE.labels("miss").inc()
+        result = TaxIdExtractor._validate(tipo, valor)
+        if self.maxsize > 0:
+            self._results[key] = result
+            if len(self._results) > self.maxsize:
+                self._results.popitem(last=False)
+        return result
+
+    def clear(self):
+        self._results.clear()
+
+
+_validation_cache = ValidationCache(settings.TAX_ID_VALIDATION_CACHE_SIZE)
+
 
 class TaxIdExtractor:
     """
@@ -23,36 +194,26 @@ class TaxIdExtractor:
         self,
         text: str,
         all_tax_ids: list[str],
-        similarity_threshold: float = 0.9,
+        max_distance: int = 1,
     ):
         self.text = text
-        self.text_cleaned = re.sub(
-            r"\b([A-HJ-NP-SUVW])\s?(\d{1,2})\s?(\d{3})\s?(\d{3})([0-9A-J])\b",
-            r"\1\2\3\4\5",
-            self.text,
-        )
-        self.similarity_threshold = similarity_threshold
-        self.patterns = {
-            "cif": r"[A-HJ-NP-SUVW]-?\d{7}[0-9A-J]\b(?![A-Za-z0-9])",
-            "cif2": r"[A-HJ-NP-SUVW](?:-| )?(?:\d{8}|\d{2}\.?\d{3}\.?\d{3})",
-            # VAT: no aplica puntos de miles ni guiones, se deja igual
-            "vat": r"[A-Za-z]{2}[A-Z0-9]{1}\d{7,8}\b(?![A-Za-z0-9])",
-            # NIF: ya soporta puntos y guion opcional antes de la letra de control
-            "nif": r"(?:\d{8}|\d{1,2}\.?\d{3}\.?\d{3})(?:-)?[TRWAGMYFPDXBNJZSQVHLCKE]\b(?![A-Za-z0-9])",
-            # DIG: ahora soporta formato XX.XXX.XXX o 8 dígitos
-            "dig": r"(?<!\d)(?:\d{8}|\d{1,2}\.?\d{3}\.?\d{3})(?!\d)",
-        }
+        # Las ventanas solo cambian si se ha unido algún CIF con espacios
+        self._windows = digit_windows(self.text)
+        self.text_cleaned = join_spaced_cifs(self.text, self._windows)
+        if self.text_cleaned is not self.text:
+            self._windows = digit_windows(self.text_cleaned)
+        self.max_distance = max_distance
 
         self.all_tax_ids: List[str] = all_tax_ids
         self.candidates: List[Tuple[str, str]] = self._extract_all_ids()
+        self._valid_tax_ids: List[str] | None = None
 
-    @staticmethod
-    def normalize_tax_id(tax_id: str) -> str:
-        """
-        Normaliza el identificador fiscal eliminando prefijos de país (como ES, PT, etc.)
-        """
-        tax_id = tax_id.strip().upper()
-        return re.sub(r"^([A-Z]{2})(?=\w{8,})", "", tax_id)
+    normalize_tax_id = staticmethod(normalize_tax_id)
+
+    @property
+    def account_index(self) -> TaxIdIndex:
+        """Índice de `all_tax_ids`, compartido entre escaneos con las mismas empresas."""
+        return tax_id_index(tuple(self.all_tax_ids), self.max_distance)
 
     @staticmethod
     def validate_candidates(candidates: List[Tuple[str, str]]) -> List[str]:
@@ -71,56 +232,59 @@ class TaxIdExtractor:
             if normalized in seen_normalized:
                 continue
 
-            if tipo == "vat":
-                try:
-                    if vat_validator.is_valid(valor):
-                        valid.append(valor)
-                        seen_normalized.add(normalized)
-                except Exception:
-                    continue
-            elif tipo == "cif" or tipo == "cif2":
-                if TaxIdExtractor._is_valid_cif(valor):
-                    valid.append(valor)
-                    seen_normalized.add(normalized)
-
+            if TaxIdExtractor.is_valid(tipo, valor):
+                valid.append(valor)
+                seen_normalized.add(normalized)
             elif tipo == "dig":
-                if TaxIdExtractor._is_valid_numeric_cif(valor):
-                    valid.append(valor)
-                    seen_normalized.add(normalized)
-                else:
-                    logger.warning(f"{valor} NO es un CIF numérico válido")
-            elif tipo == "nif":
-                if TaxIdExtractor._is_valid_nif(valor):
-                    valid.append(valor)
-                    seen_normalized.add(normalized)
+                logger.warning(f"{valor} NO es un CIF numérico válido")
 
         return valid
 
+    @staticmethod
+    def is_valid(tipo: str, valor: str) -> bool:
+        """
+        Valida un candidato según su tipo. Los mismos identificadores de
+        empresas y proveedores se repiten en miles de escaneos al día: el
+        resultado se guarda en una caché LRU compartida.
+        """
+        return _validation_cache.get_or_validate(tipo, valor)
+
+    @staticmethod
+    def _validate(tipo: str, valor: str) -> bool:
+        if tipo == "vat":
+            try:
+                return bool(vat_validator.is_valid(valor))
+            except Exception:
+                return False
+        if tipo == "cif" or tipo == "cif2":
+            return TaxIdExtractor._is_valid_cif(valor)
+        if tipo == "dig":
+            return TaxIdExtractor._is_valid_numeric_cif(valor)
+        if tipo == "nif":
+            return TaxIdExtractor._is_valid_nif(valor)
+        return False
+
     @staticmethod
     def _is_valid_cif(cif: str) -> bool:
         """
         Valida un CIF español según su formato y dígito de control.
         """
         cif = cif.upper()
-        if not re.match(r"^[A-HJ-NP-SUVW]\d{7}[0-9A-J]$", cif):
+        if not CIF_FORMAT.fullmatch(cif):
             return False
 
-        letters = "JABCDEFGHI"
         letter = cif[0]
-        digits = cif[1:-1]
         control = cif[-1]
-
-        suma_par = sum(int(digits[i]) for i in range(1, 7, 2))
-        suma_impar = sum(
-            int(c) for i in range(0, 7, 2) for c in str(int(digits[i]) * 2)
-        )
-        control_digit = (10 - (suma_par + suma_impar) % 10) % 10
+        control_digit = _cif_control_digit(cif[1:-1])
 
         if letter in "KPQRSNW":
-            return control == letters[control_digit]
+            return control == CIF_CONTROL_LETTERS[control_digit]
         elif letter in "ABEH":
             return control == str(control_digit)
-        return control == str(control_digit) or control == letters[control_digit]
+        return (
+            control == str(control_digit)
+            or control == CIF_CONTROL_LETTERS[control_digit]
+        )
 
     @staticmethod
     def _is_valid_nif(nif: str) -> bool:
@@ -130,14 +294,10 @@ class TaxIdExtractor:
         nif = nif.upper().replace(".", "").replace("-", "")
 
         # Debe ser 8 dígitos seguidos de una letra válida
-        if not re.match(r"^\d{8}[TRWAGMYFPDXBNJZSQVHLCKE]$", nif):
+        if not NIF_FORMAT.fullmatch(nif):
             return False
 
-        letras = "TRWAGMYFPDXBNJZSQVHLCKE"
-        numero = int(nif[:8])
-        letra_control = nif[-1]
-
-        return letras[numero % 23] == letra_control
+        return NIF_CONTROL_LETTERS[int(nif[:8]) % 23] == nif[-1]
 
     @staticmethod
     def _is_valid_numeric_cif(number: str) -> bool:
@@ -145,64 +305,48 @@ class TaxIdExtractor:
         Valida un CIF que contiene solo 8 dígitos (sin letra inicial ni final),
         aplicando la lógica estándar de dígito de control de CIF.
         """
-        if not re.match(r"^\d{8}$", number):
+        if not NUMERIC_CIF_FORMAT.fullmatch(number):
             return False
 
-        digits = number[:7]
-        control = number[-1]
-
-        # Cálculo del dígito de control
-        suma_par = sum(int(digits[i]) for i in range(1, 7, 2))
-        suma_impar = sum(
-            int(c) for i in range(0, 7, 2) for c in str(int(digits[i]) * 2)
-        )
-        control_digit = (10 - (suma_par + suma_impar) % 10) % 10
-
-        return control == str(control_digit)
+        return number[-1] == str(_cif_control_digit(number[:7]))
 
     def _extract_all_ids(self) -> List[Tuple[str, str]]:
         """
         Extrae todas las identificaciones fiscales del texto y elimina duplicados.
+        Guarda en `positions` dónde aparece cada una en `text_cleaned`.
         """
-        ids = []
-        seen = set()
-
-        for tipo, pattern in self.patterns.items():
-            matches = re.findall(pattern, self.text_cleaned)
-            for match in matches:
-                cleaned = match.replace("-", "").replace(".", "")
-                if cleaned not in seen:
-                    ids.append((tipo, cleaned))
-                    seen.add(cleaned)
-        return ids
-
-    def _are_similar(self, a: str, b: str, threshold: float = 0.9) -> bool:
+        found = scan_tax_ids(self.text_cleaned, self._windows)
+        self.positions = {valor: position for _, valor, position in found}
+        return [(tipo, valor) for tipo, valor, _ in found]
+
+    def _are_similar(self, a: str, b: str) -> bool:
         """
-        Compara dos identificadores fiscales eliminando prefijos como ES, y mide su similitud.
-        Imprime el valor de la similitud para depuración.
+        Compara dos identificadores fiscales eliminando prefijos como ES: son
+        similares si están a distancia de edición ≤ `max_distance`.
         """
         if not a or not b:
             return False
 
         a_norm = self.normalize_tax_id(a)
         b_norm = self.normalize_tax_id(b)
+        if a_norm == b_norm:
+            return True
+        return edit_distance(a_norm, b_norm, self.max_distance) <= self.max_distance
 
-        similarity = difflib.SequenceMatcher(None, a_norm, b_norm).ratio()
-        return similarity >= threshold
-
-    def _all_similar(self, items: List[str], threshold: float = 0.9) -> bool:
+    def _all_similar(self, items: List[str]) -> bool:
         if not items:
             return False
         base = items[0]
-        return all(
-            self._are_similar(base, item, threshold=threshold) for item in items[1:]
-        )
+        return all(self._are_similar(base, item) for item in items[1:])
 
     def valid_tax_ids(self) -> List[str]:
         """
         Retorna solo los identificadores fiscales válidos (VAT y CIF) en una lista plana.
+        La validación se hace una sola vez por instancia.
         """
-        return self.validate_candidates(self.candidates)
+        if self._valid_tax_ids is None:
+            self._valid_tax_ids = self.validate_candidates(self.candidates)
+        return list(self._valid_tax_ids)
 
     def get_company_tax_id_or_fail(self) -> str:
         """
@@ -211,16 +355,13 @@ class TaxIdExtractor:
         """
         valid_ids = self.valid_tax_ids()
 
+        index = self.account_index
         matches = []
         for tax_id in valid_ids:
-            for own_id in self.all_tax_ids:
-                if self._are_similar(tax_id, own_id, self.similarity_threshold):
-                    if not any(
-                        self._are_similar(tax_id, m, self.similarity_threshold)
-                        for m in matches
-                    ):
-                        matches.append(tax_id)
-                    break
+            if index.lookup(tax_id) and not any(
+                self._are_similar(tax_id, m) for m in matches
+            ):
+                matches.append(tax_id)
 
         if len(matches) == 1:
             return matches[0]
@@ -235,23 +376,21 @@ class TaxIdExtractor:
     ) -> str | list:
         """
         Devuelve el identificador fiscal del proveedor (partner), excluyendo el de la empresa contratada.
-        Si hay múltiples posibles pero son variantes similares, retorna el más completo.
-        Lanza MultiplePartnerTaxIdsError si hay varios distintos.
+        Si hay múltiples posibles pero son variantes similares, retorna el más completo;
+        si son distintos, se queda con el que destaque por posición, etiquetas y
+        el proveedor detectado por Taggun.
+        Lanza MultiplePartnerTaxIdsError si ninguno destaca.
         Lanza PartnerTaxIdNotFoundError si no encuentra ninguno.
         """
         valid_ids = self.valid_tax_ids()
 
         candidates = [
-            tax_id
-            for tax_id in valid_ids
-            if not self._are_similar(tax_id, company_vat, self.similarity_threshold)
+            tax_id for tax_id in valid_ids if not self._are_similar(tax_id, company_vat)
         ]
 
         matches = []
         for tax_id in candidates:
-            if not any(
-                self._are_similar(tax_id, m, self.similarity_threshold) for m in matches
-            ):
+            if not any(self._are_similar(tax_id, m) for m in matches):
                 matches.append(tax_id)
 
         if len(matches) == 1:
@@ -261,7 +400,37 @@ class TaxIdExtractor:
             raise PartnerTaxIdNotFoundError()
 
         # ✅ Si hay múltiples, pero son similares entre sí → devolver el más largo
-        if self._all_similar(matches, threshold=self.similarity_threshold):
+        if self._all_similar(matches):
             return max(matches, key=lambda x: (len(x), x))
 
+        if settings.PARTNER_TAX_ID_RESOLVER_ENABLED:
+            resolved = self._resolve_partner(matches, taggun_data)
+            if resolved:
+                return resolved
+
         raise MultiplePartnerTaxIdsError(matches)
+
+    def _resolve_partner(
+        self, matches: List[str], taggun_data: TaggunExtractedInvoice
+    ) -> str | None:
+        """
+        Desempata por la posición de cada candidato, las etiquetas que lo
+        rodean y el proveedor que detectó Taggun (ver `tax_id_resolver`).
+        """
+        positions = {}
+        for valor, position in self.positions.items():
+            positions.setdefault(valor.strip().upper(), position)
+
+        resolved, ranking = resolve_partner_tax_id(
+            matches,
+            self.text_cleaned,
+            positions,
+            merchant_tax_id=getattr(taggun_data, "partner_vat", "") or "",
+            merchant_name=getattr(taggun_data, "partner_name", "") or "",
+        )
+        PARTNER_TAX_ID_RESOLUTIONS.labels("resolved" if resolved else "ambiguous").inc()
+        logger.info(
+            f"Desempate del Tax ID del proveedor: {resolved or 'sin ganador claro'} "
+            f"{[(s.tax_id, s.score, s.reasons) for s in ranking]}"
+        )
+        return resolved
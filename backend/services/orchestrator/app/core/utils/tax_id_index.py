@@ -0,0 +1,127 @@
+"""
+Índice de identificadores fiscales para encontrar, sin compararlos uno a uno,
+los de las empresas de un usuario que coinciden con uno leído de la factura:
+primero por igualdad tras normalizar y, si no, a una distancia de edición
+acotada (confusiones del OCR como 0/O u 8/B, o un carácter de más o de menos).
+
+Cada identificador se guarda también con hasta `max_distance` caracteres
+borrados (como SymSpell): dos identificadores a distancia ≤ d comparten alguna
+de esas variantes, así que una búsqueda solo verifica los que la comparten y
+su coste no depende del número de empresas.
+"""
+
+import re
+from functools import lru_cache
+from itertools import combinations
+from typing import Iterable
+
+# Prefijo de país de un VAT (ES, PT...), solo si le sigue un identificador
+COUNTRY_PREFIX = re.compile(r"^([A-Z]{2})(?=\w{8,})")
+
+
+def normalize_tax_id(tax_id: str) -> str:
+    """
+    Normaliza el identificador fiscal eliminando prefijos de país (como ES, PT, etc.)
+    """
+    return COUNTRY_PREFIX.sub("", tax_id.strip().upper())
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """
+    Distancia de Levenshtein entre `a` y `b`, o `limit + 1` en cuanto se sabe
+    que la supera.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(
+                min(
+                    previous[j] + 1,
+                    current[j - 1] + 1,
+                    previous[j - 1] + (char_a != char_b),
+                )
+            )
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return min(previous[-1], limit + 1)
+
+
+def _deletions(key: str, max_distance: int) -> set[str]:
+    variants = {key}
+    for count in range(1, min(max_distance, len(key)) + 1):
+        for positions in combinations(range(len(key)), count):
+            kept = [c for i, c in enumerate(key) if i not in positions]
+            variants.add("".join(kept))
+    return variants
+
+
+class TaxIdIndex:
+    """Identificadores de las empresas de un usuario, normalizados."""
+
+    def __init__(self, tax_ids: Iterable[str], max_distance: int = 1):
+        self.max_distance = max_distance
+        # Identificador normalizado -> originales, en el orden recibido
+        self._exact: dict[str, list[str]] = {}
+        self._keys: list[str] = []
+        self._rank: dict[str, int] = {}
+        # Variante con caracteres borrados -> identificadores normalizados
+        self._variants: dict[str, set[str]] = {}
+        for tax_id in tax_ids:
+            self.add(tax_id)
+
+    def __len__(self) -> int:
+        return len(self._exact)
+
+    def add(self, tax_id: str):
+        if not tax_id:
+            return
+        key = normalize_tax_id(tax_id)
+        if key in self._exact:
+            if tax_id not in self._exact[key]:
+                self._exact[key].append(tax_id)
+            return
+        self._exact[key] = [tax_id]
+        self._rank[key] = len(self._keys)
+        self._keys.append(key)
+        for variant in _deletions(key, self.max_distance):
+            self._variants.setdefault(variant, set()).add(key)
+
+    def lookup(self, tax_id: str) -> list[str]:
+        """
+        Identificadores del índice que coinciden con `tax_id`: los iguales tras
+        normalizar si los hay y, si no, los que están a distancia ≤
+        `max_distance`, del más cercano al más lejano.
+        """
+        if not tax_id:
+            return []
+        key = normalize_tax_id(tax_id)
+        if key in self._exact:
+            return list(self._exact[key])
+
+        candidates = set()
+        for variant in _deletions(key, self.max_distance):
+            candidates |= self._variants.get(variant, set())
+
+        scored = sorted(
+            (edit_distance(key, candidate, self.max_distance), self._rank[candidate])
+            for candidate in candidates
+        )
+        return [
+            tax_id
+            for distance, rank in scored
+            if distance <= self.max_distance
+            for tax_id in self._exact[self._keys[rank]]
+        ]
+
+
+@lru_cache(maxsize=128)
+def tax_id_index(tax_ids: tuple[str, ...], max_distance: int = 1) -> TaxIdIndex:
+    """
+    Índice compartido para una lista de identificadores: los escaneos de un
+    mismo usuario reciben las mismas empresas y no lo reconstruyen.
+    """
+    return TaxIdIndex(tax_ids, max_distance)
@@ -0,0 +1,138 @@
+"""
+Desempate del identificador fiscal del proveedor cuando la factura trae
+varios que no son de la empresa (p. ej. el de una gestoría, el de otro
+cliente o el de un transportista).
+
+Cada candidato suma puntos según:
+- coincide con el `merchantTaxId` que detectó Taggun (o está a un carácter),
+- va precedido en su línea de una etiqueta fiscal ("CIF:", "NIF", "VAT"...),
+- aparece pronto en el texto (la cabecera suele ser del emisor) o poco
+  después del nombre del proveedor,
+y resta si su línea o la anterior lo presentan como cliente o destinatario.
+
+Solo se elige un candidato si supera `MIN_SCORE` y saca `MIN_MARGIN` al
+siguiente; si no, la factura sigue siendo ambigua.
+"""
+
+import re
+from dataclasses import dataclass
+
+from app.core.utils.tax_id_index import edit_distance, normalize_tax_id
+
+MERCHANT_MATCH = 4.0
+MERCHANT_NEAR_MATCH = 3.0
+TAX_LABEL = 2.0
+CUSTOMER_LABEL = -3.0
+EARLY_POSITION = 1.0
+NEAR_MERCHANT_NAME = 1.0
+
+MIN_SCORE = 2.0
+MIN_MARGIN = 1.5
+
+# Caracteres antes del identificador en los que se busca su etiqueta
+LABEL_WINDOW = 40
+# Distancia máxima, en caracteres, desde el nombre del proveedor
+MERCHANT_NAME_WINDOW = 200
+
+TAX_LABEL_PATTERN = re.compile(
+    r"\b(?:c\.?\s?i\.?\s?f|n\.?\s?i\.?\s?f|n\.?\s?i\.?\s?e|vat|tax\s?id|"
+    r"id\.?\s?fiscal|identificaci[oó]n\s+fiscal)\b",
+    re.IGNORECASE,
+)
+CUSTOMER_PATTERN = re.compile(
+    r"\b(?:client[ea]?|destinatari[oa]|facturar\s+a|bill\s+to|customer|comprador)\b",
+    re.IGNORECASE,
+)
+
+
+@dataclass(frozen=True)
+class ScoredTaxId:
+    tax_id: str
+    score: float
+    reasons: tuple[str, ...]
+
+
+def _compact(tax_id: str) -> str:
+    return normalize_tax_id(re.sub(r"[^A-Za-z0-9]", "", tax_id or ""))
+
+
+def score_candidate(
+    tax_id: str,
+    text: str,
+    position: int | None,
+    merchant_tax_id: str = "",
+    merchant_name: str = "",
+) -> ScoredTaxId:
+    score, reasons = 0.0, []
+
+    merchant = _compact(merchant_tax_id)
+    if merchant:
+        distance = edit_distance(_compact(tax_id), merchant, 1)
+        if distance == 0:
+            score += MERCHANT_MATCH
+            reasons.append("merchant_tax_id")
+        elif distance == 1:
+            score += MERCHANT_NEAR_MATCH
+            reasons.append("merchant_tax_id~1")
+
+    if position is not None and text:
+        line_start = text.rfind("\n", 0, position) + 1
+        before = text[max(line_start, position - LABEL_WINDOW) : position]
+        if TAX_LABEL_PATTERN.search(before):
+            score += TAX_LABEL
+            reasons.append("etiqueta")
+
+        previous_start = text.rfind("\n", 0, max(line_start - 1, 0)) + 1
+        if CUSTOMER_PATTERN.search(text[previous_start:position]):
+            score += CUSTOMER_LABEL
+            reasons.append("cliente")
+
+        score += EARLY_POSITION * (1 - position / len(text))
+
+        if merchant_name and len(merchant_name.strip()) >= 3:
+            start = max(0, position - MERCHANT_NAME_WINDOW)
+            if merchant_name.strip().lower() in text[start:position].lower():
+                score += NEAR_MERCHANT_NAME
+                reasons.append("nombre")
+
+    return ScoredTaxId(tax_id, round(score, 3), tuple(reasons))
+
+
+def rank_candidates(
+    candidates: list[str],
+    text: str,
+    positions: dict[str, int],
+    merchant_tax_id: str = "",
+    merchant_name: str = "",
+) -> list[ScoredTaxId]:
+    """Candidatos de mayor a menor puntuación (a igualdad, en orden de aparición)."""
+    scored = [
+        score_candidate(
+            tax_id, text, positions.get(tax_id), merchant_tax_id, merchant_name
+        )
+        for tax_id in candidates
+    ]
+    return sorted(scored, key=lambda s: -s.score)
+
+
+def resolve_partner_tax_id(
+    candidates: list[str],
+    text: str,
+    positions: dict[str, int],
+    merchant_tax_id: str = "",
+    merchant_name: str = "",
+) -> tuple[str | None, list[ScoredTaxId]]:
+    """
+    Devuelve el identificador del proveedor si uno destaca claramente sobre
+    los demás (None si no) junto con la puntuación de todos los candidatos.
+    """
+    ranking = rank_candidates(
+        candidates, text, positions, merchant_tax_id, merchant_name
+    )
+    if not ranking:
+        return None, ranking
+    best = ranking[0]
+    runner_up = ranking[1].score if len(ranking) > 1 else float("-inf")
+    if best.score >= MIN_SCORE and best.score - runner_up >= MIN_MARGIN:
+        return best.tax_id, ranking
+    return None, ranking
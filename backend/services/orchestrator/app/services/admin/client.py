@@ -1,34 +1,31 @@
 import httpx
 from app.core.client_provider import ProviderConfig
-from app.core.settings import settings
 from app.core.logging import logger
+from app.core.circuit_breaker import circuit_breaker
+from app.core.exceptions import UnknownEmailError
+from app.core.metrics import track_dependency
 
 from .schemas import IdentifyAccountsResponse, ServiceCredentialsResponse
 from exponential_core.exceptions import CustomAppException
 
 
 class AdminService:
-    def __init__(self, config: ProviderConfig):
+    def __init__(self, config: ProviderConfig, client: httpx.AsyncClient):
         self.path = config.path
-        logger
-        self.timeout = httpx.Timeout(
-            connect=settings.HTTP_TIMEOUT_CONNECT,
-            read=settings.HTTP_TIMEOUT_READ,
-            write=settings.HTTP_TIMEOUT_WRITE,
-            pool=settings.HTTP_TIMEOUT_POOL,
-        )
+        self.client = client
 
+    @circuit_breaker("admin")
+    @track_dependency("admin")
     async def register_scan(self, user_id: int, account_id: int) -> dict:
         url = f"{self.path}/user/scanning/"
         logger.debug(f"Registrando escaneo en: {url}")
         data = {"user_id": user_id, "account_id": account_id}
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    url=url,
-                    data=data,
-                )
-                response.raise_for_status()
+            response = await self.client.post(
+                url=url,
+                data=data,
+            )
+            response.raise_for_status()
             return response.json()
         except httpx.ReadTimeout:
             raise CustomAppException(
@@ -41,6 +38,8 @@ class AdminService:
                 f"Error inesperado al registrar escaneo con Admin: {exc}"
             )
 
+    @circuit_breaker("admin")
+    @track_dependency("admin")
     async def service_credentials(
         self, service_id: int, search: str | None = None
     ) -> ServiceCredentialsResponse:
@@ -50,9 +49,8 @@ class AdminService:
             logger.debug(f"Obteniendo credenciales: {url}")
 
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(url=url, headers=self.headers)
-                response.raise_for_status()
+            response = await self.client.get(url=url)
+            response.raise_for_status()
             return ServiceCredentialsResponse(**response.json())
         except httpx.ReadTimeout:
             raise CustomAppException(
@@ -65,17 +63,25 @@ class AdminService:
                 f"Error inesperado al obtener credenciales con Admin: {exc}"
             )
 
+    @circuit_breaker("admin")
+    @track_dependency("admin")
     async def identify_accounts(self, email: str) -> IdentifyAccountsResponse:
         url = f"{self.path}/auth/identify/"
         logger.debug(f"Autenticando email en: {url}")
 
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(url=url, json={"email": email})
-                response.raise_for_status()
+            response = await self.client.post(url=url, json={"email": email})
+            response.raise_for_status()
 
             return IdentifyAccountsResponse(**response.json())
 
+        except httpx.HTTPStatusError as exc:
+            # Admin responde 400 cuando el email no es de ningún usuario
+            if exc.response.status_code in (400, 404):
+                raise UnknownEmailError(email=email)
+            raise CustomAppException(
+                f"Error inesperado al obtener credenciales con Admin: {exc}"
+            )
         except httpx.ReadTimeout:
             raise CustomAppException(
                 "Tiempo de espera excedido al obtener credenciales de servicio"
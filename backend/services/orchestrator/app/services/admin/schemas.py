@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
 
 
 class UserDataSchema(BaseModel):
@@ -33,3 +33,8 @@ class AccountItem(BaseModel):
 class IdentifyAccountsResponse(BaseModel):
     user_id: int
     accounts: List[AccountItem]
+
+
+class AccountsChangedSchema(BaseModel):
+    # Emails cuyas cuentas han cambiado; sin emails se olvidan todas
+    emails: Optional[List[str]] = None
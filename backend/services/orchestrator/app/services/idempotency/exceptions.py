@@ -0,0 +1,25 @@
+from exponential_core.exceptions import CustomAppException
+
+
+class InvalidIdempotencyKeyError(CustomAppException):
+    def __init__(self, max_length: int, message: str = None):
+        default_message = (
+            f"La cabecera Idempotency-Key debe tener entre 1 y {max_length} caracteres."
+        )
+        super().__init__(
+            message=message or default_message,
+            data={"max_length": max_length},
+            status_code=400,
+        )
+
+
+class IdempotencyKeyMismatchError(CustomAppException):
+    def __init__(self, key: str, message: str = None):
+        default_message = (
+            f"La Idempotency-Key '{key}' ya se usó con una petición diferente."
+        )
+        super().__init__(
+            message=message or default_message,
+            data={"idempotency_key": key},
+            status_code=422,
+        )
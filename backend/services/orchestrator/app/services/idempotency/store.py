@@ -0,0 +1,148 @@
+import asyncio
+import json
+import time
+from typing import Any, Awaitable, Callable
+
+from fastapi.encoders import jsonable_encoder
+
+from app.core.logging import logger
+from app.core.sqlite import SQLiteStore
+from app.services.idempotency.exceptions import (
+    IdempotencyKeyMismatchError,
+    InvalidIdempotencyKeyError,
+)
+
+MAX_KEY_LENGTH = 255
+
+
+class IdempotencyStore(SQLiteStore):
+    """
+    Respuestas de peticiones con cabecera Idempotency-Key.
+    - La primera petición ejecuta la operación en una tarea propia, que sigue
+      en curso aunque el cliente se desconecte.
+    - Los duplicados concurrentes se adjuntan a esa misma ejecución.
+    - Los duplicados posteriores reciben la respuesta almacenada.
+    - Las ejecuciones que fallan no se guardan, para permitir el reintento.
+    La clave se asocia a una huella del contenido; reutilizarla con otros
+    archivos es un error.
+    """
+
+    schema = """
+        CREATE TABLE IF NOT EXISTS idempotency_keys (
+            scope TEXT NOT NULL,
+            key TEXT NOT NULL,
+            fingerprint TEXT NOT NULL,
+            response TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            PRIMARY KEY (scope, key)
+        );
+    """
+
+    def __init__(self, path, ttl: int):
+        super().__init__(path)
+        self.ttl = ttl
+        self._inflight: dict[tuple[str, str], tuple[str, asyncio.Task]] = {}
+
+    async def open(self):
+        await super().open()
+        await self._purge_expired()
+        return self
+
+    async def close(self):
+        tasks = [task for _, task in self._inflight.values()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await super().close()
+
+    async def run(
+        self,
+        key: str,
+        scope: str,
+        fingerprint: str,
+        func: Callable[[], Awaitable[Any]],
+        on_skip: Callable[[], None] | None = None,
+    ) -> Any:
+        """
+        Ejecuta `func` una sola vez por (scope, key) y devuelve su resultado.
+        Si la operación ya está en curso o terminó, se reutiliza; `on_skip` se
+        llama siempre que `func` no llegue a ejecutarse.
+        """
+        started = False
+        try:
+            if not key or len(key) > MAX_KEY_LENGTH:
+                raise InvalidIdempotencyKeyError(max_length=MAX_KEY_LENGTH)
+
+            ident = (scope, key)
+            task = self._attach(ident, fingerprint)
+            if task is None:
+                row = await self.fetchone(
+                    "SELECT fingerprint, response FROM idempotency_keys "
+                    "WHERE scope = ? AND key = ? AND created_at >= ?",
+                    (scope, key, time.time() - self.ttl),
+                )
+                if row:
+                    _check_fingerprint(key, row["fingerprint"], fingerprint)
+                    logger.info(
+                        f"[IDEMPOTENCY] [{key}] Respuesta almacenada reutilizada"
+                    )
+                    return json.loads(row["response"])
+
+                # Otra petición pudo empezar mientras se consultaba la base
+                task = self._attach(ident, fingerprint)
+
+            if task is not None:
+                logger.info(f"[IDEMPOTENCY] [{key}] Adjuntada a la ejecución en curso")
+            else:
+                task = asyncio.create_task(self._execute(ident, fingerprint, func))
+                self._inflight[ident] = (fingerprint, task)
+                started = True
+        finally:
+            if not started and on_skip:
+                on_skip()
+
+        return await asyncio.shield(task)
+
+    def _attach(self, ident: tuple[str, str], fingerprint: str) -> asyncio.Task | None:
+        running = self._inflight.get(ident)
+        if running is None:
+            return None
+        _check_fingerprint(ident[1], running[0], fingerprint)
+        return running[1]
+
+    async def _execute(
+        self,
+        ident: tuple[str, str],
+        fingerprint: str,
+        func: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        scope, key = ident
+        try:
+            result = await func()
+            await self.execute(
+                "INSERT OR REPLACE INTO idempotency_keys "
+                "(scope, key, fingerprint, response, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (
+                    scope,
+                    key,
+                    fingerprint,
+                    json.dumps(jsonable_encoder(result), default=str),
+                    time.time(),
+                ),
+            )
+            await self._purge_expired()
+            return result
+        finally:
+            self._inflight.pop(ident, None)
+
+    async def _purge_expired(self):
+        await self.execute(
+            "DELETE FROM idempotency_keys WHERE created_at < ?",
+            (time.time() - self.ttl,),
+        )
+
+
+def _check_fingerprint(key: str, stored: str, received: str):
+    if stored != received:
+        raise IdempotencyKeyMismatchError(key=key)
@@ -0,0 +1,11 @@
+from exponential_core.exceptions import CustomAppException
+
+
+class PayloadTooLargeError(CustomAppException):
+    def __init__(self, limit: int, message: str = None, data: dict = None):
+        default_message = f"El tamaño total de los archivos supera el máximo permitido de {limit} bytes."
+        super().__init__(
+            message=message or default_message,
+            data={**(data or {}), "limit": limit},
+            status_code=413,
+        )
@@ -0,0 +1,170 @@
+import asyncio
+import hashlib
+import io
+import os
+import tempfile
+from pathlib import Path
+
+from fastapi import UploadFile
+
+from app.core.settings import settings
+from app.core.logging import logger
+from app.services.intake.exceptions import PayloadTooLargeError
+
+
+class MemoryBudget:
+    """
+    Contabiliza los bytes que los archivos recibidos mantienen en memoria.
+    Cuando no queda presupuesto, el archivo se vuelca a disco.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.used = 0
+
+    def try_reserve(self, size: int) -> bool:
+        if self.used + size > self.limit:
+            return False
+        self.used += size
+        return True
+
+    def release(self, size: int):
+        self.used = max(0, self.used - size)
+
+
+# Presupuesto compartido por todas las peticiones del proceso
+process_budget = MemoryBudget(settings.INTAKE_PROCESS_MEMORY_BUDGET)
+
+
+class SpooledUpload:
+    """
+    Copia de un archivo recibido que vive en memoria mientras haya presupuesto
+    y en un archivo temporal en disco a partir de ahí. Calcula el SHA-256 a
+    medida que se escribe.
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        content_type: str | None,
+        request_budget: MemoryBudget,
+    ):
+        self.filename = filename
+        self.content_type = content_type
+        self.size = 0
+        self.sha256 = ""
+        self._hasher = hashlib.sha256()
+        self._request_budget = request_budget
+        self._buffer: io.BytesIO | None = io.BytesIO()
+        self._reserved = 0
+        self._path: Path | None = None
+        self._disk = None
+
+    @property
+    def in_memory(self) -> bool:
+        return self._buffer is not None
+
+    async def write(self, chunk: bytes):
+        self._hasher.update(chunk)
+        self.size += len(chunk)
+
+        if self._buffer is not None and self._reserve(len(chunk)):
+            self._buffer.write(chunk)
+            return
+
+        if self._buffer is not None:
+            await self._rollover()
+        await asyncio.to_thread(self._disk.write, chunk)
+
+    async def finalize(self):
+        """Cierra la escritura y fija el hash del contenido."""
+        self.sha256 = self._hasher.hexdigest()
+        if self._disk is not None:
+            await asyncio.to_thread(self._disk.close)
+            self._disk = None
+
+    async def read_bytes(self) -> bytes:
+        if self._buffer is not None:
+            return self._buffer.getvalue()
+        return await asyncio.to_thread(self._path.read_bytes)
+
+    def close(self):
+        """Libera la memoria reservada y elimina el archivo temporal."""
+        if self._buffer is not None:
+            self._buffer = None
+            self._release()
+        if self._disk is not None:
+            self._disk.close()
+            self._disk = None
+        if self._path is not None:
+            self._path.unlink(missing_ok=True)
+            self._path = None
+
+    def _reserve(self, size: int) -> bool:
+        if not self._request_budget.try_reserve(size):
+            return False
+        if not process_budget.try_reserve(size):
+            self._request_budget.release(size)
+            return False
+        self._reserved += size
+        return True
+
+    def _release(self):
+        self._request_budget.release(self._reserved)
+        process_budget.release(self._reserved)
+        self._reserved = 0
+
+    async def _rollover(self):
+        """Mueve el contenido acumulado en memoria a un archivo temporal."""
+        fd, path = tempfile.mkstemp(prefix="intake-", dir=settings.INTAKE_SPOOL_DIR)
+        self._path = Path(path)
+        self._disk = os.fdopen(fd, "wb")
+        await asyncio.to_thread(self._disk.write, self._buffer.getvalue())
+        self._buffer = None
+        self._release()
+        logger.debug(f"[INTAKE] [{self.filename}] Volcado a disco en {self._path}")
+
+
+async def spool_uploads(files: list[UploadFile]) -> list[SpooledUpload]:
+    """
+    Copia los archivos de una petición por bloques, aplicando el tamaño máximo
+    por petición y los presupuestos de memoria por petición y por proceso.
+    """
+    request_budget = MemoryBudget(settings.INTAKE_REQUEST_MEMORY_BUDGET)
+    uploads: list[SpooledUpload] = []
+    total = 0
+
+    try:
+        for file in files:
+            upload = SpooledUpload(
+                filename=file.filename,
+                content_type=file.content_type,
+                request_budget=request_budget,
+            )
+            uploads.append(upload)
+
+            while chunk := await file.read(settings.INTAKE_CHUNK_SIZE):
+                total += len(chunk)
+                if total > settings.INTAKE_MAX_REQUEST_BYTES:
+                    raise PayloadTooLargeError(
+                        limit=settings.INTAKE_MAX_REQUEST_BYTES,
+                        data={"filename": file.filename},
+                    )
+                await upload.write(chunk)
+
+            await upload.finalize()
+            logger.debug(
+                f"[INTAKE] [{upload.filename}] {upload.size} bytes "
+                f"({'memoria' if upload.in_memory else 'disco'}) sha256={upload.sha256}"
+            )
+    except BaseException:
+        for upload in uploads:
+            upload.close()
+        raise
+
+    return uploads
+
+
+async def spool_upload(file: UploadFile) -> SpooledUpload:
+    uploads = await spool_uploads([file])
+    return uploads[0]
@@ -0,0 +1,11 @@
+from exponential_core.exceptions import CustomAppException
+
+
+class JobNotFoundError(CustomAppException):
+    def __init__(self, job_id: str, message: str = None):
+        default_message = f"No existe un procesamiento con el identificador: '{job_id}'"
+        super().__init__(
+            message=message or default_message,
+            data={"job_id": job_id},
+            status_code=404,
+        )
@@ -0,0 +1,219 @@
+import asyncio
+import random
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable
+
+from app.core.exceptions import CircuitOpenError
+from app.core.logging import logger
+from app.core.metrics import BULK_FILES_IN_FLIGHT, BULK_FILES_PARKED
+from app.services.intake.spool import SpooledUpload
+from app.services.jobs.exceptions import JobNotFoundError
+from app.services.scheduler.fair_share import FairShareScheduler
+from app.services.jobs.schemas import (
+    BulkJob,
+    FileResult,
+    FileStatusEnum,
+    JobStatusEnum,
+)
+
+JobHandler = Callable[..., Awaitable[dict | None]]
+
+
+@dataclass
+class _FileTask:
+    job_id: str
+    index: int
+    upload: SpooledUpload
+    handler: JobHandler
+    parked_seconds: float = 0.0
+
+
+class JobManager:
+    """
+    Procesa trabajos de múltiples facturas en segundo plano.
+    - Cada archivo se procesa en su propia tarea, que espera turno en el
+      planificador por tenant antes de ejecutar el handler.
+    - Cada archivo registra su propio estado; un fallo no detiene el resto.
+    - Si una dependencia tiene el circuito abierto, el archivo se aparca sin
+      ocupar hueco en el planificador y se reanuda cuando el circuito vuelve
+      a admitir llamadas, durante como mucho `max_park_seconds` en total.
+    - Los trabajos finalizados se descartan tras `ttl` segundos.
+    """
+
+    def __init__(
+        self,
+        scheduler: FairShareScheduler,
+        ttl: int = 3600,
+        max_park_seconds: float = 1800.0,
+    ):
+        self.scheduler = scheduler
+        self.ttl = ttl
+        self.max_park_seconds = max_park_seconds
+        self._jobs: dict[str, BulkJob] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    async def close(self):
+        """Cancela los archivos pendientes o en curso."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    async def submit(
+        self,
+        recipient: str,
+        uploads: list[SpooledUpload],
+        handler: JobHandler,
+    ) -> BulkJob:
+        """
+        Registra un trabajo y lanza una tarea por archivo. Devuelve el trabajo
+        sin esperar a que se procese; cada archivo se libera al terminar.
+        """
+        self._purge_expired()
+
+        job = BulkJob(
+            job_id=uuid.uuid4().hex,
+            recipient=recipient,
+            created_at=_now(),
+            total=len(uploads),
+            files=[
+                FileResult(index=index, filename=upload.filename or "")
+                for index, upload in enumerate(uploads)
+            ],
+        )
+        self._jobs[job.job_id] = job
+
+        for index, upload in enumerate(uploads):
+            file_task = _FileTask(
+                job_id=job.job_id,
+                index=index,
+                upload=upload,
+                handler=handler,
+            )
+            task = asyncio.create_task(
+                self._run(file_task), name=f"bulk-{job.job_id}-{index}"
+            )
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+        logger.info(
+            f"[JOBS] Trabajo {job.job_id} encolado con {job.total} archivos para {recipient}"
+        )
+        return job
+
+    def get(self, job_id: str) -> BulkJob:
+        job = self._jobs.get(job_id)
+        if job is None:
+            raise JobNotFoundError(job_id)
+        return job
+
+    async def _run(self, task: _FileTask):
+        BULK_FILES_IN_FLIGHT.inc()
+        try:
+            job = self._jobs.get(task.job_id)
+            while job is not None:
+                async with self.scheduler.slot(job.recipient):
+                    park_for = await self._process(job, task)
+                if park_for is None:
+                    break
+                # La espera va fuera del planificador para no ocupar su hueco
+                BULK_FILES_PARKED.inc()
+                try:
+                    await asyncio.sleep(park_for)
+                finally:
+                    BULK_FILES_PARKED.dec()
+                task.parked_seconds += park_for
+                job.files[task.index].status = FileStatusEnum.PENDING
+        except Exception:
+            logger.exception(f"[JOBS] Error inesperado en el trabajo {task.job_id}")
+        finally:
+            task.upload.close()
+            BULK_FILES_IN_FLIGHT.dec()
+
+    async def _process(self, job: BulkJob, task: _FileTask) -> float | None:
+        """Procesa el archivo; devuelve los segundos que debe quedar aparcado."""
+        item = job.files[task.index]
+        item.status = FileStatusEnum.PROCESSING
+        item.started_at = _now()
+        job.status = JobStatusEnum.RUNNING
+
+        try:
+            item.result = await task.handler(
+                recipient=job.recipient,
+                upload=task.upload,
+            )
+            item.status = FileStatusEnum.SUCCESS
+            item.error = None
+            item.parked_until = None
+            job.succeeded += 1
+        except CircuitOpenError as exc:
+            # Jitter para que los archivos aparcados no vuelvan todos a la vez
+            # cuando el circuito pase a half_open
+            park_for = max(exc.retry_after, 1.0) * random.uniform(1.0, 1.5)
+            if task.parked_seconds + park_for <= self.max_park_seconds:
+                self._park(job, task, exc, park_for)
+                return park_for
+            self._fail(job, task, exc)
+        except Exception as exc:
+            self._fail(job, task, exc)
+
+        item.finished_at = _now()
+        job.processed += 1
+
+        if job.processed == job.total:
+            job.status = (
+                JobStatusEnum.COMPLETED if job.succeeded else JobStatusEnum.FAILED
+            )
+            job.finished_at = _now()
+            logger.info(
+                f"[JOBS] Trabajo {job.job_id} finalizado: "
+                f"{job.succeeded} correctos, {job.failed} con error"
+            )
+        return None
+
+    def _park(
+        self, job: BulkJob, task: _FileTask, exc: CircuitOpenError, park_for: float
+    ):
+        item = job.files[task.index]
+        item.status = FileStatusEnum.PARKED
+        item.error = _error_details(exc)
+        item.parked_until = _now() + timedelta(seconds=park_for)
+        logger.warning(
+            f"[JOBS] [{task.upload.filename}] {exc.dependency} no disponible, "
+            f"archivo aparcado {park_for:.1f}s en el trabajo {job.job_id}"
+        )
+
+    def _fail(self, job: BulkJob, task: _FileTask, exc: Exception):
+        logger.error(
+            f"[JOBS] [{task.upload.filename}] Error en el trabajo {job.job_id}: {exc}"
+        )
+        item = job.files[task.index]
+        item.status = FileStatusEnum.ERROR
+        item.error = _error_details(exc)
+        item.parked_until = None
+        job.failed += 1
+
+    def _purge_expired(self):
+        limit = _now() - timedelta(seconds=self.ttl)
+        expired = [
+            job_id
+            for job_id, job in self._jobs.items()
+            if job.finished_at and job.finished_at < limit
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+def _error_details(exc: Exception) -> dict:
+    return {
+        "type": type(exc).__name__,
+        "message": str(exc),
+        "status_code": getattr(exc, "status_code", 500),
+        "data": getattr(exc, "data", None),
+    }
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
@@ -0,0 +1,43 @@
+from enum import Enum
+from typing import Optional
+from datetime import datetime
+from pydantic import BaseModel
+
+
+class JobStatusEnum(str, Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class FileStatusEnum(str, Enum):
+    PENDING = "pending"
+    PROCESSING = "processing"
+    PARKED = "parked"
+    SUCCESS = "success"
+    ERROR = "error"
+
+
+class FileResult(BaseModel):
+    index: int
+    filename: str
+    status: FileStatusEnum = FileStatusEnum.PENDING
+    result: Optional[dict] = None
+    error: Optional[dict] = None
+    parked_until: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+class BulkJob(BaseModel):
+    job_id: str
+    recipient: str
+    status: JobStatusEnum = JobStatusEnum.PENDING
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    total: int
+    processed: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    files: list[FileResult]
@@ -0,0 +1,287 @@
+"""
+Construye, a partir del texto de una factura, un payload con la misma forma
+que la respuesta `verbose` de Taggun, para que `TaggunExtractor` y
+`TaxIdExtractor` lo procesen sin cambios.
+
+Solo se usa con texto fiable (capa de texto del PDF u OCR local): si los
+importes no cuadran, no se devuelve nada y la factura pasa por Taggun. Las
+líneas de producto solo se dan por buenas si su suma es la base imponible; si
+no, el payload va sin líneas y con `meta.line_items` a False, para que el ERP
+no dé de alta un producto inventado.
+"""
+
+import re
+import unicodedata
+from datetime import date
+
+MONTHS = {
+    "enero": 1,
+    "febrero": 2,
+    "marzo": 3,
+    "abril": 4,
+    "mayo": 5,
+    "junio": 6,
+    "julio": 7,
+    "agosto": 8,
+    "septiembre": 9,
+    "setiembre": 9,
+    "octubre": 10,
+    "noviembre": 11,
+    "diciembre": 12,
+}
+
+# Importes con dos decimales en formato español (1.234,56) o inglés (1,234.56).
+# Se excluyen porcentajes y fragmentos de fechas o identificadores.
+AMOUNT = re.compile(
+    r"(?<![\d.,])-?(?:\d{1,3}(?:\.\d{3})+|\d+),\d{2}(?![\d%]|[.,]\d|\s*%)"
+    r"|(?<![\d.,])-?(?:\d{1,3}(?:,\d{3})+|\d+)\.\d{2}(?![\d%]|[.,]\d|\s*%)"
+)
+
+AMOUNT_VALUE = rf"(?:{AMOUNT.pattern})"
+
+# El orden importa: las etiquetas más específicas primero
+AMOUNT_LABELS = re.compile(
+    r"(?P<base>base\s+imponible|importe\s+neto|subtotal|total\s+base|base\b)"
+    r"|(?P<tax>(?:cuota\s+|total\s+)?i\.?v\.?a\.?\b|impuestos?\b)"
+    r"|(?P<total>total(?:\s+(?:factura|a\s+pagar|importe|eur|euros))?\b|importe\s+total)"
+)
+
+DATE_PATTERNS = [
+    re.compile(r"(?<!\d)(?P<y>\d{4})-(?P<m>\d{1,2})-(?P<d>\d{1,2})(?!\d)"),
+    re.compile(
+        r"(?<!\d)(?P<d>\d{1,2})[/.\-](?P<m>\d{1,2})[/.\-](?P<y>\d{4}|\d{2})(?!\d)"
+    ),
+    re.compile(
+        r"(?<!\d)(?P<d>\d{1,2})\s+de\s+(?P<month>" + "|".join(MONTHS) + r")"
+        r"\s+(?:de\s+|del\s+)?(?P<y>\d{4})"
+    ),
+]
+
+# Solo se fía de un número con marca explícita: «nº/número factura»,
+# «factura nº/núm./#/:» o «invoice no./number/#/:». Sin ella, «Total factura
+# 121,00» o «Fecha factura 01/02/2024» parecerían números de factura
+_NUMBER_MARK = r"n(?:o|º|°|[uú]m(?:ero)?)\.?"
+INVOICE_NUMBER = re.compile(
+    rf"(?:\b{_NUMBER_MARK}\s*(?:de\s+)?factura\s*[:#]?"
+    rf"|\bfactura\s*(?:{_NUMBER_MARK}\s*[:#]?|[:#])"
+    r"|\binvoice\s*(?:no\.?|number|#|:)\s*[:#]?)"
+    r"\s*(?P<number>[a-z0-9][a-z0-9\-/_.]{2,})",
+    re.IGNORECASE,
+)
+# «Fecha factura: ...», «Total factura: ...»: la marca es de otro dato
+NOT_INVOICE_NUMBER_PREFIXES = ("fecha", "total", "importe", "base", "vencimiento")
+
+# Línea de detalle: [nº de línea] descripción, cantidad [x|uds], precio unitario
+# e importe, en ese orden y en la misma línea
+LINE_ITEM = re.compile(
+    r"^(?:\d{1,3}\s+)?(?P<name>.*?[^\W\d_].*?)\s+"
+    r"(?P<quantity>\d+(?:[.,]\d+)?)\s*(?:x|uds?\.?|u\.)?\s+"
+    rf"(?P<unit_price>{AMOUNT_VALUE})\s*(?:€|eur)?\s+"
+    rf"(?P<total>{AMOUNT_VALUE})\s*(?:€|eur)?$",
+    re.IGNORECASE,
+)
+
+LEGAL_FORM = re.compile(
+    r"\b(?:s\.?\s?l\.?\s?u?\.?|s\.?\s?a\.?\s?u?\.?|s\.?\s?l\.?\s?l\.?|s\.?\s?coop\.?|c\.?\s?b\.?)$",
+    re.IGNORECASE,
+)
+
+NON_NAME_WORDS = ("factura", "fecha", "cliente", "cif", "nif", "página", "pagina")
+
+AMOUNT_TOLERANCE = 0.02
+
+
+def build_invoice_payload(
+    text: str, engine: str, pages: int
+) -> tuple[dict | None, str]:
+    """
+    Devuelve el payload y, si no se pudo construir, el motivo. Exige fecha y
+    al menos dos de total, base imponible e IVA que cuadren entre sí.
+    """
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    folded = [fold_text(line) for line in lines]
+
+    amounts = find_amounts(folded)
+    totals = _reconcile(**amounts)
+    if totals is None:
+        return None, "importes no encontrados o incoherentes"
+
+    invoice_date = _find_date(folded)
+    if invoice_date is None:
+        return None, "fecha no encontrada"
+
+    total, untaxed, tax = totals
+    merchant = _find_merchant(lines)
+    items = find_line_items(lines, untaxed)
+    payload = {
+        "merchantName": {"data": merchant},
+        "date": {"data": f"{invoice_date.isoformat()}T00:00:00.000Z"},
+        "invoiceNumber": {"data": find_invoice_number(lines)},
+        "totalAmount": {"data": total},
+        "taxAmount": {"data": tax},
+        "paidAmount": {"data": untaxed},
+        "entities": {
+            "productLineItems": [_line_item(**item) for item in items],
+        },
+        "text": {"text": text},
+        "meta": {"engine": engine, "pages": pages, "line_items": bool(items)},
+    }
+    return payload, ""
+
+
+def find_line_items(lines: list[str], untaxed: float) -> list[dict]:
+    """
+    Líneas de detalle cuya cantidad × precio es su importe. Se devuelven solo
+    si suman la base imponible: si falta o sobra alguna, ninguna.
+    """
+    items = []
+    for line in lines:
+        # Las líneas del resumen («Base imponible», «IVA», «Total») no son detalle
+        if AMOUNT_LABELS.match(fold_text(line)):
+            continue
+        match = LINE_ITEM.match(line)
+        if not match:
+            continue
+        quantity = float(match.group("quantity").replace(",", "."))
+        unit_price = parse_amount(match.group("unit_price"))
+        total = parse_amount(match.group("total"))
+        if abs(quantity * unit_price - total) > AMOUNT_TOLERANCE:
+            continue
+        items.append(
+            {
+                "name": match.group("name").strip(),
+                "quantity": quantity,
+                "unit_price": unit_price,
+                "total": total,
+            }
+        )
+
+    # Cada importe de línea puede venir redondeado al céntimo
+    tolerance = max(AMOUNT_TOLERANCE, 0.01 * len(items))
+    if not items or abs(sum(item["total"] for item in items) - untaxed) > tolerance:
+        return []
+    return items
+
+
+def _line_item(name: str, quantity: float, unit_price: float, total: float) -> dict:
+    return {
+        "data": {
+            "name": {"data": name},
+            "quantity": {"data": quantity},
+            "unitPrice": {"data": unit_price},
+            "totalPrice": {"data": total},
+        }
+    }
+
+
+def parse_amount(value: str) -> float:
+    value = value.replace(" ", "")
+    decimal_sep = value[-3]
+    thousands_sep = "." if decimal_sep == "," else ","
+    return float(value.replace(thousands_sep, "").replace(decimal_sep, "."))
+
+
+def fold_text(line: str) -> str:
+    """Minúsculas y sin tildes, para comparar etiquetas."""
+    decomposed = unicodedata.normalize("NFKD", line.lower())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def find_amounts(lines: list[str]) -> dict[str, float | None]:
+    found: dict[str, list[float]] = {"total": [], "base": [], "tax": []}
+    for index, line in enumerate(lines):
+        labels = list(AMOUNT_LABELS.finditer(line))
+        for position, label in enumerate(labels):
+            end = labels[position + 1].start() if position + 1 < len(labels) else None
+            segment = line[label.end() : end]
+            values = AMOUNT.findall(segment)
+            if not values and end is None and index + 1 < len(lines):
+                # Etiqueta y valor en líneas distintas (columnas del PDF)
+                values = AMOUNT.findall(lines[index + 1])[:1]
+            if values:
+                found[label.lastgroup].append(parse_amount(values[-1]))
+
+    return {
+        # El total de la factura es el mayor; base e IVA, los del resumen final
+        "total": max(found["total"], default=None),
+        "base": found["base"][-1] if found["base"] else None,
+        "tax": found["tax"][-1] if found["tax"] else None,
+    }
+
+
+def _reconcile(
+    total: float | None, base: float | None, tax: float | None
+) -> tuple[float, float, float] | None:
+    if total is None or total <= 0:
+        return None
+    if base is not None and tax is not None:
+        if abs(base + tax - total) <= AMOUNT_TOLERANCE:
+            return total, base, tax
+        return None
+    if tax is not None and 0 <= tax < total:
+        return total, round(total - tax, 2), tax
+    if base is not None and 0 < base <= total:
+        return total, base, round(total - base, 2)
+    return None
+
+
+def _find_date(lines: list[str]) -> date | None:
+    """Prefiere la fecha de una línea con «fecha» que no sea de vencimiento."""
+    labelled, first = None, None
+    for line in lines:
+        for parsed in _dates_in(line):
+            first = first or parsed
+            if labelled is None and "fecha" in line and "venc" not in line:
+                labelled = parsed
+    return labelled or first
+
+
+def _dates_in(line: str):
+    for pattern in DATE_PATTERNS:
+        for match in pattern.finditer(line):
+            parts = match.groupdict()
+            month = MONTHS[parts["month"]] if parts.get("month") else int(parts["m"])
+            year = int(parts["y"])
+            if year < 100:
+                year += 2000
+            try:
+                yield date(year, month, int(parts["d"]))
+            except ValueError:
+                continue
+
+
+def find_invoice_number(lines: list[str]) -> str:
+    for line in lines:
+        for match in INVOICE_NUMBER.finditer(line):
+            previous = fold_text(line[: match.start()]).split()
+            if previous and previous[-1].strip(".:") in NOT_INVOICE_NUMBER_PREFIXES:
+                continue
+            number = match.group("number").rstrip(".")
+            if _is_invoice_number(number, line[match.end("number") :]):
+                return number
+    return ""
+
+
+def _is_invoice_number(number: str, rest: str) -> bool:
+    """Descarta fechas e importes («01/02/2024», «1.210» de «1.210,00»)."""
+    if not any(c.isdigit() for c in number):
+        return False
+    # El patrón corta el importe en la coma decimal: se mira el token entero
+    token = number + re.match(r"[\d.,]*", rest).group()
+    if AMOUNT.fullmatch(token) or re.fullmatch(r"\d{1,3}(?:\.\d{3})+", token):
+        return False
+    return not any(pattern.fullmatch(fold_text(number)) for pattern in DATE_PATTERNS)
+
+
+def _find_merchant(lines: list[str]) -> str:
+    """Primera línea con forma jurídica en la cabecera; si no, la primera con texto."""
+    header = lines[:15]
+    for line in header:
+        if LEGAL_FORM.search(line):
+            return line
+    for line in header:
+        folded = fold_text(line)
+        letters = sum(c.isalpha() for c in line)
+        if letters >= 3 and not any(word in folded for word in NON_NAME_WORDS):
+            return line
+    return ""
@@ -0,0 +1,128 @@
+"""
+Separa un PDF con varias facturas escaneadas juntas en un documento por
+factura, a partir de la capa de texto de cada página (PDF digital o escaneo
+con el OCR del escáner).
+
+Una página abre factura nueva cuando:
+- su paginación lo dice («Página 1 de 3»), o
+- trae un número de factura distinto del de la factura en curso (solo con
+  marca explícita, «Factura nº»/«Nº factura»/«Factura:», y nunca una fecha
+  o un importe: «Total factura 1.210,00» no es un número), o
+- a falta de esas marcas, coinciden al menos dos indicios: la página anterior
+  cerró con un total, la página tiene cabecera de factura y sus NIF/CIF no
+  coinciden con los de la factura en curso.
+
+Se ejecuta en un proceso aparte: no debe depender del estado de la app.
+"""
+
+import re
+from dataclasses import dataclass
+
+import pymupdf
+
+from app.services.local_ocr.payload import find_amounts, find_invoice_number, fold_text
+
+PAGINATION = re.compile(
+    r"\b(?:pagina|pag\.?|page|hoja)\s*(?P<page>\d{1,3})\s*(?:de|of|/)\s*(?P<total>\d{1,3})\b"
+)
+
+# CIF, NIF y NIE con prefijo de país opcional, una vez quitados puntos y guiones
+TAX_ID = re.compile(r"(?:ES)?([A-HJ-NP-SUVW]\d{7}[0-9A-J]|\d{8}[A-Z]|[XYZ]\d{7}[A-Z])")
+
+
+@dataclass(frozen=True)
+class PageMarkers:
+    chars: int
+    pagination: tuple[int, int] | None
+    invoice_number: str
+    tax_ids: frozenset[str]
+    has_total: bool
+
+
+def page_markers(text: str) -> PageMarkers:
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    folded = [fold_text(line) for line in lines]
+
+    pagination = None
+    for line in folded:
+        match = PAGINATION.search(line)
+        if match:
+            pagination = (int(match.group("page")), int(match.group("total")))
+            break
+
+    tokens = (re.sub(r"[.\-]", "", token) for token in text.upper().split())
+    tax_ids = {match.group(1) for match in map(TAX_ID.fullmatch, tokens) if match}
+    return PageMarkers(
+        chars=sum(1 for c in text if not c.isspace()),
+        pagination=pagination,
+        invoice_number=find_invoice_number(lines).upper(),
+        tax_ids=frozenset(tax_ids),
+        has_total=find_amounts(folded)["total"] is not None,
+    )
+
+
+def find_invoice_boundaries(pages: list[PageMarkers]) -> list[range]:
+    """Devuelve los rangos de páginas de cada factura, en orden."""
+    if not pages:
+        return []
+
+    starts = [0]
+    number, tax_ids = pages[0].invoice_number, set(pages[0].tax_ids)
+    for index in range(1, len(pages)):
+        page = pages[index]
+        if _starts_invoice(page, pages[index - 1], number, tax_ids):
+            starts.append(index)
+            number, tax_ids = page.invoice_number, set(page.tax_ids)
+        else:
+            number = number or page.invoice_number
+            tax_ids |= page.tax_ids
+
+    ends = starts[1:] + [len(pages)]
+    return [range(start, end) for start, end in zip(starts, ends)]
+
+
+def _starts_invoice(
+    page: PageMarkers, previous: PageMarkers, number: str, tax_ids: set[str]
+) -> bool:
+    if page.pagination is not None:
+        return page.pagination[0] == 1
+    if page.invoice_number and number:
+        return page.invoice_number != number
+
+    evidence = sum(
+        (
+            previous.has_total,
+            bool(page.invoice_number),
+            bool(page.tax_ids and tax_ids and not page.tax_ids & tax_ids),
+        )
+    )
+    return evidence >= 2
+
+
+def split_invoices(
+    file_bytes: bytes, min_page_chars: int = 50
+) -> list[tuple[range, bytes]]:
+    """
+    Devuelve un PDF por factura junto con su rango de páginas, o una lista
+    vacía si el documento tiene una sola factura o alguna página sin capa de
+    texto (un escaneo no se puede separar con fiabilidad).
+    Las páginas se copian tal cual, sin volver a codificar su contenido, y la
+    salida es determinista para que cada parte tenga un hash estable.
+    """
+    with pymupdf.open(stream=file_bytes, filetype="pdf") as doc:
+        if doc.page_count < 2:
+            return []
+        markers = [page_markers(page.get_text("text", sort=True)) for page in doc]
+        if any(marker.chars < min_page_chars for marker in markers):
+            return []
+
+        ranges = find_invoice_boundaries(markers)
+        if len(ranges) < 2:
+            return []
+
+        parts = []
+        for pages in ranges:
+            with pymupdf.open() as part:
+                part.insert_pdf(doc, from_page=pages.start, to_page=pages.stop - 1)
+                parts.append((pages, part.tobytes(garbage=1, no_new_id=True)))
+        return parts
@@ -0,0 +1,92 @@
+import asyncio
+import os
+import time
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from functools import partial
+from typing import AsyncIterator
+
+import pymupdf
+import pytesseract
+from PIL import Image, ImageOps
+
+ENGINE = "tesseract"
+
+
+@dataclass(frozen=True)
+class PageOcr:
+    page: int
+    text: str
+    render_seconds: float
+    ocr_seconds: float
+
+
+def page_count(path: str, file_type: str) -> int:
+    if file_type != "pdf":
+        return 1
+    with pymupdf.open(path) as doc:
+        return doc.page_count
+
+
+def ocr_page(
+    path: str, file_type: str, page: int, dpi: int, lang: str, timeout: float
+) -> PageOcr:
+    """
+    Renderiza una sola página y la pasa por Tesseract. Se ejecuta en un
+    proceso del pool: lee el archivo de disco para no copiar el documento
+    entero a cada proceso, y solo mantiene en memoria el bitmap de su página.
+    """
+    # Cada proceso ya es una unidad de paralelismo: un hilo por Tesseract
+    os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+    start = time.perf_counter()
+    if file_type == "pdf":
+        with pymupdf.open(path) as doc:
+            pixmap = doc.load_page(page).get_pixmap(dpi=dpi, colorspace=pymupdf.csGRAY)
+        image = Image.frombytes("L", (pixmap.width, pixmap.height), pixmap.samples)
+        del pixmap
+    else:
+        with Image.open(path) as original:
+            image = ImageOps.exif_transpose(original).convert("L")
+    rendered = time.perf_counter()
+
+    text = pytesseract.image_to_string(image, lang=lang, timeout=timeout)
+    return PageOcr(
+        page=page,
+        text=text,
+        render_seconds=rendered - start,
+        ocr_seconds=time.perf_counter() - rendered,
+    )
+
+
+async def stream_pages(
+    executor: Executor,
+    path: str,
+    file_type: str,
+    pages: int,
+    dpi: int = 300,
+    lang: str = "spa",
+    timeout: float = 60,
+    max_in_flight: int = 2,
+) -> AsyncIterator[PageOcr]:
+    """
+    OCR página a página en el pool de procesos. Como mucho `max_in_flight`
+    páginas se renderizan a la vez, así que la memoria no crece con el número
+    de páginas. Los resultados se entregan en orden de página en cuanto están.
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(max_in_flight)
+    work = partial(ocr_page, path, file_type, dpi=dpi, lang=lang, timeout=timeout)
+
+    async def run(page: int) -> PageOcr:
+        async with semaphore:
+            return await loop.run_in_executor(executor, partial(work, page=page))
+
+    tasks = [asyncio.create_task(run(page)) for page in range(pages)]
+    try:
+        for task in tasks:
+            yield await task
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
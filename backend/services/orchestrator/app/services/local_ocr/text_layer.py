@@ -0,0 +1,31 @@
+import pymupdf
+
+from app.services.local_ocr.payload import build_invoice_payload
+
+ENGINE = "pdf_text_layer"
+
+
+def extract_text_layer_payload(
+    file_bytes: bytes, min_chars: int = 100
+) -> tuple[dict | None, str]:
+    """
+    Lee la capa de texto de un PDF generado digitalmente y la convierte en un
+    payload con forma de Taggun. Devuelve `(None, motivo)` si el PDF es un
+    escaneo sin texto o si el texto no basta para extraer la factura.
+    Se ejecuta en un proceso aparte: no debe depender del estado de la app.
+    """
+    with pymupdf.open(stream=file_bytes, filetype="pdf") as doc:
+        # sort=True ordena los bloques por posición (arriba-abajo, izq-der)
+        pages = [page.get_text("text", sort=True) for page in doc]
+
+    text = "\n".join(pages)
+    visible = [c for c in text if not c.isspace()]
+    if len(visible) < min_chars:
+        return None, "sin capa de texto"
+
+    # Fuentes sin tabla ToUnicode producen caracteres de reemplazo o de control
+    unreadable = sum(1 for c in visible if c == "�" or not c.isprintable())
+    if unreadable / len(visible) > 0.05:
+        return None, "capa de texto ilegible"
+
+    return build_invoice_payload(text, engine=ENGINE, pages=len(pages))
@@ -34,6 +34,16 @@ class OdooTaxIdNotFound(OdooServiceError):
         super().__init__(message=message, data=data)
 
 
+class OdooLineItemsMissingError(CustomAppException):
+    def __init__(
+        self,
+        message="La factura se leyó sin líneas de producto (OCR de respaldo) y Odoo "
+        "necesita una por producto: reinténtelo más tarde",
+        data=None,
+    ):
+        super().__init__(message=message, data=data, status_code=503)
+
+
 class OdooIncompleteDataError(OdooServiceError):
     def __init__(
         self,
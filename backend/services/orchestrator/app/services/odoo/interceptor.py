@@ -4,7 +4,9 @@ import traceback
 from fastapi import HTTPException
 import httpx
 
+from app.core.circuit_breaker import circuit_breaker, raise_for_outage
 from app.core.logging import logger
+from app.core.metrics import observe_dependency
 from app.services.odoo.exceptions import (
     OdooConnectionError,
     OdooTimeoutError,
@@ -13,10 +15,21 @@ from app.services.odoo.exceptions import (
 
 
 def error_interceptor(func):
+    # El circuito envuelve al interceptor: ve los errores de httpx encadenados
+    # (los adaptadores devuelven la respuesta sin leer). Hay uno por empresa:
+    # el ERP caído o mal configurado de una no corta el servicio a las demás
+    @circuit_breaker(
+        "odoo", tenant=lambda adapter, *args, **kwargs: adapter.company_vat
+    )
     @functools.wraps(func)
     async def wrapper(*args, **kwargs):
         try:
-            response = await func(*args, **kwargs)
+            with observe_dependency("odoo", func.__name__):
+                response = await func(*args, **kwargs)
+                # Solo un 5xx sin error estructurado cuenta como caída; los
+                # demás siguen al tratamiento de `error_type` de más abajo
+                if isinstance(response, httpx.Response):
+                    response = _read_body(response)
 
             if isinstance(response, list):
                 return response
@@ -64,3 +77,20 @@ def error_interceptor(func):
             raise OdooUnexpectedError(message=str(e))
 
     return wrapper
+
+
+def _read_body(response: httpx.Response):
+    try:
+        body = response.json()
+    except ValueError:
+        body = None
+    raise_for_outage(response, body)
+    if body is None:
+        # Un cuerpo que no es JSON sin ser una caída es un error inesperado
+        return response.json()
+    if response.is_error and isinstance(body, dict):
+        # Se conserva el mensaje del error (p. ej. el `detail` de FastAPI) y,
+        # si el cuerpo no lo trae, el código de la respuesta
+        body.setdefault("error_type", "http_error")
+        body.setdefault("status_code", response.status_code)
+    return body
@@ -2,8 +2,9 @@ from fastapi import UploadFile
 from app.core.settings import settings
 from app.core.client_provider import ProviderConfig
 from app.core.patterns.adapter.base import get_provider
-from app.core.schemas.enums import ServicesEnum
-from app.services.odoo.exceptions import OdooTaxIdNotFound
+from app.core.lifespan import get_http_client
+from app.core.schemas.enums import DownstreamEnum, ServicesEnum
+from app.services.odoo.exceptions import OdooLineItemsMissingError, OdooTaxIdNotFound
 from app.services.odoo.secrets import SecretsServiceOdoo
 from app.services.openai.client import OpenAIService
 from app.services.taggun.schemas.taggun_models import TaggunExtractedInvoice
@@ -24,8 +25,14 @@ async def odoo_process(
     taggun_data: TaggunExtractedInvoice,
     company_vat: str,
 ):
+    # Sin las líneas reales no se crea ningún producto (ni uno inventado)
+    if not taggun_data.line_items_complete:
+        raise OdooLineItemsMissingError()
+
     config = ProviderConfig(server_url=settings.URL_OPENAPI)
-    openai_service = OpenAIService(config=config)
+    openai_service = OpenAIService(
+        config=config, client=get_http_client(DownstreamEnum.OPENAI)
+    )
 
     odoo_provider = get_provider(
         service=ServicesEnum.ODOO,
@@ -91,3 +98,10 @@ async def odoo_process(
         file=file,
         file_content=file_content,
     )
+
+    return {
+        "processor": "ODOO",
+        "version": "V16",
+        "partner_id": partner_id,
+        "invoice_id": invoice_id,
+    }
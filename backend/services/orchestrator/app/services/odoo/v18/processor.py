@@ -1,7 +1,9 @@
 from app.core.settings import settings
 from app.core.client_provider import ProviderConfig
 from app.core.patterns.adapter.base import get_provider
-from app.core.schemas.enums import ServicesEnum
+from app.services.odoo.exceptions import OdooLineItemsMissingError
+from app.core.lifespan import get_http_client
+from app.core.schemas.enums import DownstreamEnum, ServicesEnum
 from app.services.odoo.secrets import SecretsServiceOdoo
 from app.services.openai.client import OpenAIService
 from app.services.taggun.schemas.taggun_models import TaggunExtractedInvoice
@@ -19,13 +21,19 @@ async def odoo_process(
     taggun_data: TaggunExtractedInvoice,
     company_vat: str,
 ):
+    # Sin las líneas reales no se crea ningún producto (ni uno inventado)
+    if not taggun_data.line_items_complete:
+        raise OdooLineItemsMissingError()
+
     odoo_provider = get_provider(
         service=ServicesEnum.ODOO,
         company_vat=company_vat,
         version="v18",
     )
     config = ProviderConfig(server_url=settings.URL_OPENAPI)
-    openai_service = OpenAIService(config=config)
+    openai_service = OpenAIService(
+        config=config, client=get_http_client(DownstreamEnum.OPENAI)
+    )
 
     logger.debug("Proceso iniciado en ODOO")
 
@@ -60,9 +68,16 @@ async def odoo_process(
         tax_id=tax_id,
     )
 
-    await get_or_create_invoice(
+    invoice_id = await get_or_create_invoice(
         taggun_data=taggun_data,
         odoo_provider=odoo_provider,
         product_ids=product_ids,
         partner_id=partner_id,
     )
+
+    return {
+        "processor": "ODOO",
+        "version": "V18",
+        "partner_id": partner_id,
+        "invoice_id": invoice_id,
+    }
@@ -3,10 +3,11 @@ import json
 
 from app.core.client_provider import ProviderConfig
 from app.services.openai.schemas.account_category import AccountCategory
-from app.core.settings import settings
 
 from exponential_core.exceptions import CustomAppException
 from app.core.logging import logger
+from app.core.circuit_breaker import circuit_breaker
+from app.core.metrics import track_dependency
 from app.services.openai.schemas.classification_tax_request import (
     ClasificacionRequest,
     TaxIdResponseSchema,
@@ -15,24 +16,20 @@ from app.services.openai.schemas.search_cif import PartnerRequest
 
 
 class OpenAIService:
-    def __init__(self, config: ProviderConfig):
+    def __init__(self, config: ProviderConfig, client: httpx.AsyncClient):
         self.path = config.path
-        self.timeout = httpx.Timeout(
-            connect=settings.HTTP_TIMEOUT_CONNECT,
-            read=settings.HTTP_TIMEOUT_READ,
-            write=settings.HTTP_TIMEOUT_WRITE,
-            pool=settings.HTTP_TIMEOUT_POOL,
-        )
+        self.client = client
 
+    @circuit_breaker("openai")
+    @track_dependency("openai")
     async def classify_expense(self, text: str, accounts: str) -> AccountCategory:
         url = f"{self.path}/classify-expense"
         logger.debug(f"Clasificando en OpenAI: {url}")
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    url,
-                    json={"text": text, "chart_of_accounts": accounts},
-                )
+            response = await self.client.post(
+                url,
+                json={"text": text, "chart_of_accounts": accounts},
+            )
             response.raise_for_status()
             return AccountCategory(**response.json())
 
@@ -49,6 +46,8 @@ class OpenAIService:
                 f"Error inesperado al clasificar con OpenAI: {exc}"
             )
 
+    @circuit_breaker("openai")
+    @track_dependency("openai")
     async def classify_odoo_tax_id(
         self, payload: ClasificacionRequest
     ) -> TaxIdResponseSchema:
@@ -56,10 +55,9 @@ class OpenAIService:
         logger.debug(f"Clasificando tax id en OpenAI: {url}")
 
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    url=url, json=payload.model_dump(mode="json")
-                )
+            response = await self.client.post(
+                url=url, json=payload.model_dump(mode="json")
+            )
             response.raise_for_status()
             return response.json()
 
@@ -76,6 +74,8 @@ class OpenAIService:
                 f"Error inesperado al clasificar con OpenAI: {exc}"
             )
 
+    @circuit_breaker("openai")
+    @track_dependency("openai")
     async def search_cif_by_partner(self, partner_name: str) -> dict:
         """
         Llama al endpoint de OpenAI para buscar el CIF de una empresa.
@@ -85,8 +85,7 @@ class OpenAIService:
         logger.debug(f"Buscando CIF en OpenAI: {url} con partner_name={partner_name}")
 
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(url, json={"partner_name": partner_name})
+            response = await self.client.post(url, json={"partner_name": partner_name})
 
             response.raise_for_status()
 
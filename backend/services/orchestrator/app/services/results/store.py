@@ -0,0 +1,60 @@
+import json
+import time
+
+from app.core.sqlite import SQLiteStore
+
+
+class ScanResultStore(SQLiteStore):
+    """
+    Resultados de escaneos completados, indexados por el SHA-256 del archivo
+    y el destinatario. Permite responder al instante a reenvíos idénticos
+    sin volver a pasar por OCR, OpenAI ni el ERP.
+    """
+
+    schema = """
+        CREATE TABLE IF NOT EXISTS scan_results (
+            file_hash TEXT NOT NULL,
+            recipient TEXT NOT NULL,
+            result TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            PRIMARY KEY (file_hash, recipient)
+        );
+        CREATE INDEX IF NOT EXISTS idx_scan_results_created
+            ON scan_results (created_at);
+    """
+
+    def __init__(self, path, ttl: int):
+        super().__init__(path)
+        self.ttl = ttl
+
+    async def open(self):
+        await super().open()
+        await self._purge_expired()
+        return self
+
+    async def get(self, file_hash: str, recipient: str) -> dict | None:
+        row = await self.fetchone(
+            "SELECT result FROM scan_results "
+            "WHERE file_hash = ? AND recipient = ? AND created_at >= ?",
+            (file_hash, recipient.lower(), time.time() - self.ttl),
+        )
+        return json.loads(row["result"]) if row else None
+
+    async def save(self, file_hash: str, recipient: str, result: dict):
+        await self.execute(
+            "INSERT OR REPLACE INTO scan_results "
+            "(file_hash, recipient, result, created_at) VALUES (?, ?, ?, ?)",
+            (
+                file_hash,
+                recipient.lower(),
+                json.dumps(result, default=str),
+                time.time(),
+            ),
+        )
+        await self._purge_expired()
+
+    async def _purge_expired(self):
+        await self.execute(
+            "DELETE FROM scan_results WHERE created_at < ?",
+            (time.time() - self.ttl,),
+        )
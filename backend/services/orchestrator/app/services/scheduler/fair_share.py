@@ -0,0 +1,183 @@
+import asyncio
+import itertools
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+
+from app.core.metrics import (
+    SCHEDULER_RUNNING,
+    SCHEDULER_WAIT_SECONDS,
+    SCHEDULER_WAITING,
+)
+
+
+@dataclass
+class _Waiter:
+    tenant: str
+    interactive: bool
+    tag: float
+    seq: int
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+    @property
+    def kind(self) -> str:
+        return "interactive" if self.interactive else "bulk"
+
+
+@dataclass
+class _Tenant:
+    weight: float
+    running: int = 0
+    last_tag: float = 0.0
+    interactive: deque = field(default_factory=deque)
+    bulk: deque = field(default_factory=deque)
+
+    def queue(self, interactive: bool) -> deque:
+        return self.interactive if interactive else self.bulk
+
+    @property
+    def idle(self) -> bool:
+        return not (self.running or self.interactive or self.bulk)
+
+
+class FairShareScheduler:
+    """
+    Reparte los huecos de procesamiento entre clientes (tenants) con
+    weighted fair queuing:
+    - Cada petición recibe una marca de tiempo virtual según el peso de su
+      tenant; se atiende siempre la marca más baja entre los tenants que no
+      han alcanzado su límite de concurrencia.
+    - Las peticiones interactivas (un solo archivo) tienen prioridad y
+      disponen de `interactive_reserved` huecos que /bulk no puede ocupar.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        interactive_reserved: int,
+        tenant_max_concurrency: int,
+        weights: dict[str, float] | None = None,
+    ):
+        if not 0 <= interactive_reserved < max_concurrency:
+            raise ValueError(
+                "[SCHEDULER] interactive_reserved debe ser menor que max_concurrency"
+            )
+        self.max_concurrency = max_concurrency
+        self.interactive_reserved = interactive_reserved
+        self.tenant_max_concurrency = tenant_max_concurrency
+        self.weights = {k.lower(): v for k, v in (weights or {}).items()}
+        self._tenants: dict[str, _Tenant] = {}
+        self._running = 0
+        self._bulk_running = 0
+        self._virtual_time = 0.0
+        self._seq = itertools.count()
+
+    @asynccontextmanager
+    async def slot(self, tenant: str, interactive: bool = False):
+        """Espera turno para `tenant` y libera el hueco al salir."""
+        tenant = tenant.lower()
+        await self._acquire(tenant, interactive)
+        try:
+            yield
+        finally:
+            self._release(tenant, interactive)
+
+    async def _acquire(self, tenant: str, interactive: bool):
+        state = self._tenants.get(tenant)
+        if state is None:
+            state = self._tenants[tenant] = _Tenant(
+                weight=self.weights.get(tenant, 1.0)
+            )
+
+        start = max(self._virtual_time, state.last_tag)
+        state.last_tag = start + 1.0 / state.weight
+        waiter = _Waiter(
+            tenant=tenant,
+            interactive=interactive,
+            tag=state.last_tag,
+            seq=next(self._seq),
+            future=asyncio.get_running_loop().create_future(),
+        )
+        state.queue(interactive).append(waiter)
+        SCHEDULER_WAITING.labels(waiter.kind).inc()
+        self._dispatch()
+
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # El hueco se concedió justo antes de la cancelación
+                self._release(tenant, interactive)
+            else:
+                # `_dispatch` puede haberla descartado ya al verla cancelada
+                queue = state.queue(interactive)
+                if any(queued is waiter for queued in queue):
+                    queue.remove(waiter)
+                    SCHEDULER_WAITING.labels(waiter.kind).dec()
+                self._forget_if_idle(tenant)
+            raise
+
+        SCHEDULER_WAIT_SECONDS.labels(waiter.kind).observe(
+            time.perf_counter() - waiter.enqueued_at
+        )
+
+    def _release(self, tenant: str, interactive: bool):
+        state = self._tenants[tenant]
+        state.running -= 1
+        self._running -= 1
+        if not interactive:
+            self._bulk_running -= 1
+        SCHEDULER_RUNNING.labels("interactive" if interactive else "bulk").dec()
+        self._forget_if_idle(tenant)
+        self._dispatch()
+
+    def _dispatch(self):
+        while self._running < self.max_concurrency:
+            waiter = self._next_waiter()
+            if waiter is None:
+                return
+
+            state = self._tenants[waiter.tenant]
+            state.queue(waiter.interactive).popleft()
+            SCHEDULER_WAITING.labels(waiter.kind).dec()
+            if waiter.future.done():
+                # Cancelada mientras esperaba: nadie liberaría el hueco
+                self._forget_if_idle(waiter.tenant)
+                continue
+
+            state.running += 1
+            self._running += 1
+            if not waiter.interactive:
+                self._bulk_running += 1
+            self._virtual_time = max(self._virtual_time, waiter.tag)
+
+            SCHEDULER_RUNNING.labels(waiter.kind).inc()
+            waiter.future.set_result(None)
+
+    def _next_waiter(self) -> _Waiter | None:
+        bulk_allowed = (
+            self._bulk_running < self.max_concurrency - self.interactive_reserved
+        )
+        best: _Waiter | None = None
+        for state in self._tenants.values():
+            if state.running >= self.tenant_max_concurrency:
+                continue
+            heads = [state.interactive[0]] if state.interactive else []
+            if bulk_allowed and state.bulk:
+                heads.append(state.bulk[0])
+            for waiter in heads:
+                if best is None or _priority(waiter) < _priority(best):
+                    best = waiter
+        return best
+
+    def _forget_if_idle(self, tenant: str):
+        state = self._tenants.get(tenant)
+        if state is not None and state.idle:
+            del self._tenants[tenant]
+
+
+def _priority(waiter: _Waiter) -> tuple:
+    # Las interactivas primero; dentro de cada clase, la marca virtual más baja
+    return (not waiter.interactive, waiter.tag, waiter.seq)
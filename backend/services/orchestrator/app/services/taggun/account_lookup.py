@@ -1,22 +1,111 @@
+import asyncio
+import time
+from typing import Iterable
+
 from app.services.admin.client import AdminService
+from app.services.admin.schemas import IdentifyAccountsResponse
 from app.services.taggun.exceptions import AccountNotFoundError, AdminServiceError
 from app.core.client_provider import ProviderConfig
+from app.core.exceptions import CircuitOpenError, UnknownEmailError
+from app.core.metrics import ACCOUNTS_CACHE_INVALIDATIONS, ACCOUNTS_CACHE_LOOKUPS
 from app.core.settings import settings
+from app.core.lifespan import get_http_client
+from app.core.schemas.enums import DownstreamEnum
 from exponential_core.exceptions import CustomAppException
 from app.core.logging import logger
 
+# Cuentas por email: cambian pocas veces al mes y se consultan en cada
+# escaneo. None recuerda que el email no tiene cuentas (caché negativa)
+_accounts: dict[str, tuple[float, IdentifyAccountsResponse | None]] = {}
+# Consultas a Admin en curso: los escaneos simultáneos del mismo email
+# (p. ej. un /bulk) comparten la misma
+_fetching: dict[str, asyncio.Task] = {}
+# Cambia con cada invalidación: una consulta que empezó antes no se guarda
+_generation = 0
+
+
+async def get_accounts_by_email(email: str) -> IdentifyAccountsResponse:
+    key = _cache_key(email)
+    cached = _accounts.get(key)
+    if cached is not None and time.monotonic() < cached[0]:
+        response = cached[1]
+        ACCOUNTS_CACHE_LOOKUPS.labels("hit" if response else "negative_hit").inc()
+    else:
+        ACCOUNTS_CACHE_LOOKUPS.labels("miss").inc()
+        task = _fetching.get(key)
+        if task is None:
+            task = asyncio.create_task(_fetch_accounts(email, key))
+            _fetching[key] = task
+            task.add_done_callback(lambda done: _fetch_done(key, done))
+        response = await asyncio.shield(task)
+
+    if response is None:
+        raise AccountNotFoundError(data={"email": email})
+    return response
+
 
-async def get_accounts_by_email(email: str):
-    adm_service = AdminService(config=ProviderConfig(server_url=settings.URL_ADMIN))
+def invalidate_accounts(emails: Iterable[str] | None = None) -> int:
+    """
+    Olvida las cuentas de `emails` (de todos si es None) y devuelve cuántos
+    estaban en caché. Admin lo pide cuando se crean, editan o borran cuentas.
+    """
+    global _generation
+    _generation += 1
+    if emails is None:
+        count = len(_accounts)
+        _accounts.clear()
+        _fetching.clear()
+    else:
+        count = 0
+        for key in {_cache_key(email) for email in emails}:
+            count += _accounts.pop(key, None) is not None
+            _fetching.pop(key, None)
+    ACCOUNTS_CACHE_INVALIDATIONS.inc(count)
+    logger.info(f"[ACCOUNTS] Caché de cuentas invalidada ({count} emails)")
+    return count
+
+
+def _cache_key(email: str) -> str:
+    # Admin avisa con el email guardado en Django, que puede no coincidir en
+    # mayúsculas o espacios con el que llega en el escaneo
+    return email.strip().casefold()
+
+
+async def _fetch_accounts(email: str, key: str) -> IdentifyAccountsResponse | None:
+    generation = _generation
+    adm_service = AdminService(
+        config=ProviderConfig(server_url=settings.URL_ADMIN),
+        client=get_http_client(DownstreamEnum.ADMIN),
+    )
     try:
         logger.debug(f"Buscando el email : {email}")
         response = await adm_service.identify_accounts(email=email)
         logger.debug(response.model_dump(mode="json", exclude_none=True))
 
+    except UnknownEmailError:
+        response = None
+    except CircuitOpenError:
+        raise
     except CustomAppException as e:
         raise AdminServiceError(message=str(e))
 
-    if not response.accounts:
-        raise AccountNotFoundError(data={"email": email})
+    if response is not None and not response.accounts:
+        response = None
 
+    ttl = (
+        settings.ACCOUNTS_CACHE_TTL
+        if response is not None
+        else settings.ACCOUNTS_NEGATIVE_CACHE_TTL
+    )
+    if ttl > 0 and generation == _generation:
+        _accounts[key] = (time.monotonic() + ttl, response)
     return response
+
+
+def _fetch_done(key: str, task: asyncio.Task):
+    # Una invalidación puede haber lanzado ya otra consulta para el email
+    if _fetching.get(key) is task:
+        del _fetching[key]
+    # Evita el aviso de excepción no recuperada si nadie esperaba ya la consulta
+    if not task.cancelled():
+        task.exception()
@@ -0,0 +1,132 @@
+import asyncio
+import json
+import time
+import zlib
+
+from app.core.logging import logger
+from app.core.metrics import OCR_CACHE_BYTES, OCR_CACHE_EVICTIONS, OCR_CACHE_LOOKUPS
+from app.core.sqlite import SQLiteStore
+
+
+class OcrPayloadCache(SQLiteStore):
+    """
+    Respuestas en bruto de Taggun indexadas por el SHA-256 del archivo.
+    Cuando un escaneo falla después del OCR (ERP, almacenamiento...) y el
+    usuario reenvía la factura, se reutiliza el payload sin volver a pagar
+    ni esperar a Taggun.
+    - Las entradas caducan tras `ttl` segundos.
+    - Los payloads se guardan comprimidos; si el total supera `max_bytes` se
+      eliminan los menos usados recientemente hasta bajar del 90 %.
+    """
+
+    schema = """
+        CREATE TABLE IF NOT EXISTS ocr_payloads (
+            file_hash TEXT PRIMARY KEY,
+            payload BLOB NOT NULL,
+            size INTEGER NOT NULL,
+            created_at REAL NOT NULL,
+            accessed_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_ocr_payloads_accessed
+            ON ocr_payloads (accessed_at);
+    """
+
+    def __init__(self, path, ttl: int, max_bytes: int):
+        super().__init__(path)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._size = 0
+
+    async def open(self):
+        await super().open()
+        await self._purge_expired()
+        await self._refresh_size()
+        return self
+
+    async def get(self, file_hash: str) -> dict | None:
+        row = await self.fetchone(
+            "UPDATE ocr_payloads SET accessed_at = ? "
+            "WHERE file_hash = ? AND created_at >= ? RETURNING payload",
+            (time.time(), file_hash, time.time() - self.ttl),
+        )
+        if row is None:
+            self.misses += 1
+            OCR_CACHE_LOOKUPS.labels("miss").inc()
+            return None
+
+        self.hits += 1
+        OCR_CACHE_LOOKUPS.labels("hit").inc()
+        return await asyncio.to_thread(_decode, row["payload"])
+
+    async def save(self, file_hash: str, payload: dict):
+        blob = await asyncio.to_thread(_encode, payload)
+        now = time.time()
+        await self.execute(
+            "INSERT OR REPLACE INTO ocr_payloads "
+            "(file_hash, payload, size, created_at, accessed_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (file_hash, blob, len(blob), now, now),
+        )
+        await self._refresh_size()
+        if self._size > self.max_bytes:
+            await self._purge_expired()
+            await self._evict()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "size_bytes": self._size,
+        }
+
+    async def _evict(self):
+        """Elimina las entradas menos usadas hasta quedar en el 90 % del límite."""
+        excess = self._size - int(self.max_bytes * 0.9)
+        rows = await self.fetchall(
+            "SELECT file_hash, size FROM ocr_payloads ORDER BY accessed_at"
+        )
+        victims = []
+        for row in rows:
+            if excess <= 0:
+                break
+            victims.append(row["file_hash"])
+            excess -= row["size"]
+
+        for start in range(0, len(victims), 500):
+            chunk = victims[start : start + 500]
+            await self.execute(
+                "DELETE FROM ocr_payloads WHERE file_hash IN "
+                f"({', '.join('?' * len(chunk))})",
+                tuple(chunk),
+            )
+        OCR_CACHE_EVICTIONS.inc(len(victims))
+        await self._refresh_size()
+        logger.info(
+            f"[OCR_CACHE] {len(victims)} payloads eliminados, "
+            f"{self._size / 2**20:.1f} MB en uso"
+        )
+
+    async def _purge_expired(self):
+        await self.execute(
+            "DELETE FROM ocr_payloads WHERE created_at < ?",
+            (time.time() - self.ttl,),
+        )
+
+    async def _refresh_size(self):
+        row = await self.fetchone(
+            "SELECT COALESCE(SUM(size), 0) AS total FROM ocr_payloads"
+        )
+        self._size = row["total"]
+        OCR_CACHE_BYTES.set(self._size)
+
+
+def _encode(payload: dict) -> bytes:
+    return zlib.compress(json.dumps(payload, separators=(",", ":")).encode())
+
+
+def _decode(blob: bytes) -> dict:
+    return json.loads(zlib.decompress(blob))
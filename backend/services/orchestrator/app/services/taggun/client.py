@@ -5,26 +5,38 @@ from app.core.settings import settings
 from app.core.client_provider import ProviderConfig
 from exponential_core.exceptions.base import CustomAppException
 from app.core.logging import logger
+from app.core.circuit_breaker import CircuitBreaker, get_circuit_breaker
+from app.core.metrics import TAGGUN_PAYLOAD_BYTES, observe_dependency
+from app.core.rate_limit import AdaptiveRateLimiter, parse_retry_after
 
 
 class TaggunService:
     """
     Cliente persistente para interactuar con Taggun.
-    - Controla concurrencia con Semaphore.
-    - Aplica throttle entre requests para evitar saturar la API.
-    - Implementa reintentos con backoff exponencial en caso de 429.
+    - Controla tasa y concurrencia con un limitador adaptativo (token bucket
+      + AIMD) que se ajusta a la capacidad real de Taggun.
+    - Reintenta los 429, 5xx y timeouts respetando `Retry-After` o, si no
+      viene, con backoff exponencial con jitter.
+    - Los 5xx, timeouts y errores de conexión alimentan el circuito de
+      Taggun: abierto, el OCR falla al instante y entra el proveedor local.
     """
 
     def __init__(
         self,
         config: ProviderConfig,
-        max_concurrent_requests: int = 5,
-        min_delay: float = 0.3,
+        limiter: AdaptiveRateLimiter | None = None,
+        breaker: CircuitBreaker | None = None,
+        max_attempts: int = 4,
+        retry_base_delay: float = 1.0,
+        retry_max_delay: float = 30.0,
     ):
         self.path = config.path
         self.api_key = config.api_key
-        self.semaphore = asyncio.Semaphore(max_concurrent_requests)
-        self.min_delay = min_delay  # tiempo mínimo entre requests
+        self.limiter = limiter or AdaptiveRateLimiter(name="taggun")
+        self.breaker = breaker or get_circuit_breaker("taggun")
+        self.max_attempts = max_attempts
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
         self.client = httpx.AsyncClient(
             timeout=httpx.Timeout(
                 connect=settings.HTTP_TIMEOUT_CONNECT,
@@ -33,21 +45,11 @@ class TaggunService:
                 pool=settings.HTTP_TIMEOUT_POOL,
             )
         )
-        self._last_request = 0.0
 
     async def close(self):
         """Cierra el cliente HTTP cuando se apaga la aplicación."""
         await self.client.aclose()
 
-    async def _throttle(self):
-        """Evita enviar requests demasiado rápido (respeta min_delay)."""
-        now = asyncio.get_event_loop().time()
-        wait = self.min_delay - (now - self._last_request)
-        if wait > 0:
-            logger.debug(f"[TAGGUN] Aplicando throttle, esperando {wait:.2f}s")
-            await asyncio.sleep(wait)
-        self._last_request = asyncio.get_event_loop().time()
-
     async def _send_request(
         self, file_name: str, file_content: bytes, content_type: str
     ):
@@ -60,40 +62,71 @@ class TaggunService:
             "incognito": (None, "false"),
         }
 
-        response = await self.client.post(
-            url=self.path,
-            headers={
-                "accept": "application/json",
-                "apikey": self.api_key,
-            },
-            files=files,
-        )
-        response.raise_for_status()
+        with observe_dependency("taggun", "ocr"):
+            response = await self.client.post(
+                url=self.path,
+                headers={
+                    "accept": "application/json",
+                    "apikey": self.api_key,
+                },
+                files=files,
+            )
+            response.raise_for_status()
+        TAGGUN_PAYLOAD_BYTES.observe(len(response.content))
         return response.json()
 
-    async def _retry_with_backoff(self, func, *args, retries=3, base_delay=1.0):
-        """Reintenta con backoff exponencial si hay error 429."""
-        for attempt in range(retries):
-            try:
-                return await func(*args)
-            except httpx.HTTPStatusError as e:
-                if e.response.status_code == 429 and attempt < retries - 1:
-                    delay = base_delay * (2**attempt) + random.uniform(0, 0.5)
-                    logger.warning(
-                        f"[TAGGUN] 429 Rate Limit - Reintentando en {delay:.2f}s (intento {attempt+1}/{retries})"
-                    )
-                    await asyncio.sleep(delay)
-                else:
-                    raise CustomAppException(
-                        f"Error HTTP al comunicarse con Taggun ({e.response.status_code}): {e.response.text}"
-                    )
-            except Exception as e:
-                raise CustomAppException(f"Error inesperado en ocr_taggun: {str(e)}")
+    def _backoff(self, attempt: int, retry_after: float | None) -> float:
+        if retry_after is not None:
+            return min(retry_after, self.retry_max_delay)
+        delay = min(self.retry_base_delay * 2 ** (attempt - 1), self.retry_max_delay)
+        return random.uniform(delay / 2, delay)
 
     async def ocr_taggun(self, file_name: str, file_content: bytes, content_type: str):
-        """Envía un archivo a Taggun aplicando control de concurrencia, throttle y reintentos."""
-        async with self.semaphore:
-            await self._throttle()  # ✅ asegura espaciar requests
-            return await self._retry_with_backoff(
-                self._send_request, file_name, file_content, content_type
+        """
+        Envía un archivo a Taggun a través del circuito y del limitador, con
+        reintentos. Con el circuito abierto falla al instante.
+        """
+        for attempt in range(1, self.max_attempts + 1):
+            retry_after = None
+            with self.breaker.guard() as call:
+                async with self.limiter.slot() as permit:
+                    try:
+                        return await self._send_request(
+                            file_name, file_content, content_type
+                        )
+                    except httpx.HTTPStatusError as e:
+                        status = e.response.status_code
+                        if status != 429 and status < 500:
+                            raise CustomAppException(
+                                f"Error HTTP al comunicarse con Taggun ({status}): {e.response.text}"
+                            )
+                        retry_after = parse_retry_after(
+                            e.response.headers.get("Retry-After")
+                        )
+                        self.limiter.record_overload(
+                            permit,
+                            reason="429" if status == 429 else "5xx",
+                            retry_after=retry_after,
+                        )
+                        # Un 429 es el límite de tasa, no una caída
+                        if status != 429:
+                            call.mark_failure()
+                        error = f"Error HTTP al comunicarse con Taggun ({status}): {e.response.text}"
+                    except httpx.TimeoutException as e:
+                        self.limiter.record_overload(permit, reason="timeout")
+                        call.mark_failure()
+                        error = f"Tiempo de espera agotado con Taggun: {e!r}"
+                    except Exception as e:
+                        raise CustomAppException(
+                            f"Error inesperado en ocr_taggun: {str(e)}"
+                        )
+
+            if attempt == self.max_attempts:
+                raise CustomAppException(error)
+
+            delay = self._backoff(attempt, retry_after)
+            logger.warning(
+                f"[TAGGUN] {error} - Reintentando en {delay:.2f}s "
+                f"(intento {attempt}/{self.max_attempts})"
             )
+            await asyncio.sleep(delay)
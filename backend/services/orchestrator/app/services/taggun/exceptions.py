@@ -79,3 +79,39 @@ class UnsupportedImageFormatError(CustomAppException):
             },
             status_code=415,  # 415 Unsupported Media Type
         )
+
+
+class CorruptFileError(CustomAppException):
+    def __init__(
+        self, filename: str, reason: str, message: str = None, data: dict = None
+    ):
+        default_message = f"El archivo '{filename}' no se puede leer: {reason}"
+        super().__init__(
+            message=message or default_message,
+            data={**(data or {}), "filename": filename, "reason": reason},
+            status_code=422,
+        )
+
+
+class FileLimitExceededError(CustomAppException):
+    def __init__(
+        self,
+        limit_name: str,
+        value: int,
+        limit: int,
+        message: str = None,
+        data: dict = None,
+    ):
+        default_message = (
+            f"El archivo supera el límite de '{limit_name}': {value} (máximo {limit})."
+        )
+        super().__init__(
+            message=message or default_message,
+            data={
+                **(data or {}),
+                "limit_name": limit_name,
+                "value": value,
+                "limit": limit,
+            },
+            status_code=413,
+        )
@@ -183,4 +183,7 @@ class TaggunExtractor:
             amount_discount=amount_discount or 0,
             address=address,
             line_items=lines,
+            line_items_complete=bool(
+                self.try_paths(["meta", "line_items"], default=True)
+            ),
         )
@@ -1,12 +1,39 @@
 import asyncio
+import hashlib
+from collections import deque
+from functools import partial
 
+from exponential_core.exceptions import CustomAppException
 from fastapi import UploadFile
 
+from app.core.circuit_breaker import CircuitState, get_circuit_breaker
+from app.core.exceptions import CircuitOpenError
 from app.core.logging import logger
-from app.core.secrets import SecretsService
+from app.core.pipeline import Stage, StageGraph
+from app.core.lifespan import (
+    get_archive_outbox,
+    get_idempotency_store,
+    get_image_executor,
+    get_job_manager,
+    get_local_ocr_executor,
+    get_result_store,
+    get_scheduler,
+)
+from app.core.metrics import IMAGE_OPTIMIZE_BYTES, PDF_SPLIT_PARTS, PDF_SPLITS
+from app.core.settings import settings
+from app.core.secrets import SecretsService, load_secrets
+from app.core.utils.file_helpers import recreate_upload_file
+from app.services.intake.spool import SpooledUpload, spool_upload, spool_uploads
+from app.services.jobs.exceptions import JobNotFoundError
+from app.services.jobs.schemas import BulkJob
+from app.services.local_ocr.splitter import split_invoices
 from app.services.zoho.processor import zoho_process
-from app.services.upload.process import save_file_dropbox
-from app.services.taggun.utils.valid_size import validate_image_dimensions
+from app.services.taggun.utils.file_validation import (
+    FileInfo,
+    sniff_file_type,
+    validate_file,
+)
+from app.services.taggun.utils.image_optimizer import optimize_image
 from app.services.odoo.v16.processor import odoo_process as odoo_process_v16
 from app.services.odoo.v18.processor import odoo_process as odoo_process_v18
 
@@ -16,19 +43,73 @@ from .tax_id_matching import find_tax_ids, get_account_match
 from .register import register_scan
 
 
-async def handle_invoice_scan(
-    recipient: str, file: UploadFile, file_content: bytes | None = None
-):
+async def _validate_stage(ctx: dict):
+    # Los PDF que pasaron por la división llegan ya validados
+    info = ctx.get("file_info")
+    if info is None:
+        info = await asyncio.to_thread(
+            validate_file, ctx["file"].filename, ctx["file_content"]
+        )
+    logger.debug(f"[{ctx['file'].filename}] Archivo válido: {info}")
+    return info
 
-    file_content = file_content or await file.read()
-    logger.info(f"Inicia el Extraccion de {file.filename} para : {recipient}")
 
-    validate_image_dimensions(file.filename, file_content)
+async def _optimize_stage(ctx: dict) -> dict:
+    """
+    Reduce las fotos antes del OCR. El resultado sustituye al original en
+    Taggun, el ERP y Dropbox.
+    """
+    file, file_content = ctx["file"], ctx["file_content"]
+    if not settings.IMAGE_OPTIMIZE_ENABLED or ctx["validate"].file_type == "pdf":
+        return {"file": file, "file_content": file_content}
 
-    accounts_response = await get_accounts_by_email(email=recipient)
-    all_tax_ids = [a.account_tax_id for a in accounts_response.accounts]
+    optimized = await asyncio.get_running_loop().run_in_executor(
+        get_image_executor(),
+        partial(
+            optimize_image,
+            filename=file.filename,
+            file_bytes=file_content,
+            max_megapixels=settings.IMAGE_MAX_MEGAPIXELS,
+            output_format=settings.IMAGE_OUTPUT_FORMAT,
+            quality=settings.IMAGE_OUTPUT_QUALITY,
+        ),
+    )
+    if optimized is None:
+        return {"file": file, "file_content": file_content}
+
+    IMAGE_OPTIMIZE_BYTES.labels("input").inc(len(file_content))
+    IMAGE_OPTIMIZE_BYTES.labels("output").inc(len(optimized.content))
+    logger.info(
+        f"[{file.filename}] Imagen optimizada: {len(file_content) // 1024} KB -> "
+        f"{len(optimized.content) // 1024} KB ({optimized.width}x{optimized.height})"
+    )
+    return {
+        "file": recreate_upload_file(
+            file_content=optimized.content,
+            filename=optimized.filename,
+            content_type=optimized.content_type,
+        ),
+        "file_content": optimized.content,
+    }
 
-    payload = await extract_ocr_payload(file=file, file_content=file_content)
+
+async def _accounts_stage(ctx: dict):
+    return await get_accounts_by_email(email=ctx["recipient"])
+
+
+async def _ocr_stage(ctx: dict) -> dict:
+    return await extract_ocr_payload(
+        file=ctx["optimize"]["file"],
+        file_content=ctx["optimize"]["file_content"],
+        file_hash=ctx["file_hash"],
+        file_type=ctx["validate"].file_type,
+    )
+
+
+def _tax_ids_stage(ctx: dict) -> dict:
+    payload = ctx["ocr"]
+    accounts_response = ctx["accounts"]
+    all_tax_ids = [a.account_tax_id for a in accounts_response.accounts]
 
     logger.info("Inicio de la extracción de datos OCR.")
     taggun_data = extract_taggun_data(payload)
@@ -44,20 +125,70 @@ async def handle_invoice_scan(
 
     account = get_account_match(accounts_response, company_vat, extractor)
 
+    return {
+        "taggun_data": taggun_data,
+        "company_vat": company_vat,
+        "partner_vat": partner_vat,
+        "account": account,
+    }
+
+
+# Circuito (uno por empresa) que protege a cada procesador de facturas
+_ERP_DEPENDENCIES = {"ZOHO": "zoho", "ODOO": "odoo"}
+
+
+async def _register_stage(ctx: dict):
+    # Con el ERP caído no se registra el escaneo: así el archivo se puede
+    # reintentar (o aparcar en /bulk) sin contarlo dos veces. Solo si alguno
+    # de los circuitos de la empresa está abierto se esperan los secretos para
+    # saber si es el de su ERP; si no, el registro se solapa con su carga
+    company_vat = ctx["tax_ids"]["company_vat"]
+    if any(
+        get_circuit_breaker(erp, company_vat).state is CircuitState.OPEN
+        for erp in _ERP_DEPENDENCIES.values()
+    ):
+        secrets_service = await load_secrets(company_vat)
+        erp = _ERP_DEPENDENCIES.get(secrets_service.get_invoice_processor())
+        if erp:
+            get_circuit_breaker(erp, company_vat).ensure_available()
+
+    account = ctx["tax_ids"]["account"]
     await register_scan(
-        user_id=accounts_response.user_id,
+        user_id=ctx["accounts"].user_id,
         account_id=account.account_id,
     )
     logger.info(
         f"Registro de escaneo completado para {account.account_name} - {account.account_tax_id} "
     )
 
-    secrets_service = await SecretsService(company_vat=company_vat).load()
+
+async def _secrets_stage(ctx: dict) -> SecretsService:
+    return await load_secrets(ctx["tax_ids"]["company_vat"])
+
+
+async def _erp_stage(ctx: dict) -> dict:
+    try:
+        return await _process_erp(ctx)
+    except CircuitOpenError as e:
+        # El escaneo ya está registrado: el archivo no se puede aparcar y
+        # reintentar, así que el error deja de ser un CircuitOpenError
+        raise CustomAppException(
+            str(e), data={"dependency": e.dependency}, status_code=503
+        ) from e
+
+
+async def _process_erp(ctx: dict) -> dict:
+    file = ctx["optimize"]["file"]
+    file_content = ctx["optimize"]["file_content"]
+    taggun_data = ctx["tax_ids"]["taggun_data"]
+    company_vat = ctx["tax_ids"]["company_vat"]
+    secrets_service = ctx["secrets"]
+
     invoice_processor = secrets_service.get_invoice_processor()
 
     if invoice_processor == "ZOHO":
         logger.info(f"Inicia el proceso de Zoho")
-        await zoho_process(
+        erp = await zoho_process(
             file=file,
             file_content=file_content,
             taggun_data=taggun_data,
@@ -67,14 +198,14 @@ async def handle_invoice_scan(
         odoo_version = secrets_service.get_odoo_version()
         logger.info(f"Inicia el proceso de Odoo versión : {odoo_version}")
         if odoo_version == "V16":
-            await odoo_process_v16(
+            erp = await odoo_process_v16(
                 file=file,
                 file_content=file_content,
                 taggun_data=taggun_data,
                 company_vat=company_vat,
             )
         elif odoo_version == "V18":
-            await odoo_process_v18(
+            erp = await odoo_process_v18(
                 taggun_data=taggun_data,
                 company_vat=company_vat,
             )
@@ -86,27 +217,333 @@ async def handle_invoice_scan(
         raise NotImplementedError(f"{invoice_processor} : No ha sido implementado aun.")
 
     logger.debug("Registro de cuenta contable completado")
+    return erp
+
+
+async def _storage_stage(ctx: dict) -> dict:
+    # La subida a Dropbox se hace en segundo plano desde el outbox
+    storage = await get_archive_outbox().enqueue(
+        company_vat=ctx["tax_ids"]["company_vat"],
+        filename=ctx["optimize"]["file"].filename,
+        file_content=ctx["optimize"]["file_content"],
+        invoice_date=ctx["tax_ids"]["taggun_data"].date,
+    )
+    logger.debug("Archivo encolado para almacenamiento")
+    return storage
+
+
+# La validación solo lee cabeceras y va primero, para rechazar los archivos
+# inválidos antes de cualquier llamada de red. La consulta de cuentas se solapa
+# con la optimización de la imagen y el OCR. El registro se solapa con la carga de los
+# secretos (salvo con algún circuito de ERP abierto, ver `_register_stage`), y
+# el ERP espera al registro para no crear facturas de escaneos que no se
+# pudieron contabilizar.
+SCAN_PIPELINE = StageGraph(
+    name="invoice_scan",
+    stages=[
+        Stage("validate", _validate_stage),
+        Stage("accounts", _accounts_stage, depends_on=("validate",)),
+        Stage("optimize", _optimize_stage, depends_on=("validate",)),
+        Stage("ocr", _ocr_stage, depends_on=("optimize",)),
+        Stage("tax_ids", _tax_ids_stage, depends_on=("ocr", "accounts")),
+        Stage("register", _register_stage, depends_on=("tax_ids",)),
+        Stage("secrets", _secrets_stage, depends_on=("tax_ids",)),
+        Stage("erp", _erp_stage, depends_on=("secrets", "register")),
+        Stage("storage", _storage_stage, depends_on=("erp",)),
+    ],
+)
+
+
+async def handle_invoice_scan(
+    recipient: str, upload: SpooledUpload, interactive: bool = False
+):
+    cached = await _cached_result(upload.sha256, recipient, upload.filename)
+    if cached:
+        return cached
+
+    file_content = await upload.read_bytes()
+    file_info = None
+    # Se valida antes el PDF entero para que sus límites (páginas, tamaño) no
+    # se esquiven al dividirlo; las imágenes se validan solo en el pipeline
+    if settings.PDF_SPLIT_ENABLED and sniff_file_type(file_content) == "pdf":
+        file_info = await asyncio.to_thread(
+            validate_file, upload.filename, file_content
+        )
+        parts = await _split_invoices(upload.filename, file_content, file_info)
+        if parts:
+            return await _scan_invoice_parts(recipient, upload, parts, interactive)
+
+    return await _scan_document(
+        recipient=recipient,
+        filename=upload.filename,
+        content_type=upload.content_type,
+        file_content=file_content,
+        file_hash=upload.sha256,
+        file_info=file_info,
+    )
+
+
+async def _cached_result(file_hash: str, recipient: str, filename: str) -> dict | None:
+    if not settings.RESULT_CACHE_ENABLED:
+        return None
+    cached = await get_result_store().get(file_hash, recipient)
+    if not cached:
+        return None
+    logger.info(
+        f"[{filename}] Archivo ya procesado para {recipient}, "
+        "se devuelve el resultado almacenado"
+    )
+    return {**cached, "cached": True}
 
-    await save_file_dropbox(
+
+async def _scan_document(
+    recipient: str,
+    filename: str,
+    content_type: str | None,
+    file_content: bytes,
+    file_hash: str,
+    file_info: FileInfo | None = None,
+) -> dict:
+    file = recreate_upload_file(
+        file_content=file_content,
+        filename=filename,
+        content_type=content_type,
+    )
+    logger.info(f"Inicia el Extraccion de {file.filename} para : {recipient}")
+
+    run = await SCAN_PIPELINE.run(
+        recipient=recipient,
         file=file,
         file_content=file_content,
-        taggun_data=taggun_data,
-        company_vat=company_vat,
+        file_hash=file_hash,
+        file_info=file_info,
     )
-    logger.debug("Almacenamiento completado")
+    company_vat = run.results["tax_ids"]["company_vat"]
     logger.debug(f"[{file.filename}] Finalización exitosa para {company_vat}")
 
+    result = {
+        "filename": file.filename,
+        "file_hash": file_hash,
+        "company_vat": company_vat,
+        "partner_vat": run.results["tax_ids"]["partner_vat"],
+        "erp": run.results["erp"],
+        "storage": run.results["storage"],
+    }
+
+    if settings.RESULT_CACHE_ENABLED:
+        await get_result_store().save(file_hash, recipient, result)
+
+    return {**result, "timings": run.timings_summary()}
+
+
+async def _split_invoices(filename: str, file_content: bytes, info: FileInfo) -> list:
+    """Separa los PDF con varias facturas (`info` es el PDF entero ya validado)."""
+    if info.file_type != "pdf" or (info.pages or 0) < 2:
+        return []
+
+    try:
+        parts = await asyncio.get_running_loop().run_in_executor(
+            get_local_ocr_executor(),
+            partial(
+                split_invoices,
+                file_content,
+                min_page_chars=settings.PDF_SPLIT_MIN_PAGE_CHARS,
+            ),
+        )
+    except Exception as e:
+        logger.warning(f"[{filename}] No se pudo analizar el PDF para dividirlo: {e!r}")
+        return []
+
+    PDF_SPLITS.labels("split" if parts else "single").inc()
+    if parts:
+        PDF_SPLIT_PARTS.inc(len(parts))
+        logger.info(
+            f"[{filename}] PDF con {len(parts)} facturas: "
+            + ", ".join(_page_label(pages) for pages, _ in parts)
+        )
+    return parts
+
+
+async def _scan_invoice_parts(
+    recipient: str,
+    upload: SpooledUpload,
+    parts: list[tuple[range, bytes]],
+    interactive: bool,
+) -> dict:
+    """
+    Procesa cada factura del PDF como un escaneo independiente, sin que el
+    fallo de una detenga al resto. Se procesan en el hueco del planificador
+    que ya ocupa el documento y, en paralelo, en los huecos adicionales que
+    el planificador conceda al tenant: un PDF no supera su límite.
+    """
+    scheduler = get_scheduler()
+    stem = upload.filename.rsplit(".", 1)[0] if upload.filename else "factura"
+    pending = deque(enumerate(parts))
+    outcomes: list[dict | Exception | None] = [None] * len(parts)
+
+    def part_name(pages: range) -> str:
+        return f"{stem}_{_page_label(pages)}.pdf"
+
+    async def scan(pages: range, content: bytes) -> dict:
+        filename = part_name(pages)
+        file_hash = hashlib.sha256(content).hexdigest()
+        cached = await _cached_result(file_hash, recipient, filename)
+        if cached:
+            return cached
+        return await _scan_document(
+            recipient=recipient,
+            filename=filename,
+            content_type="application/pdf",
+            file_content=content,
+            file_hash=file_hash,
+            # Páginas de un PDF ya validado: no se vuelve a abrir
+            file_info=FileInfo(file_type="pdf", size=len(content), pages=len(pages)),
+        )
+
+    async def drain():
+        while pending:
+            index, (pages, content) = pending.popleft()
+            try:
+                outcomes[index] = await scan(pages, content)
+            except Exception as e:
+                outcomes[index] = e
+
+    waiting: set[asyncio.Task] = set()
+
+    async def helper():
+        async with scheduler.slot(recipient, interactive=interactive):
+            waiting.discard(asyncio.current_task())
+            await drain()
 
-async def handle_multiple_invoice_scans(recipient: str, files: list[UploadFile]):
-    # Leer todo el contenido de los archivos en paralelo
-    contents = await asyncio.gather(*[file.read() for file in files])
+    helpers = [
+        asyncio.create_task(helper())
+        for _ in range(min(settings.PDF_SPLIT_MAX_CONCURRENCY, len(parts)) - 1)
+    ]
+    waiting.update(helpers)
+    try:
+        await drain()
+        # Las que aún esperan hueco ya no tienen facturas que procesar; las
+        # demás terminan la suya
+        for task in waiting:
+            task.cancel()
+        await asyncio.gather(*helpers, return_exceptions=True)
+    finally:
+        for task in helpers:
+            task.cancel()
 
-    # Ejecutar procesamiento de cada archivo en paralelo
-    results = await asyncio.gather(
-        *[
-            handle_invoice_scan(recipient=recipient, file=file, file_content=content)
-            for file, content in zip(files, contents)
-        ]
+    documents, errors = [], []
+    for (pages, _), outcome in zip(parts, outcomes):
+        page_range = [pages.start + 1, pages.stop]
+        if isinstance(outcome, Exception):
+            errors.append(outcome)
+            documents.append(
+                {
+                    "pages": page_range,
+                    "filename": part_name(pages),
+                    "error": {
+                        "type": type(outcome).__name__,
+                        "message": str(outcome),
+                        "status_code": getattr(outcome, "status_code", 500),
+                    },
+                }
+            )
+        else:
+            documents.append({"pages": page_range, **outcome})
+
+    circuit_open = next((e for e in errors if isinstance(e, CircuitOpenError)), None)
+    # Las facturas ya procesadas quedan en la caché de resultados: reintentar
+    # el documento entero (p. ej. al aparcarlo en /bulk) no las duplica
+    if circuit_open and settings.RESULT_CACHE_ENABLED:
+        raise circuit_open
+    if len(errors) == len(parts):
+        raise errors[0]
+
+    result = {
+        "filename": upload.filename,
+        "file_hash": upload.sha256,
+        "documents": documents,
+        "succeeded": len(parts) - len(errors),
+        "failed": len(errors),
+    }
+    if settings.RESULT_CACHE_ENABLED and not errors:
+        await get_result_store().save(upload.sha256, recipient, result)
+    return result
+
+
+def _page_label(pages: range) -> str:
+    if len(pages) == 1:
+        return f"p{pages.start + 1}"
+    return f"p{pages.start + 1}-{pages.stop}"
+
+
+async def handle_single_invoice_scan(
+    recipient: str, file: UploadFile, idempotency_key: str | None = None
+):
+    upload = await spool_upload(file)
+
+    async def scan():
+        try:
+            async with get_scheduler().slot(recipient, interactive=True):
+                return await handle_invoice_scan(
+                    recipient=recipient, upload=upload, interactive=True
+                )
+        finally:
+            upload.close()
+
+    if idempotency_key is None:
+        return await scan()
+
+    return await get_idempotency_store().run(
+        key=idempotency_key,
+        scope=f"scan:{recipient.lower()}",
+        fingerprint=upload.sha256,
+        func=scan,
+        on_skip=upload.close,
     )
 
-    return results
+
+async def handle_multiple_invoice_scans(
+    recipient: str, files: list[UploadFile], idempotency_key: str | None = None
+) -> BulkJob:
+    """
+    Encola los archivos como un trabajo en segundo plano y devuelve su estado
+    inicial sin esperar al procesamiento.
+    """
+    uploads = await spool_uploads(files)
+    job_manager = get_job_manager()
+
+    async def submit():
+        return await job_manager.submit(
+            recipient=recipient,
+            uploads=uploads,
+            handler=handle_invoice_scan,
+        )
+
+    if idempotency_key is None:
+        return await submit()
+
+    def discard():
+        for upload in uploads:
+            upload.close()
+
+    fingerprint = hashlib.sha256(
+        "\n".join(upload.sha256 for upload in uploads).encode()
+    ).hexdigest()
+    job = await get_idempotency_store().run(
+        key=idempotency_key,
+        scope=f"bulk:{recipient.lower()}",
+        fingerprint=fingerprint,
+        func=submit,
+        on_skip=discard,
+    )
+
+    # Una repetición devuelve el estado actual del trabajo si sigue disponible
+    job_id = job.job_id if isinstance(job, BulkJob) else job["job_id"]
+    try:
+        return job_manager.get(job_id)
+    except JobNotFoundError:
+        return job
+
+
+def get_invoice_scan_job(job_id: str) -> BulkJob:
+    return get_job_manager().get(job_id)
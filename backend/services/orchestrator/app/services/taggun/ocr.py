@@ -1,30 +1,33 @@
+import hashlib
+
 from fastapi import UploadFile
 from app.core.settings import settings
 from app.core.logging import logger
-from app.core.client_provider import ProviderConfig
-from app.core.lifespan import get_taggun_service
-from app.services.taggun.client import TaggunService
+from app.core.lifespan import get_ocr_cache, get_ocr_router
 from app.services.taggun.extractor import TaggunExtractor
-from app.services.taggun.process import TaggunProcess
+from app.services.taggun.providers import TaggunProvider
 from app.services.taggun.schemas.taggun_models import TaggunExtractedInvoice
 
 
-async def extract_ocr_payload(file: UploadFile, file_content: bytes) -> dict:
-    taggun_service = get_taggun_service()
-    logger.info(f"taggun_service : [{taggun_service}]")
+async def extract_ocr_payload(
+    file: UploadFile,
+    file_content: bytes,
+    file_hash: str | None = None,
+    file_type: str | None = None,
+) -> dict:
+    if settings.OCR_CACHE_ENABLED:
+        file_hash = file_hash or hashlib.sha256(file_content).hexdigest()
+        cached = await get_ocr_cache().get(file_hash)
+        if cached is not None:
+            logger.info(f"[{file.filename}] Payload de Taggun recuperado de la caché")
+            return cached
 
-    if taggun_service is None:  # 🔹 fallback para pruebas locales
-        taggun_service = TaggunService(
-            config=ProviderConfig(
-                server_url=settings.TAGGUN_URL,
-                api_key=settings.TAGGUN_APIKEY,
-            )
-        )
+    payload, provider = await get_ocr_router().extract(file, file_content, file_type)
 
-    process = await TaggunProcess.create(
-        file=file, file_content=file_content, taggun_service=taggun_service
-    )
-    return await process.run_orc()
+    # Solo se guardan las respuestas de Taggun: las locales no cuestan nada
+    if settings.OCR_CACHE_ENABLED and provider == TaggunProvider.name:
+        await get_ocr_cache().save(file_hash, payload)
+    return payload
 
 
 def extract_taggun_data(payload: dict) -> TaggunExtractedInvoice:
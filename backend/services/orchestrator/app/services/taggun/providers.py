@@ -0,0 +1,246 @@
+import asyncio
+import os
+import tempfile
+from concurrent.futures import Executor
+from functools import partial
+
+from fastapi import UploadFile
+
+from app.core.hedging import LatencyWindow, hedge
+from app.core.logging import logger
+from app.core.metrics import LOCAL_OCR_PAGE_SECONDS, LOCAL_OCR_RESULTS
+from app.core.settings import settings
+from app.services.local_ocr import tesseract
+from app.services.local_ocr.payload import build_invoice_payload
+from app.services.local_ocr.text_layer import extract_text_layer_payload
+from app.services.taggun.client import TaggunService
+from app.services.taggun.process import TaggunProcess
+
+
+class OcrProvider:
+    """
+    Fuente de payloads con forma de Taggun. `extract` devuelve None cuando el
+    proveedor no sabe resolver el archivo y hay que recurrir a otro.
+    """
+
+    name: str = ""
+
+    async def extract(
+        self,
+        file: UploadFile,
+        file_content: bytes,
+        file_type: str | None,
+    ) -> dict | None:
+        raise NotImplementedError
+
+
+class TaggunProvider(OcrProvider):
+    name = "taggun"
+
+    def __init__(self, service: TaggunService):
+        self.service = service
+
+    async def extract(self, file, file_content, file_type):
+        process = await TaggunProcess.create(
+            file=file, file_content=file_content, taggun_service=self.service
+        )
+        return await process.run_orc()
+
+
+class TextLayerProvider(OcrProvider):
+    """
+    Capa de texto de los PDFs digitales, en el pool de procesos. Solo resuelve
+    las facturas cuyas líneas de producto se leen y suman la base imponible
+    (Odoo crea un producto por línea); las demás pasan por Taggun.
+    """
+
+    name = "pdf_text_layer"
+
+    def __init__(self, executor: Executor, min_chars: int = 100):
+        self.executor = executor
+        self.min_chars = min_chars
+
+    async def extract(self, file, file_content, file_type):
+        if file_type != "pdf":
+            return None
+        try:
+            payload, reason = await asyncio.get_running_loop().run_in_executor(
+                self.executor,
+                partial(
+                    extract_text_layer_payload, file_content, min_chars=self.min_chars
+                ),
+            )
+        except Exception as e:
+            payload, reason = None, f"error: {e!r}"
+
+        if payload is not None and not has_line_items(payload):
+            payload, reason = None, "líneas de producto no encontradas"
+        if payload is None:
+            LOCAL_OCR_RESULTS.labels(self.name, "fallback").inc()
+            logger.info(f"[{file.filename}] Capa de texto descartada ({reason})")
+            return None
+
+        LOCAL_OCR_RESULTS.labels(self.name, "used").inc()
+        logger.info(f"[{file.filename}] Factura extraída de la capa de texto del PDF")
+        return payload
+
+
+class TesseractProvider(OcrProvider):
+    """OCR local sin red, página a página en el pool de procesos."""
+
+    name = tesseract.ENGINE
+
+    def __init__(
+        self,
+        executor: Executor,
+        dpi: int = 300,
+        lang: str = "spa",
+        page_timeout: float = 60.0,
+        pages_in_flight: int = 2,
+    ):
+        self.executor = executor
+        self.dpi = dpi
+        self.lang = lang
+        self.page_timeout = page_timeout
+        self.pages_in_flight = pages_in_flight
+
+    async def extract(self, file, file_content, file_type):
+        file_type = file_type or "image"
+        path = await asyncio.to_thread(_write_temp_file, file_content)
+        try:
+            pages = await asyncio.to_thread(tesseract.page_count, path, file_type)
+            texts, timings = [], []
+            async for page in tesseract.stream_pages(
+                self.executor,
+                path,
+                file_type,
+                pages,
+                dpi=self.dpi,
+                lang=self.lang,
+                timeout=self.page_timeout,
+                max_in_flight=self.pages_in_flight,
+            ):
+                LOCAL_OCR_PAGE_SECONDS.labels(self.name, "render").observe(
+                    page.render_seconds
+                )
+                LOCAL_OCR_PAGE_SECONDS.labels(self.name, "ocr").observe(
+                    page.ocr_seconds
+                )
+                texts.append(page.text)
+                timings.append(
+                    {
+                        "page": page.page,
+                        "render_seconds": round(page.render_seconds, 4),
+                        "ocr_seconds": round(page.ocr_seconds, 4),
+                    }
+                )
+        except Exception as e:
+            LOCAL_OCR_RESULTS.labels(self.name, "fallback").inc()
+            logger.error(f"[{file.filename}] Error en el OCR con Tesseract: {e!r}")
+            return None
+        finally:
+            await asyncio.to_thread(os.unlink, path)
+
+        logger.debug(f"[{file.filename}] Tiempos de Tesseract por página: {timings}")
+        payload, reason = build_invoice_payload(
+            "\n".join(texts), engine=self.name, pages=pages
+        )
+        if payload is None:
+            LOCAL_OCR_RESULTS.labels(self.name, "fallback").inc()
+            logger.warning(
+                f"[{file.filename}] Tesseract no bastó para extraer la factura: {reason}"
+            )
+            return None
+
+        LOCAL_OCR_RESULTS.labels(self.name, "used").inc()
+        payload["meta"]["page_timings"] = timings
+        return payload
+
+
+class OcrRouter:
+    """
+    Decide qué proveedor extrae cada archivo:
+    1. `local_first` (capa de texto del PDF), si puede resolverlo.
+    2. `primary` (Taggun) con cobertura: si no responde antes del percentil
+       configurado de sus latencias recientes, se lanza también `secondary`
+       (Tesseract) y gana el primero. La cobertura solo gana con un payload
+       que traiga las líneas de producto (ver `has_line_items`).
+    3. Si `primary` falla, el payload de `secondary` sirve aunque no traiga
+       las líneas: va marcado (`meta.line_items` a False) y el ERP decide si
+       puede darlo de alta sin ellas.
+    """
+
+    def __init__(
+        self,
+        primary: OcrProvider,
+        secondary: OcrProvider | None = None,
+        local_first: OcrProvider | None = None,
+        window: LatencyWindow | None = None,
+        hedge_enabled: bool = True,
+    ):
+        self.primary = primary
+        self.secondary = secondary
+        self.local_first = local_first
+        self.window = window or LatencyWindow()
+        self.hedge_enabled = hedge_enabled
+
+    async def extract(
+        self,
+        file: UploadFile,
+        file_content: bytes,
+        file_type: str | None,
+    ) -> tuple[dict, str]:
+        """Devuelve el payload y el nombre del proveedor que lo produjo."""
+        if self.local_first is not None:
+            payload = await self.local_first.extract(file, file_content, file_type)
+            if payload is not None:
+                return payload, self.local_first.name
+
+        # Payloads sin líneas de la cobertura, por si `primary` acaba fallando
+        incomplete: dict[str, dict] = {}
+
+        def attempt(provider: OcrProvider):
+            async def call():
+                payload = await provider.extract(file, file_content, file_type)
+                if payload is not None and not has_line_items(payload):
+                    incomplete[provider.name] = payload
+                    return None
+                return payload
+
+            return provider.name, call
+
+        try:
+            result = await hedge(
+                "ocr",
+                primary=attempt(self.primary),
+                secondary=attempt(self.secondary) if self.secondary else None,
+                window=self.window,
+                enabled=self.hedge_enabled,
+            )
+        except Exception as e:
+            if not incomplete:
+                raise
+            name, payload = next(iter(incomplete.items()))
+            logger.warning(
+                f"[{file.filename}] {self.primary.name} falló ({e!r}): se usa el "
+                f"payload de {name}, sin líneas de producto"
+            )
+            return payload, name
+        if result.winner != self.primary.name:
+            logger.info(
+                f"[{file.filename}] OCR resuelto por {result.winner} "
+                f"en {result.elapsed:.2f}s"
+            )
+        return result.value, result.winner
+
+
+def has_line_items(payload: dict) -> bool:
+    """Los payloads locales marcan en `meta.line_items` si leyeron las líneas."""
+    return bool((payload.get("meta") or {}).get("line_items", True))
+
+
+def _write_temp_file(file_content: bytes) -> str:
+    fd, path = tempfile.mkstemp(prefix="ocr-", dir=settings.INTAKE_SPOOL_DIR)
+    with os.fdopen(fd, "wb") as f:
+        f.write(file_content)
+    return path
@@ -1,8 +1,13 @@
 from app.services.admin.client import AdminService
 from app.core.client_provider import ProviderConfig
 from app.core.settings import settings
+from app.core.lifespan import get_http_client
+from app.core.schemas.enums import DownstreamEnum
 
 
 async def register_scan(user_id: int, account_id: int):
-    adm_service = AdminService(config=ProviderConfig(server_url=settings.URL_ADMIN))
+    adm_service = AdminService(
+        config=ProviderConfig(server_url=settings.URL_ADMIN),
+        client=get_http_client(DownstreamEnum.ADMIN),
+    )
     return await adm_service.register_scan(user_id=user_id, account_id=account_id)
@@ -33,3 +33,5 @@ class TaggunExtractedInvoice(BaseModel):
     amount_discount: float
     address: AddressSchema
     line_items: list[LineItemSchema]
+    # False si el OCR de respaldo no pudo leer las líneas de producto
+    line_items_complete: bool = True
@@ -2,6 +2,7 @@ from app.core.utils.tax_id_extractor import TaxIdExtractor
 from app.services.openai.client import OpenAIService
 from app.services.taggun.exceptions import AccountNotFoundError
 from app.core.logging import logger
+from app.core.settings import settings
 from app.services.taggun.schemas.taggun_models import TaggunExtractedInvoice
 
 
@@ -13,6 +14,7 @@ def find_tax_ids(
     extractor = TaxIdExtractor(
         text=payload_text,
         all_tax_ids=all_tax_ids,
+        max_distance=settings.TAX_ID_MATCH_MAX_DISTANCE,
     )
 
     logger.debug("Buscando un Tax ID válido para la compañía.")
@@ -26,11 +28,14 @@ def find_tax_ids(
 
 
 def get_account_match(identify_accounts, company_vat: str, extractor: TaxIdExtractor):
+    # El más cercano de los identificadores de las empresas; si hay varias
+    # con el mismo, la primera
+    tax_ids = extractor.account_index.lookup(company_vat)
     match = next(
         (
             a
             for a in identify_accounts.accounts
-            if extractor._are_similar(a.account_tax_id, company_vat)
+            if tax_ids and a.account_tax_id == tax_ids[0]
         ),
         None,
     )
@@ -0,0 +1,129 @@
+import io
+import re
+from dataclasses import dataclass
+
+import pymupdf
+from PIL import Image
+
+from app.core.settings import settings
+from app.services.taggun.exceptions import (
+    CorruptFileError,
+    FileLimitExceededError,
+    ImageTooSmall,
+    UnsupportedImageFormatError,
+)
+
+SUPPORTED_TYPES = ["pdf", "jpeg", "png", "bmp", "tiff", "webp"]
+
+# Píxeles de la imagen en el mensaje de `Image.DecompressionBombError`
+BOMB_PIXELS = re.compile(r"\((\d+) pixels\)")
+
+# Firmas al inicio del archivo; el PDF se busca aparte porque la especificación
+# admite basura antes de `%PDF-` en el primer kilobyte
+MAGIC_BYTES = [
+    (b"\xff\xd8\xff", "jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"II*\x00", "tiff"),
+    (b"MM\x00*", "tiff"),
+    (b"BM", "bmp"),
+]
+
+
+@dataclass(frozen=True)
+class FileInfo:
+    file_type: str
+    size: int
+    width: int | None = None
+    height: int | None = None
+    pages: int = 1
+
+
+def sniff_file_type(file_bytes: bytes) -> str | None:
+    """Tipo real del archivo según sus primeros bytes, sin mirar la extensión."""
+    for signature, file_type in MAGIC_BYTES:
+        if file_bytes.startswith(signature):
+            return file_type
+    if file_bytes[:4] == b"RIFF" and file_bytes[8:12] == b"WEBP":
+        return "webp"
+    if b"%PDF-" in file_bytes[:1024]:
+        return "pdf"
+    return None
+
+
+def validate_file(filename: str, file_bytes: bytes) -> FileInfo:
+    """
+    Comprueba que el archivo es una factura que merece la pena enviar a Taggun.
+    Solo lee cabeceras: dimensiones de la imagen y número de páginas del PDF,
+    sin decodificar píxeles ni renderizar páginas. Es código bloqueante,
+    pensado para ejecutarse en un executor.
+    """
+    if not file_bytes:
+        raise CorruptFileError(filename, "el archivo está vacío")
+
+    file_type = sniff_file_type(file_bytes)
+    if file_type is None:
+        extension = filename.lower().rsplit(".", 1)[-1] if "." in filename else ""
+        raise UnsupportedImageFormatError(extension or "desconocido", SUPPORTED_TYPES)
+
+    if file_type == "pdf":
+        _check_limit("bytes", len(file_bytes), settings.UPLOAD_PDF_MAX_BYTES)
+        return _validate_pdf(filename, file_bytes)
+
+    _check_limit("bytes", len(file_bytes), settings.UPLOAD_IMAGE_MAX_BYTES)
+    return _validate_image(filename, file_type, file_bytes)
+
+
+def _validate_pdf(filename: str, file_bytes: bytes) -> FileInfo:
+    # PyMuPDF solo lee la tabla xref y el árbol de páginas al abrir
+    try:
+        with pymupdf.open(stream=file_bytes, filetype="pdf") as doc:
+            pages = doc.page_count
+            encrypted = doc.needs_pass
+    except Exception as e:
+        raise CorruptFileError(filename, str(e))
+
+    if encrypted:
+        raise CorruptFileError(filename, "el PDF está protegido con contraseña")
+    if pages == 0:
+        raise CorruptFileError(filename, "el PDF no tiene páginas")
+    _check_limit("pages", pages, settings.UPLOAD_PDF_MAX_PAGES)
+
+    return FileInfo(file_type="pdf", size=len(file_bytes), pages=pages)
+
+
+def _validate_image(filename: str, file_type: str, file_bytes: bytes) -> FileInfo:
+    # Image.open solo lee la cabecera; los píxeles se decodifican al usarlos
+    try:
+        with Image.open(io.BytesIO(file_bytes)) as img:
+            width, height = img.size
+            pages = getattr(img, "n_frames", 1)
+    except Image.DecompressionBombError as e:
+        # Pillow rechaza al abrir las imágenes de más de 2 * MAX_IMAGE_PIXELS:
+        # es un límite superado (413), no un archivo dañado
+        match = BOMB_PIXELS.search(str(e))
+        bomb_limit = 2 * Image.MAX_IMAGE_PIXELS
+        pixels = int(match.group(1)) if match else bomb_limit + 1
+        _check_limit(
+            "pixels", pixels, min(settings.UPLOAD_IMAGE_MAX_PIXELS, bomb_limit)
+        )
+    except Exception as e:
+        raise CorruptFileError(filename, str(e))
+
+    min_side = settings.UPLOAD_IMAGE_MIN_SIDE
+    if width < min_side or height < min_side:
+        raise ImageTooSmall(width, height, min_side, min_side)
+    _check_limit("pixels", width * height, settings.UPLOAD_IMAGE_MAX_PIXELS)
+    _check_limit("pages", pages, settings.UPLOAD_PDF_MAX_PAGES)
+
+    return FileInfo(
+        file_type=file_type,
+        size=len(file_bytes),
+        width=width,
+        height=height,
+        pages=pages,
+    )
+
+
+def _check_limit(name: str, value: int, limit: int):
+    if value > limit:
+        raise FileLimitExceededError(name, value, limit)
@@ -0,0 +1,99 @@
+import io
+import math
+from dataclasses import dataclass
+from pathlib import PurePath
+
+from PIL import ExifTags, Image, ImageOps
+
+from app.core.logging import logger
+
+OUTPUT_FORMATS = {
+    "JPEG": (".jpg", "image/jpeg"),
+    "WEBP": (".webp", "image/webp"),
+}
+
+
+@dataclass(frozen=True)
+class OptimizedImage:
+    filename: str
+    content_type: str
+    content: bytes
+    width: int
+    height: int
+
+
+def optimize_image(
+    filename: str,
+    file_bytes: bytes,
+    max_megapixels: float,
+    output_format: str = "JPEG",
+    quality: int = 85,
+) -> OptimizedImage | None:
+    """
+    Reduce una foto de factura antes de enviarla a Taggun, al ERP y a Dropbox:
+    - Limita la resolución a `max_megapixels` manteniendo la proporción.
+    - Aplica la orientación EXIF y descarta los metadatos.
+    - Recodifica en `output_format` con la calidad indicada.
+    Devuelve None si el archivo debe enviarse tal cual: PDF, imágenes de
+    varias páginas o resultados que no ahorran bytes. Es código bloqueante,
+    pensado para ejecutarse en un executor.
+    """
+    if PurePath(filename).suffix.lower() == ".pdf":
+        return None
+
+    try:
+        img = Image.open(io.BytesIO(file_bytes))
+        if getattr(img, "n_frames", 1) > 1:
+            return None
+
+        orientation = img.getexif().get(ExifTags.Base.Orientation, 1)
+        width, height = img.size
+        scale = min(1.0, math.sqrt(max_megapixels * 1e6 / (width * height)))
+        target = (max(1, math.floor(width * scale)), max(1, math.floor(height * scale)))
+        if scale < 1 and img.format == "JPEG":
+            # El decodificador JPEG puede escalar por 1/2, 1/4 o 1/8 al leer,
+            # mucho más barato que decodificar a tamaño completo
+            img.draft("RGB", target)
+        if img.size != target:
+            img = img.resize(target, Image.Resampling.LANCZOS, reducing_gap=3.0)
+        img = ImageOps.exif_transpose(img)
+
+        img = _flatten(img)
+        extension, content_type = OUTPUT_FORMATS[output_format]
+        buffer = io.BytesIO()
+        if output_format == "JPEG":
+            img.save(buffer, "JPEG", quality=quality, optimize=True)
+        else:
+            img.save(buffer, "WEBP", quality=quality, method=4)
+    except Exception as e:
+        logger.warning(
+            f"[IMAGE] No se pudo optimizar {filename}, se envía el original: {e}"
+        )
+        return None
+
+    content = buffer.getvalue()
+    if scale == 1 and orientation == 1 and len(content) >= len(file_bytes):
+        return None
+
+    return OptimizedImage(
+        filename=str(PurePath(filename).with_suffix(extension)),
+        content_type=content_type,
+        content=content,
+        width=img.width,
+        height=img.height,
+    )
+
+
+def _flatten(img: Image.Image) -> Image.Image:
+    """Convierte a un modo admitido por JPEG/WebP; la transparencia pasa a blanco."""
+    if img.mode in ("RGB", "L"):
+        return img
+    if img.mode == "P":
+        img = img.convert("RGBA")
+    if img.mode in ("RGBA", "LA"):
+        background = Image.new("RGB", img.size, (255, 255, 255))
+        background.paste(img, mask=img.getchannel("A"))
+        return background
+    if img.mode in ("1", "I;16", "I"):
+        return img.convert("L")
+    return img.convert("RGB")
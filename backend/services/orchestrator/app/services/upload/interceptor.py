@@ -4,6 +4,7 @@ from dropbox.exceptions import ApiError, AuthError, HttpError, BadInputError
 
 
 from app.core.logging import logger
+from app.core.metrics import observe_dependency
 from app.services.upload.expections import (
     DropboxConnectionError,
     DropboxServiceError,
@@ -15,7 +16,8 @@ def dropbox_error_interceptor(func):
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
         try:
-            return func(*args, **kwargs)
+            with observe_dependency("dropbox", func.__name__):
+                return func(*args, **kwargs)
 
         except AuthError as e:
             logger.error(f"[DropboxAuthError] {str(e)}")
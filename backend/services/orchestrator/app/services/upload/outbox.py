@@ -0,0 +1,215 @@
+import asyncio
+import os
+import random
+import time
+import uuid
+from datetime import date
+from pathlib import Path
+
+from app.core.logging import logger
+from app.core.metrics import ARCHIVE_OUTBOX_EVENTS
+from app.core.sqlite import SQLiteStore
+from app.services.upload.process import build_archive_location, save_file_dropbox
+
+
+class ArchiveOutbox(SQLiteStore):
+    """
+    Cola persistente de archivos pendientes de subir a Dropbox.
+    - El escaneo solo encola el archivo (copia en disco + fila en SQLite) y
+      responde sin esperar a la subida.
+    - Un grupo de workers en segundo plano sube los archivos y reintenta con
+      backoff exponencial; tras `max_attempts` fallos la fila queda como
+      `failed` para revisión manual.
+    - Al reiniciar, las subidas que estaban en curso vuelven a `pending`.
+    """
+
+    schema = """
+        CREATE TABLE IF NOT EXISTS archive_outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            company_vat TEXT NOT NULL,
+            path_folder TEXT NOT NULL,
+            remote_filename TEXT NOT NULL,
+            local_path TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at REAL NOT NULL,
+            last_error TEXT,
+            created_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_archive_outbox_due
+            ON archive_outbox (status, next_attempt_at);
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        files_dir: Path,
+        workers: int = 2,
+        max_attempts: int = 8,
+        base_delay: float = 5.0,
+        max_delay: float = 900.0,
+        idle_poll: float = 30.0,
+    ):
+        super().__init__(path)
+        self.files_dir = Path(files_dir)
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.idle_poll = idle_poll
+        self._wakeup = asyncio.Event()
+        self._tasks: list[asyncio.Task] = []
+
+    async def open(self):
+        await super().open()
+        await asyncio.to_thread(self.files_dir.mkdir, parents=True, exist_ok=True)
+        recovered = await self.execute(
+            "UPDATE archive_outbox SET status = 'pending' WHERE status = 'in_progress'"
+        )
+        if recovered:
+            logger.warning(
+                f"[OUTBOX] {recovered} subidas interrumpidas vuelven a la cola"
+            )
+        return self
+
+    async def start(self):
+        self._tasks = [
+            asyncio.create_task(self._worker(n), name=f"archive-worker-{n}")
+            for n in range(self.workers)
+        ]
+        logger.debug(f"[OUTBOX] {self.workers} workers iniciados")
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await super().close()
+
+    async def enqueue(
+        self,
+        company_vat: str,
+        filename: str | None,
+        file_content: bytes,
+        invoice_date: date,
+    ) -> dict:
+        """Guarda el archivo en disco y lo registra para subirlo más tarde."""
+        path_folder, remote_filename = build_archive_location(
+            filename=filename,
+            file_content=file_content,
+            invoice_date=invoice_date,
+        )
+        local_path = self.files_dir / f"{uuid.uuid4().hex}-{remote_filename}"
+        await asyncio.to_thread(_write_atomic, local_path, file_content)
+
+        now = time.time()
+        await self.execute(
+            "INSERT INTO archive_outbox "
+            "(company_vat, path_folder, remote_filename, local_path, "
+            "next_attempt_at, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (company_vat, path_folder, remote_filename, str(local_path), now, now),
+        )
+        self._wakeup.set()
+        logger.info(f"[OUTBOX] [{remote_filename}] Encolado para {company_vat}")
+
+        return {
+            "status": "queued",
+            "path_folder": path_folder.strip("/"),
+            "filename": remote_filename,
+        }
+
+    async def _worker(self, worker_id: int):
+        while True:
+            self._wakeup.clear()
+            try:
+                row = await self._claim()
+                if row is None:
+                    await self._sleep_until_due()
+                    continue
+                await self._deliver(row)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception(f"[OUTBOX] Error inesperado en el worker {worker_id}")
+                await asyncio.sleep(self.idle_poll)
+
+    async def _claim(self):
+        return await self.fetchone(
+            "UPDATE archive_outbox SET status = 'in_progress' "
+            "WHERE id = (SELECT id FROM archive_outbox "
+            "WHERE status = 'pending' AND next_attempt_at <= ? "
+            "ORDER BY next_attempt_at LIMIT 1) RETURNING *",
+            (time.time(),),
+        )
+
+    async def _sleep_until_due(self):
+        row = await self.fetchone(
+            "SELECT MIN(next_attempt_at) AS due FROM archive_outbox "
+            "WHERE status = 'pending'"
+        )
+        timeout = self.idle_poll
+        if row and row["due"] is not None:
+            timeout = min(timeout, max(0.0, row["due"] - time.time()))
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _deliver(self, row):
+        local_path = Path(row["local_path"])
+        try:
+            result = await save_file_dropbox(
+                local_path=local_path,
+                path_folder=row["path_folder"],
+                remote_filename=row["remote_filename"],
+                company_vat=row["company_vat"],
+            )
+        except Exception as exc:
+            await self._schedule_retry(row, exc)
+            return
+
+        await self.execute("DELETE FROM archive_outbox WHERE id = ?", (row["id"],))
+        await asyncio.to_thread(local_path.unlink, missing_ok=True)
+        ARCHIVE_OUTBOX_EVENTS.labels(result["status"]).inc()
+        logger.info(
+            f"[OUTBOX] [{row['remote_filename']}] {result['status']}: {result['path']}"
+        )
+
+    async def _schedule_retry(self, row, exc: Exception):
+        attempts = row["attempts"] + 1
+        error = f"{type(exc).__name__}: {exc}"
+
+        if attempts >= self.max_attempts:
+            await self.execute(
+                "UPDATE archive_outbox SET status = 'failed', attempts = ?, "
+                "last_error = ? WHERE id = ?",
+                (attempts, error, row["id"]),
+            )
+            ARCHIVE_OUTBOX_EVENTS.labels("failed").inc()
+            logger.error(
+                f"[OUTBOX] [{row['remote_filename']}] Descartado tras "
+                f"{attempts} intentos: {error}"
+            )
+            return
+
+        delay = min(self.base_delay * 2 ** (attempts - 1), self.max_delay)
+        delay *= random.uniform(0.8, 1.2)
+        await self.execute(
+            "UPDATE archive_outbox SET status = 'pending', attempts = ?, "
+            "next_attempt_at = ?, last_error = ? WHERE id = ?",
+            (attempts, time.time() + delay, error, row["id"]),
+        )
+        ARCHIVE_OUTBOX_EVENTS.labels("retry").inc()
+        logger.warning(
+            f"[OUTBOX] [{row['remote_filename']}] Intento {attempts} fallido, "
+            f"reintento en {delay:.1f}s: {error}"
+        )
+
+
+def _write_atomic(path: Path, content: bytes):
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(content)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
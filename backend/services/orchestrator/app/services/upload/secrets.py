@@ -1,6 +1,8 @@
 from exponential_core.secrets import SecretManager
 from exponential_core.exceptions import SecretsNotFound, MissingSecretKey
 
+from app.core.metrics import observe_dependency
+
 
 class SecretsService:
     def __init__(self, company_vat: str):
@@ -10,7 +12,8 @@ class SecretsService:
         self._secrets = None
 
     async def load(self):
-        self._secrets = await self.secret_manager.get_secret()
+        with observe_dependency("secrets_manager", "get_secret"):
+            self._secrets = await self.secret_manager.get_secret()
         if not self._secrets:
             raise SecretsNotFound(company_vat=self.company_vat)
         return self
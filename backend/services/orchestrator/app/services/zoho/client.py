@@ -6,6 +6,8 @@ from pydantic import TypeAdapter
 from app.core.settings import settings
 from app.core.logging import logger
 from app.core.client_provider import ProviderConfig
+from app.core.lifespan import get_http_client
+from app.core.schemas.enums import DownstreamEnum
 from app.core.patterns.adapter.zoho_adapter import ZohoAdapter
 from app.services.openai.client import OpenAIService
 from app.services.openai.schemas.account_category import AccountCategory
@@ -138,7 +140,9 @@ async def classification_for_account(
 ) -> Optional[AccountCategory]:
     """Clasifica la factura usando OpenAI para obtener el account_id más adecuado."""
     config = ProviderConfig(server_url=settings.URL_OPENAPI)
-    openai_service = OpenAIService(config=config)
+    openai_service = OpenAIService(
+        config=config, client=get_http_client(DownstreamEnum.OPENAI)
+    )
 
     logger.debug("Inicia el proceso de clasificación")
     raw_accounts = await zoho_provider.get_chart_of_accounts()
@@ -157,7 +161,10 @@ async def classification_for_account(
     item_text = ", ".join(
         f"{i.quantity} x {i.name} a {i.unit_price} €" for i in taggun_data.line_items
     )
-    prompt = f"El comercio: {taggun_data.partner_name} con los ítems: {item_text}"
+    # Sin líneas (OCR de respaldo) se clasifica solo por el comercio
+    prompt = f"El comercio: {taggun_data.partner_name}"
+    if item_text:
+        prompt += f" con los ítems: {item_text}"
 
     result = await openai_service.classify_expense(
         text=prompt,
@@ -201,7 +208,7 @@ async def get_or_create_bill(
     partner_id: str,
     file: UploadFile,
     file_content: bytes,
-):
+) -> BillsResponse:
     """Busca una factura existente o la crea, luego adjunta el archivo PDF."""
     logger.debug("Iniciando proceso de creación o búsqueda de factura en Zoho")
     bill = await find_bill(
@@ -229,3 +236,5 @@ async def get_or_create_bill(
             file_content=file_content,
         )
         logger.info(f"Proceso completo para factura {bill.bill_id}")
+
+    return bill
@@ -23,7 +23,7 @@ async def zoho_process(
     )
     logger.debug("Obtención del proveedor en Zoho completada")
 
-    await get_or_create_bill(
+    bill = await get_or_create_bill(
         zoho_provider=zoho_provider,
         taggun_data=taggun_data,
         partner_id=partner_id,
@@ -31,3 +31,5 @@ async def zoho_process(
         file_content=file_content,
     )
     logger.debug("Obtención de la factura en Zoho completada")
+
+    return {"processor": "ZOHO", "partner_id": partner_id, "bill_id": bill.bill_id}
@@ -0,0 +1,166 @@
+"""
+Casos de referencia y micro-benchmark del reparto de huecos entre clientes
+(`app.services.scheduler.fair_share`).
+
+Antes de medir se comprueba que las esperas canceladas en cola no rompen el
+reparto: el hueco que dejan no se pierde ni se concede a una espera muerta,
+y el límite por cliente se respeta.
+
+Uso (desde backend/services/orchestrator):
+    python -m benchmarks.fair_share
+    python -m benchmarks.fair_share --tenants 20 --requests 2000
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+
+from app.services.scheduler.fair_share import FairShareScheduler
+
+
+def new_scheduler() -> FairShareScheduler:
+    return FairShareScheduler(
+        max_concurrency=2, interactive_reserved=0, tenant_max_concurrency=1
+    )
+
+
+def leaked(scheduler: FairShareScheduler) -> str | None:
+    if scheduler._running or scheduler._bulk_running or scheduler._tenants:
+        return (
+            f"running={scheduler._running} bulk={scheduler._bulk_running} "
+            f"tenants={list(scheduler._tenants)}"
+        )
+    return None
+
+
+async def cancel_queued_acquire() -> str | None:
+    # Se cancela una espera en cola y después se libera el hueco ocupado
+    scheduler = new_scheduler()
+    await scheduler._acquire("a", False)
+    queued = asyncio.create_task(scheduler._acquire("a", False))
+    await asyncio.sleep(0)
+    queued.cancel()
+    await asyncio.gather(queued, return_exceptions=True)
+    scheduler._release("a", False)
+    return leaked(scheduler)
+
+
+async def cancel_before_dispatch() -> str | None:
+    # La cancelación y la liberación ocurren en la misma vuelta del bucle:
+    # `_dispatch` encuentra la espera ya cancelada al frente de la cola
+    scheduler = new_scheduler()
+    await scheduler._acquire("a", False)
+    queued = asyncio.create_task(scheduler._acquire("a", False))
+    await asyncio.sleep(0)
+    queued.cancel()
+    scheduler._release("a", False)
+    await asyncio.gather(queued, return_exceptions=True)
+    return leaked(scheduler)
+
+
+async def cancel_then_next_waiter() -> str | None:
+    # Tras descartar la espera cancelada, el hueco pasa a la siguiente
+    scheduler = new_scheduler()
+    await scheduler._acquire("a", False)
+    cancelled = asyncio.create_task(scheduler._acquire("a", False))
+    waiting = asyncio.create_task(scheduler._acquire("a", False))
+    await asyncio.sleep(0)
+    cancelled.cancel()
+    scheduler._release("a", False)
+    await asyncio.wait_for(waiting, timeout=1)
+    await asyncio.gather(cancelled, return_exceptions=True)
+    if scheduler._running != 1:
+        return f"running={scheduler._running} (se esperaba 1)"
+    scheduler._release("a", False)
+    return leaked(scheduler)
+
+
+async def tenant_cap() -> str | None:
+    scheduler = new_scheduler()
+    peak = running = 0
+
+    async def job():
+        nonlocal peak, running
+        async with scheduler.slot("a"):
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0)
+            running -= 1
+
+    await asyncio.gather(*(job() for _ in range(5)))
+    if peak > scheduler.tenant_max_concurrency:
+        return f"pico={peak} (límite {scheduler.tenant_max_concurrency})"
+    return leaked(scheduler)
+
+
+CASES = [
+    ("cancelar una espera en cola", cancel_queued_acquire),
+    ("cancelar antes de que `_dispatch` la vea", cancel_before_dispatch),
+    ("el hueco pasa a la siguiente espera", cancel_then_next_waiter),
+    ("límite de concurrencia por cliente", tenant_cap),
+]
+
+
+def check_cases() -> int:
+    failed = 0
+    for name, case in CASES:
+        try:
+            error = asyncio.run(case())
+        except Exception as exc:
+            error = repr(exc)
+        failed += error is not None
+        print(f"{'OK ' if error is None else 'ERR'} {name}: {error or 'sin fugas'}")
+    return failed
+
+
+async def run_round(tenants: int, requests: int, cancel_every: int) -> float:
+    scheduler = FairShareScheduler(
+        max_concurrency=8, interactive_reserved=2, tenant_max_concurrency=2
+    )
+
+    async def job(n: int):
+        async with scheduler.slot(f"t{n % tenants}", interactive=n % 4 == 0):
+            await asyncio.sleep(0)
+
+    start = time.perf_counter()
+    tasks = [asyncio.create_task(job(n)) for n in range(requests)]
+    await asyncio.sleep(0)
+    if cancel_every:
+        for task in tasks[::cancel_every]:
+            task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    elapsed = time.perf_counter() - start
+    if leaked(scheduler):
+        raise RuntimeError(f"[SCHEDULER] hueco perdido: {leaked(scheduler)}")
+    return elapsed
+
+
+def run_benchmark(tenants: int, requests: int):
+    for cancel_every in (0, 10, 3):
+        seconds = asyncio.run(run_round(tenants, requests, cancel_every))
+        label = (
+            f"1 de cada {cancel_every} cancelada" if cancel_every else "sin cancelar"
+        )
+        print(f"{requests / seconds:10.0f} slots/s  {label}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Casos de referencia del reparto de huecos entre clientes"
+    )
+    parser.add_argument("--tenants", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=1000)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if check_cases():
+        return 1
+    run_benchmark(args.tenants, args.requests)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
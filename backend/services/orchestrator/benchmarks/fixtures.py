@@ -0,0 +1,104 @@
+"""
+Datos sintéticos compartidos por los servidores simulados y el generador de
+carga: tenants con su CIF, la respuesta de Taggun y las imágenes de factura.
+"""
+
+import io
+import random
+import uuid
+from datetime import date
+
+from PIL import Image
+from PIL.PngImagePlugin import PngInfo
+
+PARTNER_NAME = "Suministros Benchmark SL"
+CIF_LETTERS = "JABCDEFGHI"
+
+
+def cif_with_control(letter: str, digits: str) -> str:
+    """Completa un CIF con su dígito de control (misma regla que TaxIdExtractor)."""
+    even = sum(int(digits[i]) for i in range(1, 7, 2))
+    odd = sum(int(c) for i in range(0, 7, 2) for c in str(int(digits[i]) * 2))
+    control = (10 - (even + odd) % 10) % 10
+    if letter in "KPQRSNW":
+        return f"{letter}{digits}{CIF_LETTERS[control]}"
+    return f"{letter}{digits}{control}"
+
+
+PARTNER_VAT = cif_with_control("A", "5832961")
+
+
+def tenant_email(index: int) -> str:
+    return f"tenant-{index}@bench.local"
+
+
+def tenant_index(email: str) -> int:
+    try:
+        return int(email.split("@")[0].rsplit("-", 1)[1])
+    except (IndexError, ValueError):
+        return 0
+
+
+def tenant_tax_id(index: int) -> str:
+    return cif_with_control("B", f"{7100000 + index * 7919 % 900000:07d}")
+
+
+def invoice_filename(tenant: int, seq: int) -> str:
+    # Taggun solo recibe el archivo; el CIF del tenant viaja en el nombre
+    return f"{tenant_tax_id(tenant)}_{seq:06d}.png"
+
+
+def tax_id_from_filename(filename: str) -> str:
+    return filename.split("_", 1)[0]
+
+
+def invoice_image(width: int = 1000, height: int = 1400) -> bytes:
+    """PNG único por llamada, para que la caché de resultados no intervenga."""
+    info = PngInfo()
+    info.add_text("bench-id", uuid.uuid4().hex)
+    buffer = io.BytesIO()
+    Image.new("L", (width, height), color=255).save(buffer, "PNG", pnginfo=info)
+    return buffer.getvalue()
+
+
+def taggun_payload(company_vat: str) -> dict:
+    """Respuesta `verbose` de Taggun con el CIF del cliente y el del proveedor."""
+    # Menos de 8 dígitos para que no parezca un identificador fiscal
+    invoice_number = f"FB-{random.randint(0, 999999):06d}"
+    text = "\n".join(
+        [
+            PARTNER_NAME,
+            f"CIF: {PARTNER_VAT}",
+            "Calle Mayor 1, Madrid",
+            f"Factura {invoice_number}",
+            f"Cliente CIF: {company_vat}",
+            "Material de oficina 2 x 50,00",
+            "Base imponible 100,00 IVA 21% 21,00 Total 121,00",
+        ]
+    )
+    return {
+        "merchantName": {"data": PARTNER_NAME},
+        "merchantTaxId": {"data": PARTNER_VAT},
+        "merchantAddress": {"data": "Calle Mayor 1"},
+        "merchantCity": {"data": "Madrid"},
+        "merchantPostalCode": {"data": "28013"},
+        "merchantCountryCode": {"data": "ES"},
+        "date": {"data": f"{date.today().isoformat()}T00:00:00.000Z"},
+        "invoiceNumber": {"data": invoice_number},
+        "totalAmount": {"data": 121.0},
+        "taxAmount": {"data": 21.0},
+        "paidAmount": {"data": 100.0},
+        "entities": {
+            "productLineItems": [
+                {
+                    "data": {
+                        "name": {"data": "Material de oficina"},
+                        "quantity": {"data": 2},
+                        "unitPrice": {"data": 50.0},
+                        "totalPrice": {"data": 100.0},
+                    }
+                }
+            ]
+        },
+        "text": {"text": text},
+    }
@@ -0,0 +1,117 @@
+"""
+Casos de referencia y micro-benchmark de la división de PDF con varias
+facturas (`app.services.local_ocr.splitter`).
+
+Cada caso es un PDF digital generado al vuelo con el texto de sus páginas y
+los rangos de páginas que se esperan; antes de medir se comprueba que
+`split_invoices` los separa exactamente así (un solo rango = sin dividir).
+
+Uso (desde backend/services/orchestrator):
+    python -m benchmarks.invoice_splitter
+    python -m benchmarks.invoice_splitter --repeat 50
+"""
+
+import argparse
+import sys
+import timeit
+
+import pymupdf
+
+from app.services.local_ocr.splitter import split_invoices
+
+HEADER = "Suministros Levante S.L.\nCIF: A58329616\nCalle Mayor 1, Madrid"
+CUSTOMER = "Cliente: Exponential IT S.L. CIF: B12345674"
+DETAIL = "\n".join(
+    f"{i:3d} Material de oficina ref. {1000 + i} 1 x 10,00 10,00" for i in range(1, 9)
+)
+SUMMARY = "Base imponible 1.000,00\nIVA 21% 210,00\nTotal factura 1.210,00"
+
+# (nombre, páginas, rangos esperados)
+CASES = [
+    (
+        "una factura de dos páginas con «Total factura» al final",
+        [
+            f"{HEADER}\nFactura nº F-001\nFecha factura: 01/02/2024\n{CUSTOMER}\n{DETAIL}",
+            f"{DETAIL}\n{SUMMARY}",
+        ],
+        [range(0, 2)],
+    ),
+    (
+        "una factura de tres páginas con importes y fechas en cada página",
+        [
+            f"{HEADER}\nFactura: F-002\n{CUSTOMER}\n{DETAIL}\nSuma y sigue 80,00",
+            f"{DETAIL}\nImporte factura 160,00\nFecha factura 01/02/2024",
+            f"{DETAIL}\n{SUMMARY}",
+        ],
+        [range(0, 3)],
+    ),
+    (
+        "tres facturas de una página",
+        [
+            f"{HEADER}\nFactura nº F-{n:03d}\n{CUSTOMER}\n{DETAIL}\n{SUMMARY}"
+            for n in (10, 11, 12)
+        ],
+        [range(0, 1), range(1, 2), range(2, 3)],
+    ),
+    (
+        "dos facturas paginadas",
+        [
+            f"{HEADER}\nFactura nº F-020\nPágina 1 de 2\n{DETAIL}",
+            f"Página 2 de 2\n{DETAIL}\n{SUMMARY}",
+            f"{HEADER}\nFactura nº F-021\nPágina 1 de 1\n{DETAIL}\n{SUMMARY}",
+        ],
+        [range(0, 2), range(2, 3)],
+    ),
+]
+
+
+def build_pdf(pages: list[str]) -> bytes:
+    with pymupdf.open() as doc:
+        for text in pages:
+            page = doc.new_page()
+            page.insert_text((40, 40), text, fontsize=9)
+        return doc.tobytes()
+
+
+def split_ranges(file_bytes: bytes) -> list[range]:
+    parts = split_invoices(file_bytes)
+    if not parts:
+        return [range(0, pymupdf.open(stream=file_bytes, filetype="pdf").page_count)]
+    return [pages for pages, _ in parts]
+
+
+def check_cases() -> int:
+    failed = 0
+    for name, pages, expected in CASES:
+        actual = split_ranges(build_pdf(pages))
+        ok = actual == expected
+        failed += not ok
+        print(f"{'OK ' if ok else 'ERR'} {name}: {[list(r) for r in actual]}")
+    return failed
+
+
+def run_benchmark(repeat: int):
+    for name, pages, _ in CASES:
+        pdf = build_pdf(pages)
+        seconds = timeit.timeit(lambda: split_invoices(pdf), number=repeat) / repeat
+        print(f"{seconds * 1e3:8.2f} ms  {name}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Casos de referencia de la división de PDF con varias facturas"
+    )
+    parser.add_argument("--repeat", type=int, default=20)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if check_cases():
+        return 1
+    run_benchmark(args.repeat)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,443 @@
+"""
+Prueba de carga del orquestador contra servidores simulados.
+
+Arranca los stubs de `benchmarks.stubs`, apunta el orquestador a ellos y
+lanza escaneos con distintos niveles de concurrencia. Por cada nivel informa
+latencia p50/p95/p99, throughput, errores por tipo y pico de memoria (RSS)
+del proceso del orquestador.
+
+Escenarios:
+- scan: llama directamente a `handle_invoice_scan` (un escaneo por operación).
+- bulk: envía trabajos a POST /bulk y consulta GET /bulk/{job_id} hasta que
+  terminan; la latencia se mide por archivo, desde el envío del trabajo.
+
+Uso (desde backend/services/orchestrator):
+    python -m benchmarks.load_test --scenario scan --concurrency 1,8,32 --requests 200
+    python -m benchmarks.load_test --scenario bulk --concurrency 1,4 --requests 8 \\
+        --files-per-job 25 --tenants 4 --stub taggun=latency=1.5,rate_limit_rate=0.05
+    python -m benchmarks.load_test --json actual.json --baseline anterior.json
+"""
+
+import argparse
+import asyncio
+import io
+import itertools
+import json
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from benchmarks import fixtures
+from benchmarks.stubs import STUB_NAMES, FaultConfig, StubCluster, StubSettings
+
+PROCESSORS = ("ZOHO", "ODOO_V16", "ODOO_V18")
+
+
+@dataclass
+class LevelResult:
+    scenario: str
+    concurrency: int
+    operations: int
+    succeeded: int
+    failed: int
+    elapsed: float
+    throughput: float
+    p50: float
+    p95: float
+    p99: float
+    mean: float
+    max: float
+    peak_rss_mb: float
+    errors: dict[str, int] = field(default_factory=dict)
+
+
+class RssSampler:
+    """Muestrea el RSS del proceso en segundo plano y guarda el máximo."""
+
+    def __init__(self, interval: float = 0.02):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._page_size = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 0
+
+    def current(self) -> int:
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * self._page_size
+        except (OSError, ValueError, IndexError):
+            # Sin /proc solo se conoce el máximo de toda la vida del proceso
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            return peak if sys.platform == "darwin" else peak * 1024
+
+    def reset(self):
+        self.peak = self.current()
+
+    def start(self):
+        self.reset()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, self.current())
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    """Percentil por interpolación lineal entre rangos."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+@dataclass
+class Outcome:
+    """Resultado de una operación: latencias de los escaneos correctos y errores."""
+
+    latencies: list[float] = field(default_factory=list)
+    errors: list[str] = field(default_factory=list)
+
+
+async def drive(operation, operations: int, concurrency: int) -> tuple[Outcome, float]:
+    """
+    Ejecuta `operations` llamadas a `operation(i)` con `concurrency` workers
+    en bucle cerrado (cada worker lanza la siguiente al terminar la anterior).
+    """
+    counter = itertools.count()
+    total = Outcome()
+
+    async def worker():
+        while (index := next(counter)) < operations:
+            start = time.perf_counter()
+            try:
+                outcome = await operation(index)
+            except Exception as exc:
+                total.errors.append(type(exc).__name__)
+                continue
+            if outcome is None:
+                total.latencies.append(time.perf_counter() - start)
+            else:
+                total.latencies.extend(outcome.latencies)
+                total.errors.extend(outcome.errors)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return total, time.perf_counter() - start
+
+
+def _invoice(tenant: int, index: int) -> tuple[str, str, bytes]:
+    return (
+        fixtures.tenant_email(tenant),
+        fixtures.invoice_filename(tenant, index),
+        fixtures.invoice_image(),
+    )
+
+
+def scan_scenario(app, args, operations: int):
+    from fastapi import UploadFile
+    from starlette.datastructures import Headers
+
+    from app.services.intake.spool import spool_upload
+    from app.services.taggun.main import handle_invoice_scan
+
+    invoices = [_invoice(i % args.tenants, i) for i in range(operations)]
+
+    async def operation(index: int):
+        recipient, filename, content = invoices[index]
+        upload = await spool_upload(
+            UploadFile(
+                file=io.BytesIO(content),
+                filename=filename,
+                headers=Headers({"content-type": "image/png"}),
+            )
+        )
+        try:
+            await handle_invoice_scan(recipient=recipient, upload=upload)
+        finally:
+            upload.close()
+
+    return operation
+
+
+def bulk_scenario(app, args, operations: int):
+    import httpx
+    from datetime import datetime
+
+    jobs = [
+        [
+            _invoice(index % args.tenants, index * args.files_per_job + n)
+            for n in range(args.files_per_job)
+        ]
+        for index in range(operations)
+    ]
+    client = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app),
+        base_url="http://orchestrator",
+        timeout=None,
+    )
+
+    async def operation(index: int) -> Outcome:
+        invoices = jobs[index]
+        response = await client.post(
+            "/bulk",
+            data={"recipient": invoices[0][0]},
+            files=[
+                ("files", (name, content, "image/png")) for _, name, content in invoices
+            ],
+        )
+        response.raise_for_status()
+        job = response.json()
+
+        while job["status"] not in ("completed", "failed"):
+            await asyncio.sleep(args.poll_interval)
+            response = await client.get(f"/bulk/{job['job_id']}")
+            response.raise_for_status()
+            job = response.json()
+
+        created = datetime.fromisoformat(job["created_at"])
+        outcome = Outcome()
+        for item in job["files"]:
+            if item["status"] == "success":
+                finished = datetime.fromisoformat(item["finished_at"])
+                outcome.latencies.append((finished - created).total_seconds())
+            else:
+                outcome.errors.append((item.get("error") or {}).get("type", "Unknown"))
+        return outcome
+
+    return operation
+
+
+SCENARIOS = {"scan": scan_scenario, "bulk": bulk_scenario}
+
+
+async def run_levels(args) -> list[LevelResult]:
+    # El orquestador se importa después de apuntar el entorno a los stubs
+    from app.main import app
+    from app.core.lifespan import lifespan
+
+    sampler = RssSampler().start()
+    results = []
+    try:
+        async with lifespan(app):
+            if args.warmup:
+                warmup = SCENARIOS[args.scenario](app, args, args.warmup)
+                await drive(warmup, args.warmup, 1)
+
+            for concurrency in args.concurrency:
+                operation = SCENARIOS[args.scenario](app, args, args.requests)
+                sampler.reset()
+                outcome, elapsed = await drive(operation, args.requests, concurrency)
+                results.append(
+                    _summarize(
+                        args.scenario,
+                        concurrency,
+                        args.requests,
+                        outcome,
+                        elapsed,
+                        sampler.peak,
+                    )
+                )
+                print(_format_row(results[-1]), flush=True)
+    finally:
+        sampler.stop()
+    return results
+
+
+def _summarize(
+    scenario: str,
+    concurrency: int,
+    operations: int,
+    outcome: Outcome,
+    elapsed: float,
+    peak_rss: int,
+) -> LevelResult:
+    latencies = outcome.latencies
+    return LevelResult(
+        scenario=scenario,
+        concurrency=concurrency,
+        operations=operations,
+        succeeded=len(latencies),
+        failed=len(outcome.errors),
+        elapsed=round(elapsed, 3),
+        throughput=round(len(latencies) / elapsed, 3) if elapsed else 0.0,
+        p50=round(percentile(latencies, 50), 4),
+        p95=round(percentile(latencies, 95), 4),
+        p99=round(percentile(latencies, 99), 4),
+        mean=round(statistics.fmean(latencies), 4) if latencies else 0.0,
+        max=round(max(latencies), 4) if latencies else 0.0,
+        peak_rss_mb=round(peak_rss / 2**20, 1),
+        errors=dict(Counter(outcome.errors).most_common()),
+    )
+
+
+HEADER = (
+    f"{'conc':>5} {'ok':>6} {'err':>5} {'tput/s':>8} "
+    f"{'p50':>8} {'p95':>8} {'p99':>8} {'max':>8} {'rss MB':>8}  errores"
+)
+
+
+def _format_row(r: LevelResult) -> str:
+    errors = ", ".join(f"{k}={v}" for k, v in r.errors.items()) or "-"
+    return (
+        f"{r.concurrency:>5} {r.succeeded:>6} {r.failed:>5} {r.throughput:>8.2f} "
+        f"{r.p50:>8.3f} {r.p95:>8.3f} {r.p99:>8.3f} {r.max:>8.3f} "
+        f"{r.peak_rss_mb:>8.1f}  {errors}"
+    )
+
+
+def compare_with_baseline(
+    results: list[LevelResult], baseline_path: Path, tolerance: float
+) -> list[str]:
+    """Devuelve las regresiones de p95 o throughput respecto a una ejecución previa."""
+    baseline = {
+        (r["scenario"], r["concurrency"]): r
+        for r in json.loads(baseline_path.read_text())["results"]
+    }
+    regressions = []
+    for result in results:
+        previous = baseline.get((result.scenario, result.concurrency))
+        if previous is None:
+            continue
+        if previous["p95"] and result.p95 > previous["p95"] * (1 + tolerance):
+            regressions.append(
+                f"[{result.scenario} x{result.concurrency}] p95 "
+                f"{previous['p95']:.3f}s -> {result.p95:.3f}s"
+            )
+        if result.throughput < previous["throughput"] * (1 - tolerance):
+            regressions.append(
+                f"[{result.scenario} x{result.concurrency}] throughput "
+                f"{previous['throughput']:.2f}/s -> {result.throughput:.2f}/s"
+            )
+    return regressions
+
+
+def build_stub_settings(args) -> StubSettings:
+    settings = StubSettings(processor=args.processor)
+    for fault in settings.faults.values():
+        fault.latency = args.latency
+        fault.error_rate = args.error_rate
+        fault.rate_limit_rate = args.rate_limit_rate
+    for spec in args.stub:
+        name, _, values = spec.partition("=")
+        if name not in STUB_NAMES:
+            raise SystemExit(
+                f"Stub desconocido '{name}'. Opciones: {', '.join(STUB_NAMES)}"
+            )
+        settings.faults[name].update(values)
+    return settings
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.load_test",
+        description="Prueba de carga del orquestador contra servidores simulados.",
+    )
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="scan")
+    parser.add_argument(
+        "--concurrency",
+        type=lambda v: [int(x) for x in v.split(",")],
+        default=[1, 8, 32],
+        help="Niveles de concurrencia separados por comas (por defecto 1,8,32)",
+    )
+    parser.add_argument(
+        "--requests",
+        type=int,
+        default=100,
+        help="Operaciones por nivel: escaneos (scan) o trabajos (bulk)",
+    )
+    parser.add_argument("--files-per-job", type=int, default=10)
+    parser.add_argument("--tenants", type=int, default=1)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--poll-interval", type=float, default=0.25)
+    parser.add_argument("--processor", choices=PROCESSORS, default="ZOHO")
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=FaultConfig.latency,
+        help="Latencia media de todos los stubs en segundos",
+    )
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument(
+        "--stub",
+        action="append",
+        default=[],
+        metavar="NOMBRE=CLAVE=VALOR,...",
+        help=(
+            "Ajustes de un stub concreto, p. ej. "
+            "taggun=latency=1.5,jitter=0.5,error_rate=0.01,rate_limit_rate=0.05,retry_after=2"
+        ),
+    )
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--json", type=Path, help="Guarda los resultados en JSON")
+    parser.add_argument(
+        "--baseline",
+        type=Path,
+        help="JSON de una ejecución previa; sale con código 1 si hay regresiones",
+    )
+    parser.add_argument("--max-regression", type=float, default=0.15)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    workdir = tempfile.TemporaryDirectory(prefix="orchestrator-bench-")
+    cluster = StubCluster(build_stub_settings(args), Path(workdir.name)).start()
+
+    try:
+        os.environ.update(cluster.environment())
+        os.environ.update(
+            {
+                "DATA_DIR": str(Path(workdir.name) / "data"),
+                "ERROR_LOG_FILE": str(Path(workdir.name) / "errors.log"),
+                "LOG_LEVEL": args.log_level,
+            }
+        )
+        os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+        print(
+            f"Escenario {args.scenario} | {args.requests} operaciones por nivel | "
+            f"procesador {args.processor} | stubs en {cluster.ports}"
+        )
+        print(HEADER)
+        results = asyncio.run(run_levels(args))
+    finally:
+        cluster.stop()
+        workdir.cleanup()
+
+    if args.json:
+        args.json.write_text(
+            json.dumps(
+                {"args": sys.argv[1:], "results": [asdict(r) for r in results]},
+                indent=2,
+            )
+        )
+
+    if args.baseline:
+        regressions = compare_with_baseline(results, args.baseline, args.max_regression)
+        for line in regressions:
+            print(f"REGRESIÓN {line}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
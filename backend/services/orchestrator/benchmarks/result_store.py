@@ -0,0 +1,123 @@
+"""
+Casos de referencia y micro-benchmark de la caché de resultados de escaneo
+(`app.services.results.store`).
+
+Antes de medir se comprueba que los resultados caducados se borran del
+archivo SQLite al abrirlo y al guardar, y que los vigentes se conservan.
+
+Uso (desde backend/services/orchestrator):
+    python -m benchmarks.result_store
+    python -m benchmarks.result_store --rows 50000 --repeat 500
+"""
+
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from app.services.results.store import ScanResultStore
+
+TTL = 3600
+RESULT = {"filename": "factura.pdf", "company_vat": "B12345674", "erp": {"id": 1}}
+
+
+async def count_rows(store: ScanResultStore) -> int:
+    row = await store.fetchone("SELECT COUNT(*) AS total FROM scan_results")
+    return row["total"]
+
+
+async def age_rows(store: ScanResultStore, seconds: float):
+    await store.execute(
+        "UPDATE scan_results SET created_at = created_at - ?", (seconds,)
+    )
+
+
+async def purge_on_save(path: Path) -> str | None:
+    store = await ScanResultStore(path, ttl=TTL).open()
+    try:
+        await store.save("viejo", "a@example.com", RESULT)
+        await age_rows(store, TTL + 1)
+        await store.save("nuevo", "a@example.com", RESULT)
+        if await count_rows(store) != 1:
+            return f"{await count_rows(store)} filas (se esperaba 1)"
+        if await store.get("nuevo", "A@example.com") != RESULT:
+            return "el resultado vigente no se conservó"
+        return None
+    finally:
+        await store.close()
+
+
+async def purge_on_open(path: Path) -> str | None:
+    store = await ScanResultStore(path, ttl=TTL).open()
+    await store.save("viejo", "a@example.com", RESULT)
+    await age_rows(store, TTL + 1)
+    await store.close()
+
+    store = await ScanResultStore(path, ttl=TTL).open()
+    try:
+        total = await count_rows(store)
+        return None if total == 0 else f"{total} filas caducadas tras abrir"
+    finally:
+        await store.close()
+
+
+CASES = [
+    ("se borran los caducados al guardar", purge_on_save),
+    ("se borran los caducados al abrir", purge_on_open),
+]
+
+
+def check_cases() -> int:
+    failed = 0
+    for name, case in CASES:
+        with tempfile.TemporaryDirectory() as tmp:
+            error = asyncio.run(case(Path(tmp) / "results.sqlite"))
+        failed += error is not None
+        print(f"{'OK ' if error is None else 'ERR'} {name}: {error or 'correcto'}")
+    return failed
+
+
+async def time_saves(path: Path, rows: int, repeat: int) -> float:
+    store = await ScanResultStore(path, ttl=TTL).open()
+    try:
+        now = time.time()
+        await asyncio.to_thread(
+            store._connection().executemany,
+            "INSERT INTO scan_results VALUES (?, ?, ?, ?)",
+            [(f"h{n}", "a@example.com", "{}", now) for n in range(rows)],
+        )
+        start = time.perf_counter()
+        for n in range(repeat):
+            await store.save(f"s{n}", "a@example.com", RESULT)
+        return (time.perf_counter() - start) / repeat
+    finally:
+        await store.close()
+
+
+def run_benchmark(rows: int, repeat: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        seconds = asyncio.run(time_saves(Path(tmp) / "results.sqlite", rows, repeat))
+    print(f"{seconds * 1e3:8.3f} ms  save() con {rows} resultados vigentes")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Casos de referencia de la caché de resultados de escaneo"
+    )
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=200)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if check_cases():
+        return 1
+    run_benchmark(args.rows, args.repeat)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,473 @@
+"""
+Servidores locales que sustituyen a las dependencias externas del
+orquestador durante las pruebas de carga: Taggun, admin-django,
+zoho_integration, odoo_integration, openai_integration, AWS Secrets Manager
+y Dropbox.
+
+Cada servidor admite latencia, tasa de errores 500 y tasa de respuestas 429
+(con `Retry-After`) configurables. Se ejecutan en un proceso aparte para que
+su CPU y su memoria no cuenten en las mediciones del orquestador.
+"""
+
+import asyncio
+import datetime
+import ipaddress
+import itertools
+import json
+import multiprocessing
+import random
+import socket
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from benchmarks import fixtures
+
+STUB_NAMES = ("taggun", "admin", "zoho", "odoo", "openai", "secrets", "dropbox")
+
+
+@dataclass
+class FaultConfig:
+    """Comportamiento simulado de un servicio."""
+
+    latency: float = 0.05
+    jitter: float = 0.2
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    retry_after: float = 1.0
+
+    def update(self, spec: str):
+        """Aplica un texto `clave=valor,clave=valor` sobre la configuración."""
+        for item in filter(None, spec.split(",")):
+            key, _, value = item.partition("=")
+            key = key.strip().replace("-", "_")
+            if key not in self.__dataclass_fields__:
+                raise ValueError(f"[STUBS] Parámetro desconocido: {key}")
+            setattr(self, key, float(value))
+        return self
+
+
+@dataclass
+class StubSettings:
+    faults: dict[str, FaultConfig] = field(
+        default_factory=lambda: {name: FaultConfig() for name in STUB_NAMES}
+    )
+    # ZOHO, ODOO_V16 u ODOO_V18
+    processor: str = "ZOHO"
+
+
+def _fault_middleware(app: FastAPI, fault: FaultConfig):
+    @app.middleware("http")
+    async def inject(request: Request, call_next):
+        if fault.latency > 0:
+            spread = fault.latency * fault.jitter
+            await asyncio.sleep(
+                max(0.0, random.uniform(-spread, spread) + fault.latency)
+            )
+
+        roll = random.random()
+        if roll < fault.rate_limit_rate:
+            return JSONResponse(
+                status_code=429,
+                headers={"Retry-After": f"{fault.retry_after:g}"},
+                content={
+                    "error_type": "RateLimitExceeded",
+                    "detail": "Límite de peticiones simulado",
+                    "status_code": 429,
+                },
+            )
+        if roll < fault.rate_limit_rate + fault.error_rate:
+            return JSONResponse(
+                status_code=500,
+                content={
+                    "error_type": "StubServerError",
+                    "detail": "Error simulado",
+                    "status_code": 500,
+                },
+            )
+        return await call_next(request)
+
+
+def taggun_app(fault: FaultConfig) -> FastAPI:
+    app = FastAPI()
+    _fault_middleware(app, fault)
+
+    @app.post("/api/receipt/v1/verbose/file")
+    async def ocr(request: Request):
+        form = await request.form()
+        upload = form["file"]
+        await upload.read()
+        return fixtures.taggun_payload(fixtures.tax_id_from_filename(upload.filename))
+
+    return app
+
+
+def admin_app(fault: FaultConfig) -> FastAPI:
+    app = FastAPI()
+    _fault_middleware(app, fault)
+
+    @app.post("/auth/identify/")
+    async def identify(request: Request):
+        email = (await request.json())["email"]
+        index = fixtures.tenant_index(email)
+        return {
+            "user_id": index + 1,
+            "accounts": [
+                {
+                    "account_id": index + 1,
+                    "account_name": f"Tenant {index}",
+                    "account_tax_id": fixtures.tenant_tax_id(index),
+                }
+            ],
+        }
+
+    @app.post("/user/scanning/")
+    async def register_scan():
+        return {"status": "registered"}
+
+    return app
+
+
+def zoho_app(fault: FaultConfig) -> FastAPI:
+    app = FastAPI()
+    _fault_middleware(app, fault)
+
+    @app.get("/books/contacts")
+    async def contacts():
+        return [
+            {
+                "contact_id": "partner-1",
+                "contact_name": fixtures.PARTNER_NAME,
+                "status": "active",
+                "cf_cif": fixtures.PARTNER_VAT,
+            }
+        ]
+
+    @app.get("/books/bills")
+    async def bills():
+        return []
+
+    @app.get("/books/taxes")
+    async def taxes():
+        return [
+            {
+                "tax_id": "tax-21",
+                "tax_percentage": 21.0,
+                "tax_account_id": "account-472",
+                "status": "active",
+            }
+        ]
+
+    @app.get("/books/chart-of-accounts")
+    async def chart_of_accounts():
+        return [
+            {
+                "account_id": "account-629",
+                "account_name": "Otros servicios",
+                "description": "Gastos generales",
+                "account_type": "expense",
+                "is_active": True,
+            }
+        ]
+
+    @app.post("/books/contact")
+    async def create_contact():
+        return {"code": 0, "message": "ok", "contact": {"contact_id": "partner-1"}}
+
+    @app.post("/books/bill")
+    async def create_bill(request: Request):
+        body = await request.json()
+        return {
+            "code": 0,
+            "message": "ok",
+            "bill": {
+                "bill_id": uuid.uuid4().hex,
+                "bill_number": body.get("bill_number"),
+                "vendor_id": body.get("vendor_id"),
+            },
+        }
+
+    @app.post("/books/bill/{bill_id}/attachment")
+    async def attach(bill_id: str, request: Request):
+        await request.body()
+        return {"code": 0, "message": "ok"}
+
+    return app
+
+
+def odoo_app(fault: FaultConfig) -> FastAPI:
+    app = FastAPI()
+    _fault_middleware(app, fault)
+    ids = itertools.count(1)
+
+    async def create(request: Request):
+        await request.body()
+        return {"id": next(ids)}
+
+    for version in ("v16", "v18"):
+        prefix = f"/odoo/{version}"
+        for route in (
+            "create-supplier",
+            "create-address",
+            "create-product",
+            "register-invoice",
+            "attachment",
+        ):
+            app.add_api_route(f"{prefix}/{route}", create, methods=["POST"])
+        app.add_api_route(f"{prefix}/get-all-tax-id", lambda: [], methods=["GET"])
+
+    return app
+
+
+def openai_app(fault: FaultConfig) -> FastAPI:
+    app = FastAPI()
+    _fault_middleware(app, fault)
+
+    @app.post("/classify-expense")
+    async def classify_expense():
+        return {"account_id": "account-629", "account_name": "Otros servicios"}
+
+    @app.post("/classify-odoo-tax_id")
+    async def classify_tax_id():
+        return {"tax_id_number": 1, "description": "IVA 21%"}
+
+    @app.post("/search_cif_by_partner")
+    async def search_cif():
+        return {"CIF": fixtures.PARTNER_VAT}
+
+    return app
+
+
+def secrets_app(fault: FaultConfig, processor: str) -> FastAPI:
+    """API JSON de Secrets Manager, solo `GetSecretValue`."""
+    app = FastAPI()
+    _fault_middleware(app, fault)
+    invoice_processor, _, odoo_version = processor.partition("_")
+
+    def secret_for(name: str) -> dict:
+        if name == "exponentialit/core":
+            return {
+                "JWT_SECRET_KEY": "bench",
+                "CRYPTO_KEY": "bench",
+                "TAGGUN_API_KEY": "bench",
+            }
+        return {
+            "INVOICE_PROCESSOR": invoice_processor,
+            "ODOO_VERSION": odoo_version or "V18",
+            "TAX_ID_ODOO": 1,
+            "DROPBOX_ACCESS_TOKEN": "bench",
+            "DROPBOX_REFRESH_TOKEN": "bench",
+            "DROPBOX_APP_KEY": "bench",
+            "DROPBOX_APP_SECRET": "bench",
+        }
+
+    @app.post("/")
+    async def get_secret_value(request: Request):
+        body = json.loads(await request.body())
+        name = body["SecretId"]
+        return JSONResponse(
+            media_type="application/x-amz-json-1.1",
+            content={
+                "ARN": f"arn:aws:secretsmanager:eu-west-1:000000000000:secret:{name}",
+                "Name": name,
+                "VersionId": str(uuid.uuid4()),
+                "SecretString": json.dumps(secret_for(name)),
+                "VersionStages": ["AWSCURRENT"],
+                "CreatedDate": 0,
+            },
+        )
+
+    return app
+
+
+def dropbox_app(fault: FaultConfig) -> FastAPI:
+    """API y contenido de Dropbox servidos en el mismo puerto (HTTPS)."""
+    app = FastAPI()
+    _fault_middleware(app, fault)
+
+    @app.post("/oauth2/token")
+    async def token():
+        return {"access_token": "bench", "token_type": "bearer", "expires_in": 14400}
+
+    @app.post("/2/files/get_metadata")
+    async def get_metadata():
+        return JSONResponse(
+            status_code=409,
+            content={
+                "error_summary": "path/not_found/",
+                "error": {".tag": "path", "path": {".tag": "not_found"}},
+            },
+        )
+
+    @app.post("/2/files/upload")
+    async def upload(request: Request):
+        arg = json.loads(request.headers.get("Dropbox-API-Arg", "{}"))
+        size = len(await request.body())
+        path = arg.get("path", "/bench")
+        now = datetime.datetime.now(datetime.timezone.utc)
+        return {
+            "name": path.rsplit("/", 1)[-1],
+            "id": f"id:{uuid.uuid4().hex}",
+            "client_modified": now.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "server_modified": now.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "rev": uuid.uuid4().hex[:12],
+            "size": size,
+            "path_lower": path.lower(),
+            "path_display": path,
+        }
+
+    return app
+
+
+def build_apps(settings: StubSettings) -> dict[str, FastAPI]:
+    faults = settings.faults
+    return {
+        "taggun": taggun_app(faults["taggun"]),
+        "admin": admin_app(faults["admin"]),
+        "zoho": zoho_app(faults["zoho"]),
+        "odoo": odoo_app(faults["odoo"]),
+        "openai": openai_app(faults["openai"]),
+        "secrets": secrets_app(faults["secrets"], settings.processor),
+        "dropbox": dropbox_app(faults["dropbox"]),
+    }
+
+
+def write_self_signed_cert(directory: Path) -> tuple[Path, Path]:
+    """Certificado para 127.0.0.1; el SDK de Dropbox solo usa HTTPS."""
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.x509.oid import NameOID
+
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "127.0.0.1")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(minutes=5))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .add_extension(
+            x509.SubjectAlternativeName(
+                [
+                    x509.DNSName("localhost"),
+                    x509.IPAddress(ipaddress.ip_address("127.0.0.1")),
+                ]
+            ),
+            critical=False,
+        )
+        .add_extension(x509.BasicConstraints(ca=True, path_length=None), critical=True)
+        .sign(key, hashes.SHA256())
+    )
+
+    cert_path = directory / "stub-cert.pem"
+    key_path = directory / "stub-key.pem"
+    cert_path.write_bytes(cert.public_bytes(serialization.Encoding.PEM))
+    key_path.write_bytes(
+        key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        )
+    )
+    return cert_path, key_path
+
+
+def _serve(settings: StubSettings, cert: tuple[str, str], ports) -> None:
+    """Punto de entrada del proceso hijo."""
+
+    async def main():
+        servers, sockets = [], {}
+        for name, app in build_apps(settings).items():
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            sock.bind(("127.0.0.1", 0))
+            sockets[name] = sock
+            tls = (
+                {"ssl_certfile": cert[0], "ssl_keyfile": cert[1]}
+                if name == "dropbox"
+                else {}
+            )
+            config = uvicorn.Config(
+                app,
+                log_level="warning",
+                access_log=False,
+                backlog=4096,
+                **tls,
+            )
+            servers.append((uvicorn.Server(config), sock))
+
+        tasks = [
+            asyncio.create_task(server.serve(sockets=[sock]))
+            for server, sock in servers
+        ]
+        while not all(server.started for server, _ in servers):
+            await asyncio.sleep(0.05)
+        ports.send({name: sock.getsockname()[1] for name, sock in sockets.items()})
+        await asyncio.gather(*tasks)
+
+    asyncio.run(main())
+
+
+class StubCluster:
+    """Arranca todos los servidores simulados en un proceso hijo."""
+
+    def __init__(self, settings: StubSettings, workdir: Path):
+        self.settings = settings
+        self.workdir = Path(workdir)
+        self.ports: dict[str, int] = {}
+        self.cert_path: Path | None = None
+        self._process: multiprocessing.Process | None = None
+
+    def start(self, timeout: float = 30.0):
+        self.cert_path, key_path = write_self_signed_cert(self.workdir)
+        ctx = multiprocessing.get_context("spawn")
+        receiver, sender = ctx.Pipe(duplex=False)
+        self._process = ctx.Process(
+            target=_serve,
+            args=(self.settings, (str(self.cert_path), str(key_path)), sender),
+            name="benchmark-stubs",
+            daemon=True,
+        )
+        self._process.start()
+        if not receiver.poll(timeout):
+            self.stop()
+            raise RuntimeError(
+                "[STUBS] Los servidores simulados no arrancaron a tiempo"
+            )
+        self.ports = receiver.recv()
+        return self
+
+    def stop(self):
+        if self._process is not None:
+            self._process.terminate()
+            self._process.join(timeout=5)
+            self._process = None
+
+    def url(self, name: str, scheme: str = "http") -> str:
+        return f"{scheme}://127.0.0.1:{self.ports[name]}"
+
+    def environment(self) -> dict[str, str]:
+        """Variables que apuntan el orquestador (y sus SDKs) a los stubs."""
+        dropbox_host = f"127.0.0.1:{self.ports['dropbox']}"
+        return {
+            "URL_ADMIN": self.url("admin"),
+            "URL_ZOHO": self.url("zoho"),
+            "URL_ODOO": self.url("odoo"),
+            "URL_OPENAPI": self.url("openai"),
+            "TAGGUN_URL": f"{self.url('taggun')}/api/receipt/v1/verbose/file",
+            "AWS_ENDPOINT_URL_SECRETS_MANAGER": self.url("secrets"),
+            "AWS_ACCESS_KEY_ID": "bench",
+            "AWS_SECRET_ACCESS_KEY": "bench",
+            "AWS_DEFAULT_REGION": "eu-west-1",
+            "DROPBOX_API_HOST": dropbox_host,
+            "DROPBOX_API_CONTENT_HOST": dropbox_host,
+            "REQUESTS_CA_BUNDLE": str(self.cert_path),
+        }
@@ -0,0 +1,179 @@
+"""
+Micro-benchmark del escáner de identificadores fiscales de `TaxIdExtractor`.
+
+Compara el escáner actual (`scan_tax_ids`: una pasada para localizar las
+secuencias de dígitos y los patrones solo en sus ventanas) con la extracción
+anterior (un `findall` por patrón sobre todo el texto). Antes de medir
+comprueba con textos aleatorios que ambos devuelven exactamente los mismos
+candidatos y en el mismo orden.
+
+Uso (desde backend/services/orchestrator):
+    python -m benchmarks.tax_id_scanner
+    python -m benchmarks.tax_id_scanner --pages 1,5,20 --repeat 200 --fuzz 5000
+"""
+
+import argparse
+import random
+import re
+import string
+import sys
+import timeit
+
+from benchmarks import fixtures
+from app.core.utils.tax_id_extractor import (
+    TAX_ID_PATTERNS,
+    TaxIdExtractor,
+    digit_windows,
+    join_spaced_cifs,
+    scan_tax_ids,
+)
+
+
+def legacy_extract(text: str) -> list[tuple[str, str]]:
+    """Extracción anterior: limpieza y un `findall` por patrón."""
+    cleaned_text = re.sub(
+        r"\b([A-HJ-NP-SUVW])\s?(\d{1,2})\s?(\d{3})\s?(\d{3})([0-9A-J])\b",
+        r"\1\2\3\4\5",
+        text,
+    )
+    ids, seen = [], set()
+    for tipo, pattern in TAX_ID_PATTERNS.items():
+        for match in re.findall(pattern.pattern, cleaned_text):
+            cleaned = match.replace("-", "").replace(".", "")
+            if cleaned not in seen:
+                ids.append((tipo, cleaned))
+                seen.add(cleaned)
+    return ids
+
+
+def current_extract(text: str) -> list[tuple[str, str]]:
+    windows = digit_windows(text)
+    cleaned_text = join_spaced_cifs(text, windows)
+    if cleaned_text is not text:
+        windows = digit_windows(cleaned_text)
+    return [(tipo, valor) for tipo, valor, _ in scan_tax_ids(cleaned_text, windows)]
+
+
+def invoice_text(pages: int, rng: random.Random) -> str:
+    """Texto OCR de una factura con `pages` páginas de líneas de detalle."""
+    header = fixtures.taggun_payload(fixtures.tenant_tax_id(0))["text"]["text"]
+    lines = [header]
+    for page in range(pages):
+        lines.append(f"Página {page + 1} de {pages}")
+        for index in range(40):
+            lines.append(
+                f"{index + 1:3d} REF-{rng.randint(1000, 99999)} Artículo {index} "
+                f"{rng.randint(1, 9)} x {rng.randint(1, 999)},{rng.randint(0, 99):02d} "
+                f"21% {rng.randint(1, 9999)},{rng.randint(0, 99):02d} EUR"
+            )
+        lines.append(
+            f"IBAN ES91 2100 0418 4502 0005 1332 Tel. 9{rng.randint(10**7, 10**8 - 1)}"
+        )
+    return "\n".join(lines)
+
+
+def fuzz_text(rng: random.Random) -> str:
+    """Fragmentos con forma de identificador mezclados con ruido."""
+    # Incluye espacios duros y finos, acentos, € y dígitos no ASCII
+    alphabet = string.ascii_letters + string.digits + " .-\n/:,ESZ\xa0\u2009áÑ€٣۵"
+    pieces = []
+    for _ in range(rng.randint(1, 12)):
+        kind = rng.random()
+        if kind < 0.2:
+            pieces.append(
+                fixtures.cif_with_control(
+                    rng.choice("ABEHKPQSW"), f"{rng.randint(0, 9_999_999):07d}"
+                )
+            )
+        elif kind < 0.35:
+            number = rng.randint(0, 99_999_999)
+            letter = "TRWAGMYFPDXBNJZSQVHLCKE"[number % 23]
+            dotted = f"{number:08d}"
+            if rng.random() < 0.5:
+                dotted = f"{dotted[:2]}.{dotted[2:5]}.{dotted[5:]}"
+            pieces.append(dotted + rng.choice(["", "-"]) + letter)
+        elif kind < 0.5:
+            pieces.append(
+                rng.choice(["ES", "PT", "FR", "es"])
+                + "".join(rng.choices(string.digits + "ABX", k=rng.randint(8, 10)))
+            )
+        elif kind < 0.6:
+            digits = "".join(rng.choices(string.digits, k=9))
+            space = rng.choice([" ", "", "\xa0", "\n", "\u2009"])
+            pieces.append(
+                space.join(
+                    [
+                        rng.choice("ABHW"),
+                        digits[:2],
+                        digits[2:5],
+                        digits[5:8],
+                        digits[8],
+                    ]
+                )
+            )
+        else:
+            pieces.append("".join(rng.choices(alphabet, k=rng.randint(1, 30))))
+    return rng.choice(["", " ", "\n", "-", ".", "\xa0", "\t"]).join(pieces)
+
+
+def check_equivalence(samples: int, seed: int) -> int:
+    rng = random.Random(seed)
+    for index in range(samples):
+        text = fuzz_text(rng) if index % 10 else invoice_text(rng.randint(1, 3), rng)
+        expected, actual = legacy_extract(text), current_extract(text)
+        if expected != actual:
+            print(f"DIFERENCIA en la muestra {index}:\n{text!r}")
+            print(f"  anterior: {expected}\n  actual:   {actual}")
+            return 1
+    print(f"Equivalencia comprobada en {samples} textos aleatorios")
+    return 0
+
+
+def run_benchmark(pages_levels: list[int], repeat: int, seed: int):
+    rng = random.Random(seed)
+    print(
+        f"{'páginas':>8} {'chars':>8} {'anterior µs':>12} {'actual µs':>10} {'mejora':>7} {'valid x2 µs':>12}"
+    )
+    for pages in pages_levels:
+        text = invoice_text(pages, rng)
+        legacy = timeit.timeit(lambda: legacy_extract(text), number=repeat) / repeat
+        current = timeit.timeit(lambda: current_extract(text), number=repeat) / repeat
+
+        # Un escaneo consulta los válidos al menos dos veces (empresa y proveedor)
+        def extractor_round():
+            extractor = TaxIdExtractor(text=text, all_tax_ids=[])
+            extractor.valid_tax_ids()
+            extractor.valid_tax_ids()
+
+        full = timeit.timeit(extractor_round, number=repeat) / repeat
+        print(
+            f"{pages:>8} {len(text):>8} {legacy * 1e6:>12.0f} {current * 1e6:>10.0f} "
+            f"{legacy / current:>6.1f}x {full * 1e6:>12.0f}"
+        )
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Micro-benchmark del escáner de identificadores fiscales"
+    )
+    parser.add_argument(
+        "--pages", default="1,5,20", help="Páginas de detalle por texto"
+    )
+    parser.add_argument("--repeat", type=int, default=100)
+    parser.add_argument(
+        "--fuzz", type=int, default=2000, help="Textos de la comprobación diferencial"
+    )
+    parser.add_argument("--seed", type=int, default=7)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if check_equivalence(args.fuzz, args.seed):
+        return 1
+    run_benchmark([int(p) for p in args.pages.split(",")], args.repeat, args.seed)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,8 @@
 # Punto de entrada principal de la app FastAPI
 from fastapi import FastAPI
 from app.core.lifespan import lifespan
-from app.api.routes import auth, books
+from app.api.routes import auth, books, metrics
+from app.core.metrics import metrics_middleware
 from exponential_core.exceptions import (
     setup_exception_handlers,
     GlobalExceptionMiddleware,
@@ -15,12 +16,16 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+# Latencia y peticiones en curso por ruta (dentro del manejador global de errores)
+app.middleware("http")(metrics_middleware)
+
 # Middleware global para manejar errores inesperados
 app.add_middleware(GlobalExceptionMiddleware)
 
 # Registrar rutas
 app.include_router(auth.router)
 app.include_router(books.router)
+app.include_router(metrics.router)
 
 
 # Registrar todos los exception handlers de forma automática
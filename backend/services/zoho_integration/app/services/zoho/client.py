@@ -2,6 +2,7 @@ import httpx
 from fastapi import HTTPException, UploadFile, status
 from urllib.parse import urlencode, urljoin, urlparse, parse_qsl, urlunparse
 
+from app.core.metrics import observe_dependency
 from app.core.settings import settings
 from app.services.zoho.secrets import SecretsServiceZoho
 from app.services.zoho.tokens import get_access_token
@@ -43,7 +44,8 @@ async def zoho_get(path: str, company_vat: str = "", include_org: bool = False):
     headers = {"Authorization": f"Zoho-oauthtoken {token}"}
 
     async with httpx.AsyncClient() as client:
-        response = await client.get(url, headers=headers)
+        with observe_dependency("zoho_api", "get"):
+            response = await client.get(url, headers=headers)
     return response.json()
 
 
@@ -63,7 +65,8 @@ async def zoho_post(
     }
 
     async with httpx.AsyncClient() as client:
-        response = await client.post(url, headers=headers, json=data)
+        with observe_dependency("zoho_api", "post"):
+            response = await client.post(url, headers=headers, json=data)
     return response.json()
 
 
@@ -87,7 +90,8 @@ async def zoho_post_file(
     timeout = httpx.Timeout(120.0)
 
     async with httpx.AsyncClient(timeout=timeout) as client:
-        response = await client.post(url, headers=headers, files=files)
+        with observe_dependency("zoho_api", "post_file"):
+            response = await client.post(url, headers=headers, files=files)
     return response.json()
 
 
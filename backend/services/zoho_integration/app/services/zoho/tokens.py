@@ -4,6 +4,7 @@ import httpx
 from fastapi import HTTPException, status
 from datetime import datetime, timedelta, timezone
 
+from app.core.metrics import observe_dependency
 from app.core.settings import settings
 from app.services.zoho.schemas.tokens_response import ZohoTokenResponse
 from app.services.zoho.secrets import SecretsServiceZoho
@@ -36,9 +37,10 @@ async def get_access_token(secrets_service: SecretsServiceZoho) -> str:
     }
 
     async with httpx.AsyncClient() as client:
-        token_response = await client.post(
-            f"{settings.ZOHO_BASE_URL}/oauth/v2/token", data=data
-        )
+        with observe_dependency("zoho_oauth", "refresh_token"):
+            token_response = await client.post(
+                f"{settings.ZOHO_BASE_URL}/oauth/v2/token", data=data
+            )
 
     tokens_raw = token_response.json()
     tokens = ZohoTokenResponse.from_response(tokens_raw)